@@ -2,27 +2,500 @@
 AppleScript wrapper functions for controlling Apple Music on macOS.
 """
 
+import os
 import subprocess
+import itertools
 import json
+import math
+import tempfile
+from config import Config
+from framing import decode_columns, decode_record, iter_records
+from library_index import parse_database_id, parse_persistent_id
+from osascript_pool import get_pool, ScriptError, WorkerError, WorkerTimeout
+from player_backend import TrackNotFound
+from player_state import PlayerSnapshot
+from script_cache import ScriptCache
+
+
+# Parameterised scripts, compiled once and run with their values as argv
+templates = ScriptCache(Config.CONFIG_DIR / 'scripts')
+
+# Whole player state in one round-trip, as one framed record (see
+# framing.py). Times are sent as integer milliseconds to stay clear of locale
+# decimal separators.
+templates.register('player_snapshot', '''
+on run argv
+    if application "Music" is not running then return "offline"
+    set US to (ASCII character 31)
+    tell application "Music"
+        set playerState to player state as string
+        set header to playerState & US & sound volume & US & (shuffle enabled as string) & US & (song repeat as string)
+        if player state is stopped then return header
+        try
+            set t to current track
+            set durationMs to ((duration of t) * 1000) div 1
+            set positionMs to (player position * 1000) div 1
+            return header & US & (database ID of t) & US & (persistent ID of t) & US & durationMs & US & positionMs & US & (name of t) & US & (artist of t) & US & (album of t)
+        on error
+            return header
+        end try
+    end tell
+end run
+''')
+
+# Modification dates as days:seconds since 1970-01-01 on the local clock (the
+# total overflows AppleScript integers); see library_index.modification_stamp
+STAMPS_HANDLER = '''
+on stamps(theDates)
+    set epoch to current date
+    set day of epoch to 1
+    set year of epoch to 1970
+    set month of epoch to January
+    set time of epoch to 0
+    script dates
+        property src : theDates
+        property out : {}
+    end script
+    repeat with i from 1 to count of dates's src
+        try
+            set delta to (item i of dates's src) - epoch
+            set end of dates's out to ((delta div 86400) as text) & ":" & (((delta mod 86400) div 1) as text)
+        on error
+            set end of dates's out to ""
+        end try
+    end repeat
+    return dates's out
+end stamps
+'''
+
+# Bulk metadata export: one Apple Event per property column. Each column is
+# one framed record (see framing.py) with one field per track.
+templates.register('export_library', '''
+on run argv
+    set RS to (ASCII character 30)
+    set AppleScript's text item delimiters to (ASCII character 31)
+    tell application "Music"
+        set src to library playlist 1
+        set out to ((database ID of every track of src) as text) & RS
+        set out to out & ((persistent ID of every track of src) as text) & RS
+        set out to out & ((name of every track of src) as text) & RS
+        set out to out & ((artist of every track of src) as text) & RS
+        set out to out & ((album of every track of src) as text) & RS
+        set out to out & ((album artist of every track of src) as text) & RS
+        set out to out & ((genre of every track of src) as text) & RS
+        set out to out & ((year of every track of src) as text) & RS
+        set out to out & ((duration of every track of src) as text) & RS
+        set out to out & ((played count of every track of src) as text) & RS
+        set out to out & ((my stamps(modification date of every track of src)) as text)
+    end tell
+    set AppleScript's text item delimiters to ""
+    return out
+end run
+''' + STAMPS_HANDLER)
+
+# Change detection: persistent ID and modification date columns only
+templates.register('export_fingerprints', '''
+on run argv
+    set RS to (ASCII character 30)
+    set AppleScript's text item delimiters to (ASCII character 31)
+    tell application "Music"
+        set src to library playlist 1
+        set out to ((persistent ID of every track of src) as text) & RS
+        set out to out & ((my stamps(modification date of every track of src)) as text)
+    end tell
+    set AppleScript's text item delimiters to ""
+    return out
+end run
+''' + STAMPS_HANDLER)
+
+# Full metadata for specific tracks (argv = persistent IDs), one framed
+# record per track.
+templates.register('fetch_tracks', '''
+on run argv
+    set US to (ASCII character 31)
+    set RS to (ASCII character 30)
+    set out to {}
+    tell application "Music"
+        repeat with pid in argv
+            try
+                set t to (first track of library playlist 1 whose persistent ID is (pid as text))
+                set end of out to ((database ID of t) as text) & US & (persistent ID of t) & US & (name of t) & US & (artist of t) & US & (album of t) & US & (album artist of t) & US & (genre of t) & US & ((year of t) as text) & US & ((duration of t) as text) & US & ((played count of t) as text) & US & (item 1 of (my stamps({modification date of t})))
+            end try
+        end repeat
+    end tell
+    set AppleScript's text item delimiters to RS
+    set joined to out as text
+    set AppleScript's text item delimiters to ""
+    return joined
+end run
+''' + STAMPS_HANDLER)
+
+# Live search through Music's own search, which tokenises the query and
+# matches every kind of track (file, shared and cloud). It returns a list
+# rather than a reference, so properties cannot be fetched as columns;
+# instead each hit costs one Apple Event (`properties of`), and the loop
+# stops as soon as the caller's limit is reached.
+templates.register('search_tracks', '''
+on run argv
+    set q to item 1 of argv
+    set maxCount to (item 2 of argv) as integer
+    set US to (ASCII character 31)
+    set out to {}
+    tell application "Music"
+        repeat with t in (search library playlist 1 for q)
+            if (count of out) is greater than or equal to maxCount then exit repeat
+            try
+                set p to properties of t
+                set end of out to (name of p) & US & (artist of p) & US & (album of p) & US & ((database ID of p) as text)
+            end try
+        end repeat
+    end tell
+    set AppleScript's text item delimiters to (ASCII character 30)
+    set joined to out as text
+    set AppleScript's text item delimiters to ""
+    return joined
+end run
+''')
+
+# Hits an album or artist search scans per result wanted; a search's hits
+# are mostly tracks of a few albums by a few artists
+GROUPED_SEARCH_SCAN = 10
+
+# Album and artist searches return every hit's values, duplicates included;
+# they are de-duplicated in Python with a hash set. `search` returns a list,
+# not a reference, so values cannot be fetched as one column and each hit
+# costs one event (the loop stops at maxCount hits)
+templates.register('search_albums', '''
+on run argv
+    set q to item 1 of argv
+    set maxCount to (item 2 of argv) as integer
+    set US to (ASCII character 31)
+    set out to {}
+    tell application "Music"
+        repeat with t in (search library playlist 1 for q)
+            if (count of out) is greater than or equal to maxCount then exit repeat
+            try
+                set p to properties of t
+                set end of out to (album of p) & US & (artist of p)
+            end try
+        end repeat
+    end tell
+    set AppleScript's text item delimiters to (ASCII character 30)
+    set joined to out as text
+    set AppleScript's text item delimiters to ""
+    return joined
+end run
+''')
+
+templates.register('search_artists', '''
+on run argv
+    set q to item 1 of argv
+    set maxCount to (item 2 of argv) as integer
+    set out to {}
+    tell application "Music"
+        repeat with t in (search library playlist 1 for q)
+            if (count of out) is greater than or equal to maxCount then exit repeat
+            try
+                set end of out to (artist of t) as text
+            end try
+        end repeat
+    end tell
+    set AppleScript's text item delimiters to (ASCII character 30)
+    set joined to out as text
+    set AppleScript's text item delimiters to ""
+    return joined
+end run
+''')
+
+templates.register('playlist_names', '''
+on run argv
+    tell application "Music" to set playlistNames to name of playlists
+    set AppleScript's text item delimiters to (ASCII character 31)
+    set joined to playlistNames as text
+    set AppleScript's text item delimiters to ""
+    return joined
+end run
+''')
+
+# Playlist catalogue: properties Music can return for every playlist in one
+# Apple Event are fetched as columns; track count and kind need a look at
+# each playlist, which is cheap next to the number of tracks.
+templates.register('export_playlists', '''
+on run argv
+    set RS to (ASCII character 30)
+    tell application "Music"
+        set ids to persistent ID of every playlist
+        set names to name of every playlist
+        set durations to duration of every playlist
+        set kinds to {}
+        set counts to {}
+        repeat with p in (every playlist)
+            set end of counts to (count of tracks of p)
+            set end of kinds to my playlistKind(p)
+        end repeat
+    end tell
+    set AppleScript's text item delimiters to (ASCII character 31)
+    set out to (ids as text) & RS & (names as text) & RS & (kinds as text) & RS & (counts as text) & RS & (durations as text)
+    set AppleScript's text item delimiters to ""
+    return out
+end run
+
+on playlistKind(p)
+    tell application "Music"
+        try
+            set c to class of p
+            if c is library playlist then return "library"
+            if c is folder playlist then return "folder"
+            if c is user playlist then
+                if smart of p then return "smart"
+                if special kind of p is not none then return "special"
+            end if
+        end try
+    end tell
+    return "user"
+end playlistKind
+''')
+
+# Database IDs of one playlist's tracks (argv = playlist persistent ID), in
+# playlist order, fetched in one Apple Event
+templates.register('playlist_track_ids', '''
+on run argv
+    tell application "Music"
+        try
+            set thePlaylist to (first playlist whose persistent ID is (item 1 of argv))
+        on error
+            return "Error: Can't get playlist."
+        end try
+        set ids to database ID of every track of thePlaylist
+    end tell
+    set AppleScript's text item delimiters to (ASCII character 31)
+    set out to ids as text
+    set AppleScript's text item delimiters to ""
+    return out
+end run
+''')
+
+# Current track's database ID and artwork (written to argv's path) in one
+# script. Raw data keeps the artwork's original format (JPEG or PNG).
+templates.register('current_artwork', '''
+on run argv
+    tell application "Music"
+        if player state is stopped then return "Error: No track playing"
+        set theTrack to current track
+        set trackID to database ID of theTrack
+        if (count of artworks of theTrack) is 0 then return "no artwork " & trackID
+        try
+            set artworkData to raw data of artwork 1 of theTrack
+        on error
+            try
+                set artworkData to data of artwork 1 of theTrack
+            on error errMsg
+                return "Error: " & errMsg
+            end try
+        end try
+    end tell
+    set fileRef to open for access (POSIX file (item 1 of argv)) with write permission
+    try
+        set eof fileRef to 0
+        write artworkData to fileRef
+    end try
+    close access fileRef
+    return trackID as text
+end run
+''')
+
+templates.register('set_volume', '''
+on run argv
+    tell application "Music" to set sound volume to (item 1 of argv as integer)
+end run
+''')
+
+# Position is passed in milliseconds so no decimal separator has to survive
+# a locale-dependent text-to-real coercion
+templates.register('seek_to_position', '''
+on run argv
+    tell application "Music" to set player position to ((item 1 of argv as integer) / 1000)
+end run
+''')
+
+# A missing track is reported as "not found" rather than as an error
+# message, whose wording depends on the macOS version and language
+# (-1728: no such object, -1719: invalid index)
+templates.register('play_track_by_id', '''
+on run argv
+    tell application "Music"
+        try
+            set theTrack to (first track of library playlist 1 whose database ID is (item 1 of argv as integer))
+        on error errMsg number errNum
+            if errNum is in {-1728, -1719} then return "not found"
+            error errMsg number errNum
+        end try
+        play theTrack
+        return "Playing: " & name of theTrack
+    end tell
+end run
+''')
+
+# Music has no direct specifier for either ID, so this is a whose filter
+# like the database ID one; benchmarks/play_track_bench.py compares them
+templates.register('play_track_by_persistent_id', '''
+on run argv
+    tell application "Music"
+        try
+            set theTrack to (first track of library playlist 1 whose persistent ID is (item 1 of argv))
+        on error errMsg number errNum
+            if errNum is in {-1728, -1719} then return "not found"
+            error errMsg number errNum
+        end try
+        play theTrack
+        return "Playing: " & name of theTrack
+    end tell
+end run
+''')
+
+# Skip commands report the persistent ID of the track that is current
+# afterwards ("" if none), so callers can tell whether anything changed
+# without waiting for the next poll
+templates.register('next_track', '''
+on run argv
+    tell application "Music"
+        next track
+        try
+            return persistent ID of current track
+        on error
+            return ""
+        end try
+    end tell
+end run
+''')
+
+templates.register('previous_track', '''
+on run argv
+    tell application "Music"
+        previous track
+        try
+            return persistent ID of current track
+        on error
+            return ""
+        end try
+    end tell
+end run
+''')
+
+templates.register('play_playlist', '''
+on run argv
+    tell application "Music"
+        play playlist (item 1 of argv)
+    end tell
+end run
+''')
+
+templates.register('set_repeat_mode', '''
+on run argv
+    set mode to item 1 of argv
+    tell application "Music"
+        if mode is "one" then
+            set song repeat to one
+        else if mode is "all" then
+            set song repeat to all
+        else
+            set song repeat to off
+        end if
+    end tell
+    return "Repeat set to: " & mode
+end run
+''')
+
+templates.register('set_shuffle_mode', '''
+on run argv
+    set mode to item 1 of argv
+    tell application "Music"
+        set shuffle enabled to (mode is "true")
+    end tell
+    return "Shuffle: " & mode
+end run
+''')
 
 
 def execute_applescript(script):
     """
     Execute an AppleScript command and return the output.
     
+    Runs in a pooled runner process when available, falling back to a
+    one-off osascript process if the pool cannot serve the request.
+    
     Args:
         script (str): The AppleScript command to execute
         
     Returns:
         str: The output from the AppleScript command
     """
+    pool = get_pool()
+    if pool is not None:
+        try:
+            return pool.run_script(script).strip()
+        except ScriptError as e:
+            return f"Error: {str(e)}"
+        except WorkerTimeout:
+            return "Error: Command timed out"
+        except WorkerError:
+            pass  # Fall back to a one-off process below
+    
+    return _run_osascript(['-e', script])
+
+
+def run_template(name, *args, timeout=None, strip=True):
+    """
+    Run a registered script template with arguments passed as argv.
+    
+    Args:
+        name (str): Name of the template
+        *args: Values for the template's `on run argv` handler
+        timeout (float): Seconds to allow (defaults to the pool timeout, 5s)
+        strip (bool): Strip surrounding whitespace from the output. Turn
+                      off for output where leading blanks are significant.
+        
+    Returns:
+        str: The output from the script
+    """
+    template = templates.get(name)
+    path = templates.compiled_path(name)
+    argv = [str(arg) for arg in args]
+    
+    pool = get_pool()
+    if pool is not None:
+        try:
+            result = pool.run_compiled(template.key, argv, path=path,
+                                       source=template.source, timeout=timeout)
+            return result.strip() if strip else result
+        except ScriptError as e:
+            return f"Error: {str(e)}"
+        except WorkerTimeout:
+            return "Error: Command timed out"
+        except WorkerError:
+            pass  # Fall back to a one-off process below
+    
+    args = [path, *argv] if path else ['-e', template.source, *argv]
+    return _run_osascript(args, timeout=timeout or 5, strip=strip)
+
+
+def _run_osascript(args, timeout=5, strip=True):
+    """Run a one-off osascript process and return its output ("Error: ..." on failure)."""
     try:
         result = subprocess.run(
-            ['osascript', '-e', script],
+            ['osascript', *args],
             capture_output=True,
             text=True,
-            timeout=5
+            timeout=timeout
         )
+        if result.returncode != 0:
+            # osascript reports script errors on stderr with an empty stdout,
+            # which must not be mistaken for an empty result
+            message = result.stderr.strip() or f"osascript exited with status {result.returncode}"
+            return f"Error: {message}"
+        if not strip:
+            # osascript terminates its output with a single newline
+            return result.stdout[:-1] if result.stdout.endswith("\n") else result.stdout
         return result.stdout.strip()
     except subprocess.TimeoutExpired:
         return "Error: Command timed out"
@@ -30,6 +503,28 @@ def execute_applescript(script):
         return f"Error: {str(e)}"
 
 
+def is_music_running():
+    """
+    Check whether Music.app is running without launching it.
+    
+    Looks at the process list only, so no Apple Event is sent. While Music
+    is up the monitor learns this from get_player_snapshot() instead.
+    
+    Returns:
+        bool: True if the Music process is running
+    """
+    try:
+        result = subprocess.run(
+            ['pgrep', '-x', 'Music'],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            timeout=2
+        )
+        return result.returncode == 0
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+
+
 def play():
     """Start or resume playback."""
     script = 'tell application "Music" to play'
@@ -43,27 +538,75 @@ def pause():
 
 
 def next_track():
-    """Skip to the next track."""
-    script = 'tell application "Music" to next track'
-    return execute_applescript(script)
+    """
+    Skip to the next track.
+    
+    Returns:
+        str: Persistent ID of the track now current, "" if none (e.g. the
+             player is stopped), or an error message
+    """
+    return run_template('next_track')
 
 
 def previous_track():
-    """Go to the previous track."""
-    script = 'tell application "Music" to previous track'
-    return execute_applescript(script)
+    """
+    Go to the previous track (or back to the start of this one).
+    
+    Returns:
+        str: Persistent ID of the track now current, "" if none, or an
+             error message
+    """
+    return run_template('previous_track')
+
+
+def _parse_volume(text):
+    """Sound volume as an int, or None if Music reported something else."""
+    try:
+        return int(text)
+    except ValueError:
+        return None
 
 
-def get_playback_state():
+def get_player_snapshot():
     """
-    Get current playback state.
+    Get the full player state in a single script call.
+    
+    The script checks that Music is running before talking to it, so this
+    doubles as the liveness check while Music is up.
     
     Returns:
-        str: 'playing', 'paused', or 'stopped'
+        PlayerSnapshot: State, current track identity and metadata, position,
+                        volume, shuffle and repeat (running=False if Music
+                        is not running)
     """
-    script = 'tell application "Music" to get player state as string'
-    state = execute_applescript(script)
-    return state.lower()
+    result = run_template('player_snapshot', strip=False)
+    
+    if result == "offline":
+        return PlayerSnapshot(running=False)
+    if not result or result.startswith("Error"):
+        return PlayerSnapshot()
+    
+    parts = decode_record(result)
+    try:
+        fields = {
+            'state': parts[0].strip().lower(),
+            'volume': _parse_volume(parts[1]),
+            'shuffle': parts[2].strip().lower() == 'true',
+            'repeat': parts[3].strip().lower(),
+        }
+        if len(parts) >= 11:
+            fields.update({
+                'database_id': parts[4],
+                'persistent_id': parts[5],
+                'duration': int(parts[6]) / 1000,
+                'position': int(parts[7]) / 1000,
+                'name': parts[8],
+                'artist': parts[9],
+                'album': parts[10],
+            })
+        return PlayerSnapshot(**fields)
+    except (ValueError, IndexError):
+        return PlayerSnapshot(state='error')
 
 
 def get_current_track():
@@ -71,56 +614,10 @@ def get_current_track():
     Get information about the currently playing track.
     
     Returns:
-        dict: Track information including name, artist, album, duration, and artwork
+        dict: Track information including ids, name, artist, album, duration,
+              position and playback state
     """
-    # Get basic track info
-    script = '''
-    tell application "Music"
-        if player state is not stopped then
-            set trackName to name of current track
-            set trackArtist to artist of current track
-            set trackAlbum to album of current track
-            set trackDuration to duration of current track
-            set playerPos to player position
-            return trackName & "|" & trackArtist & "|" & trackAlbum & "|" & trackDuration & "|" & playerPos
-        else
-            return "No track playing"
-        end if
-    end tell
-    '''
-    
-    result = execute_applescript(script)
-    
-    if result == "No track playing" or result.startswith("Error"):
-        return {
-            "name": None,
-            "artist": None,
-            "album": None,
-            "duration": 0,
-            "position": 0,
-            "state": "stopped"
-        }
-    
-    try:
-        parts = result.split("|")
-        return {
-            "name": parts[0] if len(parts) > 0 else None,
-            "artist": parts[1] if len(parts) > 1 else None,
-            "album": parts[2] if len(parts) > 2 else None,
-            "duration": float(parts[3]) if len(parts) > 3 else 0,
-            "position": float(parts[4]) if len(parts) > 4 else 0,
-            "state": get_playback_state()
-        }
-    except Exception as e:
-        return {
-            "name": None,
-            "artist": None,
-            "album": None,
-            "duration": 0,
-            "position": 0,
-            "state": "error",
-            "error": str(e)
-        }
+    return get_player_snapshot().to_track_dict()
 
 
 def set_volume(level):
@@ -135,44 +632,64 @@ def set_volume(level):
     """
     # Clamp volume between 0 and 100
     level = max(0, min(100, int(level)))
-    script = f'tell application "Music" to set sound volume to {level}'
-    return execute_applescript(script)
+    return run_template('set_volume', level)
 
 
-def get_volume():
+def get_playlists():
     """
-    Get the current volume level.
+    Get list of available playlists.
     
     Returns:
-        int: Current volume level (0-100)
+        list: List of playlist names
     """
-    script = 'tell application "Music" to get sound volume'
-    result = execute_applescript(script)
-    try:
-        return int(result)
-    except:
-        return 50  # Default fallback
+    result = run_template('playlist_names', strip=False)
+    if not result or result.startswith("Error"):
+        return []
+    return decode_record(result)
 
 
-def get_playlists():
+def export_playlists():
     """
-    Get list of available playlists.
+    Get every playlist with its kind, track count and total duration.
     
     Returns:
-        list: List of playlist names
+        list: Dicts with persistent_id, name, kind ('library', 'folder',
+              'smart', 'special' or 'user'), track_count and duration
+              (seconds), or None if the export failed
     """
-    script = '''
-    tell application "Music"
-        set playlistNames to name of playlists
-        return playlistNames
-    end tell
-    '''
-    result = execute_applescript(script)
+    result = run_template('export_playlists', timeout=60, strip=False)
+    if result.startswith("Error"):
+        return None
+    columns = decode_columns(result, 5)
+    if columns is None:
+        return None
+    return [{
+        'persistent_id': persistent_id,
+        'name': name,
+        'kind': kind,
+        'track_count': _parse_number(count, int) or 0,
+        'duration': _parse_number(duration) or 0.0,
+    } for persistent_id, name, kind, count, duration in zip(*columns)]
+
+
+def get_playlist_track_ids(persistent_id):
+    """
+    Get the database IDs of a playlist's tracks, in playlist order.
     
-    # AppleScript returns comma-separated list
-    if result and not result.startswith("Error"):
-        return [name.strip() for name in result.split(",")]
-    return []
+    Args:
+        persistent_id (str): Persistent ID of the playlist
+        
+    Returns:
+        list: Database IDs (ints), or None if there is no such playlist or
+              the script failed
+    """
+    persistent_id = parse_persistent_id(persistent_id)
+    if persistent_id is None:
+        return None
+    result = run_template('playlist_track_ids', persistent_id, timeout=60, strip=False)
+    if result.startswith("Error"):
+        return None
+    return [int(value) for value in decode_record(result.strip()) if value.isdigit()]
 
 
 def play_playlist(playlist_name):
@@ -185,77 +702,36 @@ def play_playlist(playlist_name):
     Returns:
         str: Result of the operation
     """
-    script = f'''
-    tell application "Music"
-        play playlist "{playlist_name}"
-    end tell
-    '''
-    return execute_applescript(script)
+    return run_template('play_playlist', playlist_name)
 
 
 def get_artwork():
     """
-    Get the artwork for the current track and save it to a temporary file.
+    Get the current track's database ID and artwork in one script.
     
     Returns:
-        str: Path to the saved artwork file, or None if no artwork available
+        tuple: (database ID, image bytes in their original format), with
+               None for the bytes if the track has no artwork; or None if
+               nothing is playing or the artwork could not be read
     """
-    import tempfile
-    import os
-    
-    # Create temp directory if it doesn't exist
-    temp_dir = os.path.join(tempfile.gettempdir(), 'music_remote_artwork')
-    os.makedirs(temp_dir, exist_ok=True)
-    
-    # Get track ID to use as filename
-    script = '''
-    tell application "Music"
-        if player state is not stopped then
-            set trackID to database ID of current track
-            return trackID as string
-        else
-            return "0"
-        end if
-    end tell
-    '''
-    
-    track_id = execute_applescript(script)
-    
-    if track_id == "0" or track_id.startswith("Error"):
+    fd, path = tempfile.mkstemp(prefix='artwork_')
+    os.close(fd)
+    try:
+        result = run_template('current_artwork', path, timeout=10)
+        if result.startswith("no artwork "):
+            return result[len("no artwork "):], None
+        if not result or result.startswith("Error"):
+            return None
+        with open(path, 'rb') as f:
+            data = f.read()
+        return (result, data) if data else None
+    except OSError:
         return None
-    
-    artwork_path = os.path.join(temp_dir, f'artwork_{track_id}.jpg')
-    
-    # Check if we already have this artwork cached
-    if os.path.exists(artwork_path):
-        return artwork_path
-    
-    # Save artwork to file
-    script = f'''
-    tell application "Music"
-        if player state is not stopped then
-            try
-                set artworkData to data of artwork 1 of current track
-                set artworkFile to POSIX file "{artwork_path}"
-                set fileRef to open for access artworkFile with write permission
-                write artworkData to fileRef
-                close access fileRef
-                return "success"
-            on error errMsg
-                return "Error: " & errMsg
-            end try
-        else
-            return "Error: No track playing"
-        end if
-    end tell
-    '''
-    
-    result = execute_applescript(script)
-    
-    if result == "success" and os.path.exists(artwork_path):
-        return artwork_path
-    
-    return None
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
 
 
 def seek_to_position(position):
@@ -263,22 +739,33 @@ def seek_to_position(position):
     Seek to a specific position in the current track.
     
     Args:
-        position (float): Position in seconds
+        position (float): Position in seconds (negative seeks to the start)
         
     Returns:
         str: Result of the operation
+        
+    Raises:
+        ValueError: If the position is not a finite number
     """
-    script = f'tell application "Music" to set player position to {position}'
-    return execute_applescript(script)
+    position = float(position)
+    if not math.isfinite(position):
+        raise ValueError(f"Invalid position: {position}")
+    return run_template('seek_to_position', int(round(max(0.0, position) * 1000)))
 
 
-def search_library(query, search_type='track'):
+def search_library(query, search_type='track', limit=50):
     """
     Search the Apple Music library.
     
+    Uses Music's own search (tokenised, all track kinds). Track searches
+    stop at `limit` hits. Album and artist searches look at up to
+    GROUPED_SEARCH_SCAN hits per wanted result, since many hits share an
+    album or artist, and de-duplicate them here.
+    
     Args:
         query (str): Search query
         search_type (str): Type of search - 'track', 'album', or 'artist'
+        limit (int): Maximum number of results
         
     Returns:
         list: List of search results as dictionaries
@@ -286,126 +773,32 @@ def search_library(query, search_type='track'):
     if not query or len(query) < 2:
         return []
     
-    # Escape quotes in query
-    query = query.replace('"', '\\"')
-    
     if search_type == 'track':
-        script = f'''
-        tell application "Music"
-            set searchResults to (search library playlist 1 for "{query}")
-            set resultList to {{}}
-            repeat with aTrack in searchResults
-                try
-                    if class of aTrack is file track then
-                        set trackName to name of aTrack
-                        set trackArtist to artist of aTrack
-                        set trackAlbum to album of aTrack
-                        set trackID to database ID of aTrack
-                        set end of resultList to trackName & "|||" & trackArtist & "|||" & trackAlbum & "|||" & trackID
-                    end if
-                end try
-            end repeat
-            
-            -- Convert list to string
-            set AppleScript's text item delimiters to ":::"
-            set resultString to resultList as string
-            set AppleScript's text item delimiters to ""
-            return resultString
-        end tell
-        '''
-    elif search_type == 'album':
-        script = f'''
-        tell application "Music"
-            set searchResults to (search library playlist 1 for "{query}")
-            set albumDict to {{}}
-            set resultList to {{}}
-            repeat with aTrack in searchResults
-                try
-                    if class of aTrack is file track then
-                        set albumName to album of aTrack
-                        set artistName to artist of aTrack
-                        set albumKey to albumName & "|" & artistName
-                        -- Check if we've already added this album
-                        if albumDict does not contain albumKey then
-                            set end of albumDict to albumKey
-                            set end of resultList to albumName & "|||" & artistName
-                        end if
-                    end if
-                end try
-            end repeat
-            
-            set AppleScript's text item delimiters to ":::"
-            set resultString to resultList as string
-            set AppleScript's text item delimiters to ""
-            return resultString
-        end tell
-        '''
-    else:  # artist
-        script = f'''
-        tell application "Music"
-            set searchResults to (search library playlist 1 for "{query}")
-            set artistDict to {{}}
-            set resultList to {{}}
-            repeat with aTrack in searchResults
-                try
-                    if class of aTrack is file track then
-                        set artistName to artist of aTrack
-                        if artistDict does not contain artistName and artistName is not "" then
-                            set end of artistDict to artistName
-                            set end of resultList to artistName
-                        end if
-                    end if
-                end try
-            end repeat
-            
-            set AppleScript's text item delimiters to ":::"
-            set resultString to resultList as string
-            set AppleScript's text item delimiters to ""
-            return resultString
-        end tell
-        '''
-    
-    result = execute_applescript(script)
-    
-    if result.startswith("Error") or not result or result == "":
+        return [{
+            "type": "track",
+            "name": name,
+            "artist": artist,
+            "album": album,
+            "id": track_id
+        } for name, artist, album, track_id in _search_records('search_tracks', query, limit, 4)]
+    
+    hits = limit * GROUPED_SEARCH_SCAN
+    if search_type == 'album':
+        records = _search_records('search_albums', query, hits, 2)
+        albums = dict.fromkeys((album, artist) for album, artist in records if album)
+        return [{"type": "album", "name": album, "artist": artist}
+                for album, artist in itertools.islice(albums, limit)]
+    records = _search_records('search_artists', query, hits, 1)
+    artists = dict.fromkeys(artist for (artist,) in records if artist)
+    return [{"type": "artist", "name": artist} for artist in itertools.islice(artists, limit)]
+
+
+def _search_records(template, query, limit, expected):
+    """Run a search template; its well-formed records, or none on failure."""
+    result = run_template(template, query, limit, timeout=30, strip=False)
+    if result.startswith("Error"):
         return []
-    
-    # Parse results
-    results = []
-    if search_type == 'track':
-        items = result.split(":::")
-        for item in items:
-            if item.strip():
-                parts = item.split("|||")
-                if len(parts) >= 4:
-                    results.append({
-                        "type": "track",
-                        "name": parts[0],
-                        "artist": parts[1],
-                        "album": parts[2],
-                        "id": parts[3]
-                    })
-    elif search_type == 'album':
-        items = result.split(":::")
-        for item in items:
-            if item.strip():
-                parts = item.split("|||")
-                if len(parts) >= 2:
-                    results.append({
-                        "type": "album",
-                        "name": parts[0],
-                        "artist": parts[1]
-                    })
-    else:  # artist
-        items = result.split(":::")
-        for item in items:
-            if item.strip():
-                results.append({
-                    "type": "artist",
-                    "name": item.strip()
-                })
-    
-    return results[:50]  # Limit to 50 results
+    return [record for record in iter_records(result) if len(record) == expected]
 
 
 def play_track_by_id(track_id):
@@ -417,36 +810,132 @@ def play_track_by_id(track_id):
         
     Returns:
         str: Result message
+        
+    Raises:
+        TrackNotFound: No track in the library has this ID
     """
-    script = f'''
-    tell application "Music"
-        set theTrack to (first track of library playlist 1 whose database ID is {track_id})
-        play theTrack
-        return "Playing: " & name of theTrack
-    end tell
-    '''
+    if parse_database_id(track_id) is None:
+        return "Error: Invalid track ID"
+    return _track_played(run_template('play_track_by_id', track_id))
+
+
+def play_track_by_persistent_id(persistent_id):
+    """
+    Play a specific track by its persistent ID.
     
-    return execute_applescript(script)
+    Args:
+        persistent_id (str): 16 hex digit persistent ID of the track
+        
+    Returns:
+        str: Result message
+        
+    Raises:
+        TrackNotFound: No track in the library has this ID
+    """
+    persistent_id = parse_persistent_id(persistent_id)
+    if persistent_id is None:
+        return "Error: Invalid persistent ID"
+    return _track_played(run_template('play_track_by_persistent_id', persistent_id))
 
 
-def get_repeat_mode():
-    """Get the current repeat mode (off, one, all)."""
-    script = '''
-    tell application "Music"
-        set repeatMode to song repeat
-        if repeatMode is off then
-            return "off"
-        else if repeatMode is one then
-            return "one"
-        else if repeatMode is all then
-            return "all"
-        else
-            return "off"
-        end if
-    end tell
-    '''
-    result = execute_applescript(script)
-    return result.strip().lower()
+def _track_played(result):
+    if result == "not found":
+        raise TrackNotFound(result)
+    return result
+
+
+def _parse_number(text, cast=float):
+    """Parse an AppleScript number that may use a locale decimal comma."""
+    try:
+        return cast(float(text.strip().replace(',', '.')))
+    except ValueError:
+        return None
+
+
+def export_library():
+    """
+    Export metadata for every track in the library.
+    
+    Fetches each property for the whole library in one Apple Event rather
+    than looping over tracks in AppleScript.
+    
+    Returns:
+        list: Track dicts with the keys in library_index.TRACK_FIELDS,
+              or None if the export failed
+    """
+    result = run_template('export_library', timeout=300, strip=False)
+    if result.startswith("Error"):
+        return None
+    
+    columns = decode_columns(result, 11)
+    if columns is None:
+        return None
+    return [_track_from_fields(fields) for fields in zip(*columns)]
+
+
+def export_fingerprints():
+    """
+    Get a cheap change-detection fingerprint of the whole library.
+    
+    Returns:
+        dict: Persistent ID -> modification stamp (see
+              library_index.modification_stamp),
+              or None if the export failed
+    """
+    result = run_template('export_fingerprints', timeout=120, strip=False)
+    if result.startswith("Error"):
+        return None
+    columns = decode_columns(result, 2)
+    if columns is None:
+        return None
+    return dict(zip(columns[0], map(_parse_stamp, columns[1])))
+
+
+def fetch_tracks(persistent_ids):
+    """
+    Fetch full metadata for specific tracks.
+    
+    Args:
+        persistent_ids (list): Persistent IDs of the tracks to fetch
+        
+    Returns:
+        list: Track dicts for the tracks that still exist
+    """
+    if not persistent_ids:
+        return []
+    result = run_template('fetch_tracks', *persistent_ids, timeout=60, strip=False)
+    if not result or result.startswith("Error"):
+        return []
+    return [_track_from_fields(fields) for fields in iter_records(result)
+            if len(fields) == 11]
+
+
+def _track_from_fields(fields):
+    """Build a track dict from export fields in library_index.TRACK_FIELDS order."""
+    (database_id, persistent_id, name, artist, album, album_artist,
+     genre, year, duration, play_count, modified) = fields
+    return {
+        'database_id': int(database_id),
+        'persistent_id': persistent_id,
+        'name': name,
+        'artist': artist,
+        'album': album,
+        'album_artist': album_artist,
+        'genre': genre,
+        'year': _parse_number(year, int),
+        'duration': _parse_number(duration),
+        'play_count': _parse_number(play_count, int),
+        'modified': _parse_stamp(modified),
+    }
+
+
+def _parse_stamp(text):
+    """Turn a days:seconds modification date into library_index's stamp text."""
+    days, _, seconds = text.partition(":")
+    try:
+        return str(int(days) * 86400 + int(seconds))
+    except ValueError:
+        return None
 
 
 def set_repeat_mode(mode):
@@ -456,24 +945,7 @@ def set_repeat_mode(mode):
     Args:
         mode (str): 'off', 'one', or 'all'
     """
-    script = f'''
-    tell application "Music"
-        set song repeat to {mode}
-        return "Repeat set to: {mode}"
-    end tell
-    '''
-    return execute_applescript(script)
-
-
-def get_shuffle_mode():
-    """Get the current shuffle mode (true/false)."""
-    script = '''
-    tell application "Music"
-        return shuffle enabled
-    end tell
-    '''
-    result = execute_applescript(script)
-    return result.strip().lower() == 'true'
+    return run_template('set_repeat_mode', mode)
 
 
 def set_shuffle_mode(enabled):
@@ -484,10 +956,4 @@ def set_shuffle_mode(enabled):
         enabled (bool): True to enable shuffle, False to disable
     """
     mode = 'true' if enabled else 'false'
-    script = f'''
-    tell application "Music"
-        set shuffle enabled to {mode}
-        return "Shuffle: {mode}"
-    end tell
-    '''
-    return execute_applescript(script)
+    return run_template('set_shuffle_mode', mode)
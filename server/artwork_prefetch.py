@@ -0,0 +1,116 @@
+"""
+Background artwork extraction, one flight per track.
+
+When the monitor sees a new track, its cover is extracted, stored by hash
+and queued for resizing before any client asks for it, so /artwork is
+usually answered from the store. Requests for a track whose extraction is
+already running wait for that extraction instead of starting their own,
+so concurrent callers never race to run the script or write the file.
+"""
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Any, Dict, Optional
+
+from artwork_store import Artwork, ArtworkStore
+from artwork_variants import ArtworkVariants
+from player_backend import PlayerBackend
+
+
+class ArtworkPrefetcher:
+    """Extracts current-track artwork in the background, single-flight per track ID."""
+
+    def __init__(self, backend: PlayerBackend, store: ArtworkStore,
+                 variants: Optional[ArtworkVariants] = None):
+        """
+        Args:
+            backend: Player to extract artwork from
+            store: Where extracted artwork is kept
+            variants: Renders thumbnails of each new cover, if given
+        """
+        self.backend = backend
+        self.store = store
+        self.variants = variants
+        # Extraction runs a script against the current track, so one at a time
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='artwork-prefetch')
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.extracted = 0
+        self.joined = 0
+        self.failures = 0
+
+    def fetch(self, track_id: str) -> Future:
+        """
+        Start extracting a track's artwork, or join the extraction in flight.
+
+        Returns:
+            Future: Resolves to the track's Artwork, or None if it has none
+        """
+        track_id = str(track_id)
+        with self._lock:
+            pending = self._pending.get(track_id)
+            if pending is not None:
+                self.joined += 1
+                return pending
+            future = self._executor.submit(self._extract, track_id)
+            self._pending[track_id] = future
+            return future
+
+    def get(self, track_id: str, timeout: Optional[float] = None) -> Optional[Artwork]:
+        """
+        A track's artwork, from the store or by extracting it.
+
+        Returns:
+            Artwork: The artwork, or None if there is none or it was not
+                     ready within `timeout` seconds
+        """
+        artwork = self.store.get_for_track(track_id)
+        if artwork is not None:
+            return artwork
+        if self.store.known_without_artwork(track_id):
+            return None
+        try:
+            return self.fetch(track_id).result(timeout=timeout)
+        except FutureTimeout:
+            return None
+
+    def _extract(self, track_id: str) -> Optional[Artwork]:
+        try:
+            artwork = self.store.get_for_track(track_id)
+            if artwork is None:
+                if self.store.known_without_artwork(track_id):
+                    return None
+                fetched = self.backend.get_artwork()
+                if fetched is None:
+                    # Nothing playing, or the script failed: try again next time
+                    self.failures += 1
+                    return None
+                fetched_id, data = fetched
+                if data is None:
+                    # Only a track known to have no artwork is remembered as such
+                    self.store.mark_no_artwork(fetched_id)
+                    return None
+                artwork = self.store.put(fetched_id, data)
+                self.extracted += 1
+                if fetched_id != track_id:
+                    # The track changed before the script ran; that cover is
+                    # stored for its own track, and this one is asked for later
+                    return None
+            if self.variants is not None:
+                self.variants.prepare(artwork)
+            return artwork
+        except Exception as e:
+            self.failures += 1
+            print(f"Artwork prefetch error ({track_id}): {e}")
+            return None
+        finally:
+            with self._lock:
+                self._pending.pop(track_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'pending': len(self._pending),
+            'extracted': self.extracted,
+            'joined': self.joined,
+            'failures': self.failures,
+        }
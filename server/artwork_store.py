@@ -0,0 +1,273 @@
+"""
+Content-addressed artwork store with an LRU byte budget.
+
+Artwork files are named by the SHA-256 of their bytes, so every track of an
+album shares one file. A track ID -> hash map (kept on disk next to the
+files) lets a known track's cover be served without asking Music at all.
+The same map holds other keys too, such as an original's resized variants.
+
+Disk use is bounded: files are evicted least-recently-used first once the
+total passes `max_bytes`, and mappings to evicted files are dropped with
+them. Recency survives restarts through file modification times, which are
+touched on use. A small in-memory hot tier keeps the most recently served
+covers (normally the current one) so repeat requests skip the disk too.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional, Set
+
+# Leave recency alone for files touched more recently than this (seconds),
+# so hot covers do not cost a utime() per request
+TOUCH_INTERVAL = 60.0
+
+# How long a track known to have no artwork is not asked about again
+NO_ARTWORK_TTL = 300.0
+
+
+class Artwork(NamedTuple):
+    hash: str
+    data: bytes
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:32]
+
+
+class ArtworkStore:
+    """Size-bounded, deduplicating artwork cache on disk, with a RAM hot tier."""
+
+    def __init__(self, directory: str, max_bytes: int = 200 * 1024 * 1024,
+                 hot_bytes: int = 16 * 1024 * 1024):
+        """
+        Args:
+            directory: Where artwork files and the track map are kept
+            max_bytes: Disk budget for artwork files
+            hot_bytes: Memory budget for the hot tier
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hot_bytes = hot_bytes
+        self._files: 'OrderedDict[str, int]' = OrderedDict()   # hash -> size, LRU first
+        self._touched: Dict[str, float] = {}
+        self._tracks: Dict[str, str] = {}                       # track ID -> hash
+        self._users: Dict[str, Set[str]] = {}                   # hash -> track IDs
+        self._hot: 'OrderedDict[str, bytes]' = OrderedDict()
+        self._no_artwork: Dict[str, float] = {}
+        self._lock = threading.RLock()
+        self.total_bytes = 0
+        self.hot_total = 0
+        self.hits = {'hot': 0, 'disk': 0}
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    # Persistence
+
+    @property
+    def _map_path(self) -> str:
+        return os.path.join(self.directory, 'tracks.json')
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def _load(self):
+        """Rebuild the LRU from the files on disk, oldest first."""
+        found = []
+        for entry in os.scandir(self.directory):
+            if not entry.is_dir() or len(entry.name) != 2:
+                continue
+            for item in os.scandir(entry.path):
+                if item.is_file() and not item.name.endswith('.tmp'):
+                    stat = item.stat()
+                    found.append((stat.st_mtime, item.name, stat.st_size))
+        for _, digest, size in sorted(found):
+            self._files[digest] = size
+            self.total_bytes += size
+
+        try:
+            with open(self._map_path, 'r', encoding='utf-8') as f:
+                tracks = json.load(f)
+        except (OSError, ValueError):
+            tracks = {}
+        for track_id, digest in tracks.items():
+            if digest in self._files:
+                self._map(str(track_id), digest)
+        self._evict()
+
+    def _save_map(self):
+        tmp_path = f"{self._map_path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._tracks, f, separators=(',', ':'))
+            os.replace(tmp_path, self._map_path)
+        except OSError as e:
+            print(f"Could not save artwork map: {e}")
+
+    # Bookkeeping (call with the lock held)
+
+    def _map(self, track_id: str, digest: str):
+        old = self._tracks.get(track_id)
+        if old is not None and old != digest:
+            self._users.get(old, set()).discard(track_id)
+        self._tracks[track_id] = digest
+        self._users.setdefault(digest, set()).add(track_id)
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes and len(self._files) > 1:
+            digest, size = self._files.popitem(last=False)
+            self.total_bytes -= size
+            self.evictions += 1
+            self._touched.pop(digest, None)
+            self._drop_hot(digest)
+            for track_id in self._users.pop(digest, ()):
+                self._tracks.pop(track_id, None)
+            try:
+                os.remove(self._path(digest))
+            except OSError:
+                pass
+
+    def _remember_hot(self, digest: str, data: bytes):
+        if len(data) > self.hot_bytes:
+            return
+        if digest in self._hot:
+            self._hot.move_to_end(digest)
+            return
+        self._hot[digest] = data
+        self.hot_total += len(data)
+        while self.hot_total > self.hot_bytes:
+            _, evicted = self._hot.popitem(last=False)
+            self.hot_total -= len(evicted)
+
+    def _drop_hot(self, digest: str):
+        data = self._hot.pop(digest, None)
+        if data is not None:
+            self.hot_total -= len(data)
+
+    def _use(self, digest: str):
+        """Mark a file most recently used, in memory and (throttled) on disk."""
+        self._files.move_to_end(digest)
+        now = time.time()
+        if now - self._touched.get(digest, 0) > TOUCH_INTERVAL:
+            self._touched[digest] = now
+            try:
+                os.utime(self._path(digest))
+            except OSError:
+                pass
+
+    # Public API
+
+    def hash_for(self, track_id: str) -> Optional[str]:
+        """Hash of a track's cached artwork, or None."""
+        with self._lock:
+            return self._tracks.get(str(track_id))
+
+    def known_without_artwork(self, track_id: str) -> bool:
+        """True if the track was recently found to have no artwork."""
+        with self._lock:
+            checked = self._no_artwork.get(str(track_id))
+            return checked is not None and time.monotonic() - checked < NO_ARTWORK_TTL
+
+    def mark_no_artwork(self, track_id: str):
+        with self._lock:
+            self._no_artwork[str(track_id)] = time.monotonic()
+            if len(self._no_artwork) > 10000:
+                self._no_artwork.clear()
+
+    def get(self, digest: str) -> Optional[Artwork]:
+        """Artwork by hash, from the hot tier or disk."""
+        with self._lock:
+            if digest not in self._files:
+                self.misses += 1
+                return None
+            self._use(digest)
+            data = self._hot.get(digest)
+            if data is not None:
+                self._hot.move_to_end(digest)
+                self.hits['hot'] += 1
+                return Artwork(digest, data)
+        try:
+            with open(self._path(digest), 'rb') as f:
+                data = f.read()
+        except OSError:
+            with self._lock:
+                self._forget(digest)
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits['disk'] += 1
+            self._remember_hot(digest, data)
+        return Artwork(digest, data)
+
+    def get_for_track(self, track_id: str) -> Optional[Artwork]:
+        """A track's artwork, if it has been stored."""
+        digest = self.hash_for(track_id)
+        if digest is None:
+            with self._lock:
+                self.misses += 1
+            return None
+        return self.get(digest)
+
+    def put(self, track_id: Optional[str], data: bytes) -> Artwork:
+        """
+        Store artwork (deduplicated by content) and map `track_id` to it.
+
+        Returns:
+            Artwork: The stored artwork
+        """
+        digest = content_hash(data)
+        with self._lock:
+            exists = digest in self._files
+        if not exists:
+            path = self._path(digest)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        with self._lock:
+            if digest not in self._files:
+                self._files[digest] = len(data)
+                self.total_bytes += len(data)
+            self._use(digest)
+            self._remember_hot(digest, data)
+            changed = False
+            if track_id is not None and self._tracks.get(str(track_id)) != digest:
+                self._map(str(track_id), digest)
+                self._no_artwork.pop(str(track_id), None)
+                changed = True
+            self._evict()
+            if changed:
+                self._save_map()
+        return Artwork(digest, data)
+
+    def _forget(self, digest: str):
+        """Drop a file that vanished from disk. Call with the lock held."""
+        size = self._files.pop(digest, None)
+        if size is not None:
+            self.total_bytes -= size
+        self._drop_hot(digest)
+        for track_id in self._users.pop(digest, ()):
+            self._tracks.pop(track_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits['hot'] + self.hits['disk'] + self.misses
+            return {
+                'files': len(self._files),
+                'bytes': self.total_bytes,
+                'max_bytes': self.max_bytes,
+                'tracks': len(self._tracks),
+                'hot_files': len(self._hot),
+                'hot_bytes': self.hot_total,
+                'hits': dict(self.hits),
+                'misses': self.misses,
+                'hit_rate': round((self.hits['hot'] + self.hits['disk']) / lookups, 3) if lookups else None,
+                'evictions': self.evictions,
+            }
@@ -0,0 +1,179 @@
+"""
+Resized, re-encoded artwork variants.
+
+Phones show covers at a few hundred pixels, while Music's originals are
+often 1-3 MB. Each original (by content hash) gets thumbnails at a fixed
+set of sizes in WebP and JPEG, produced once off the request path and
+stored in the ArtworkStore like any other artwork. Concurrent requests for
+a variant that is still being rendered share one job, and a variant that
+failed to render (e.g. a HEIC original Pillow cannot decode) is not
+retried on every request.
+
+Rendering uses a small thread pool rather than processes: Pillow releases
+the GIL while decoding, resampling and encoding, and worker processes
+spawned on macOS would re-import server.py and start a second monitor.
+
+Pillow is optional: without it only originals are served.
+"""
+
+import io
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Any, Dict, Optional
+
+from artwork_store import Artwork, ArtworkStore
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow not installed
+    Image = None
+
+
+SIZES = (64, 300, 600)
+
+FORMATS = {
+    'webp': 'image/webp',
+    'jpeg': 'image/jpeg',
+}
+
+QUALITY = 80
+
+# Magic numbers of the formats Music stores artwork in (and a few more)
+SIGNATURES = [
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+    (b'BM', 'image/bmp'),
+    (b'II*\x00', 'image/tiff'),
+    (b'MM\x00*', 'image/tiff'),
+]
+
+
+def sniff_mime(data: bytes) -> str:
+    """MIME type of image bytes, from their leading magic number."""
+    for signature, mime in SIGNATURES:
+        if data.startswith(signature):
+            return mime
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'image/webp'
+    if data[4:8] == b'ftyp' and data[8:12] in (b'heic', b'heix', b'mif1'):
+        return 'image/heic'
+    return 'application/octet-stream'
+
+
+def render_variant(data: bytes, size: int, image_format: str) -> bytes:
+    """Shrink image bytes to fit `size` x `size` and encode them."""
+    with Image.open(io.BytesIO(data)) as image:
+        image.draft('RGB', (size, size))  # Lets JPEG decoding skip to a smaller scale
+        image = image.convert('RGB')
+        image.thumbnail((size, size), Image.LANCZOS)
+        out = io.BytesIO()
+        if image_format == 'webp':
+            image.save(out, 'WEBP', quality=QUALITY, method=4)
+        else:
+            image.save(out, 'JPEG', quality=QUALITY, optimize=True, progressive=True)
+        return out.getvalue()
+
+
+def variant_key(digest: str, size: int, image_format: str) -> str:
+    """Store key mapping an original's hash to one of its variants."""
+    return f"{digest}@{size}.{image_format}"
+
+
+class ArtworkVariants:
+    """Renders and caches artwork variants in a background pool."""
+
+    def __init__(self, store: ArtworkStore, workers: int = 2):
+        self.store = store
+        self.workers = workers
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.rendered = 0
+        self.failures = 0
+
+    @property
+    def available(self) -> bool:
+        return Image is not None
+
+    def _executor(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers,
+                                            thread_name_prefix='artwork-variant')
+        return self._pool
+
+    def cached(self, original: Artwork, size: int, image_format: str) -> Optional[Artwork]:
+        digest = self.store.hash_for(variant_key(original.hash, size, image_format))
+        return self.store.get(digest) if digest else None
+
+    def request(self, original: Artwork, size: int, image_format: str) -> Optional[Future]:
+        """
+        Start rendering a variant unless it is cached or already rendering.
+
+        Returns:
+            Future: Resolves to the stored variant Artwork (or None on
+                    failure), or None if there is nothing to wait for
+        """
+        if not self.available:
+            return None
+        key = variant_key(original.hash, size, image_format)
+        with self._lock:
+            pending = self._pending.get(key)
+            if pending is not None:
+                return pending
+            if self.store.hash_for(key) or self.store.known_without_artwork(key):
+                return None
+            job = self._executor().submit(self._render, original, size, image_format)
+            self._pending[key] = job
+            return job
+
+    def _render(self, original: Artwork, size: int, image_format: str) -> Optional[Artwork]:
+        key = variant_key(original.hash, size, image_format)
+        try:
+            variant = self.store.put(key, render_variant(original.data, size, image_format))
+            self.rendered += 1
+            return variant
+        except Exception as e:
+            print(f"Artwork variant error ({key}): {e}")
+            self.failures += 1
+            # Serve the original for a while instead of re-rendering it
+            self.store.mark_no_artwork(key)
+            return None
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+    def prepare(self, original: Artwork):
+        """Start rendering every variant of an original in the background."""
+        for size in SIZES:
+            for image_format in FORMATS:
+                self.request(original, size, image_format)
+
+    def get(self, original: Artwork, size: int, image_format: str,
+            timeout: float = 2.0) -> Optional[Artwork]:
+        """
+        A variant of `original`, rendering it if needed.
+
+        Returns:
+            Artwork: The variant, or None if Pillow is unavailable, rendering
+                     failed, or it took longer than `timeout`
+        """
+        variant = self.cached(original, size, image_format)
+        if variant is not None:
+            return variant
+        pending = self.request(original, size, image_format)
+        if pending is None:
+            return self.cached(original, size, image_format)
+        try:
+            return pending.result(timeout=timeout)
+        except FutureTimeout:
+            return None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'available': self.available,
+            'pending': len(self._pending),
+            'rendered': self.rendered,
+            'failures': self.failures,
+        }
@@ -0,0 +1,69 @@
+"""
+Benchmark decoding script output: the old ad hoc delimiters versus RS/US
+framing (framing.py) and JSON.
+
+    python benchmarks/framing_bench.py --rows 100000
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import framing  # noqa: E402
+from simulated_player import SimulatedLibrary  # noqa: E402
+
+FIELDS = ['name', 'artist', 'album', 'database_id']
+
+
+def legacy_decode(text):
+    """The old search_library parsing: ':::' between rows, '|||' between fields."""
+    rows = []
+    for item in text.split(":::"):
+        if item.strip():
+            parts = item.split("|||")
+            if len(parts) >= 4:
+                rows.append(parts)
+    return rows
+
+
+def timed(label, func, payload, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rows = func(payload)
+        best = min(best, time.perf_counter() - started)
+    count = len(rows)
+    size = len(payload.encode('utf-8')) / (1024 * 1024)
+    print(f"{label:28} {best * 1000:8.1f} ms  {count / best:>12,.0f} rows/s  {size / best:7.1f} MB/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    tracks = SimulatedLibrary(args.rows).tracks
+    rows = [[str(t[field]) for field in FIELDS] for t in tracks]
+    columns = [list(column) for column in zip(*rows)]
+
+    legacy = ":::".join("|||".join(row) for row in rows)
+    framed_rows = framing.encode(rows)
+    framed_columns = framing.encode(columns)
+    as_json = json.dumps(rows)
+
+    print(f"{args.rows} rows x {len(FIELDS)} fields")
+    timed('legacy ::: / |||', legacy_decode, legacy, args.repeat)
+    timed('RS/US decode', framing.decode, framed_rows, args.repeat)
+    timed('RS/US iter_records', lambda text: list(framing.iter_records(text)), framed_rows, args.repeat)
+    timed('RS/US decode_columns', lambda text: list(zip(*framing.decode_columns(text, len(FIELDS)))),
+          framed_columns, args.repeat)
+    timed('JSON', json.loads, as_json, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
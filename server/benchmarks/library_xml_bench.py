@@ -0,0 +1,74 @@
+"""
+Benchmark the streaming Library.xml importer against plistlib.load.
+
+Generates a fixture from the simulated library, then parses it in a fresh
+subprocess per method so peak RSS is measured in isolation.
+
+    python benchmarks/library_xml_bench.py --tracks 100000
+"""
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def peak_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+def parse(method: str, path: str):
+    baseline = peak_rss_mb()
+    started = time.perf_counter()
+    if method == 'stream':
+        from library_xml import read_tracks
+        tracks = sum(1 for _ in read_tracks(path))
+    else:
+        import plistlib
+        with open(path, 'rb') as f:
+            data = plistlib.load(f)
+        tracks = len(data['Tracks'])
+    elapsed = time.perf_counter() - started
+    print(f"{method:8} {tracks:>8} tracks  "
+          f"{elapsed:7.2f}s  {tracks / elapsed:>9,.0f} rows/s  "
+          f"peak RSS {peak_rss_mb():7.1f} MB (+{peak_rss_mb() - baseline:.1f})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tracks', type=int, default=100000)
+    parser.add_argument('--file', help='Existing Library.xml to parse instead of a fixture')
+    parser.add_argument('--method', choices=['generate', 'stream', 'plistlib'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.method == 'generate':
+        from simulated_player import SimulatedLibrary
+        SimulatedLibrary(args.tracks).write_library_xml(args.file)
+        return
+    if args.method:
+        parse(args.method, args.file)
+        return
+
+    path = args.file
+    if path is None:
+        path = os.path.join(tempfile.gettempdir(), f'music_remote_bench_{args.tracks}.xml')
+        if not os.path.exists(path):
+            print(f"Generating {args.tracks} track fixture...")
+            # In a subprocess: children inherit the parent's peak RSS
+            subprocess.run([sys.executable, __file__, '--method', 'generate',
+                            '--tracks', str(args.tracks), '--file', path], check=True)
+    print(f"{path}: {os.path.getsize(path) / (1024 * 1024):.1f} MB")
+
+    for method in ('stream', 'plistlib'):
+        subprocess.run([sys.executable, __file__, '--method', method, '--file', path], check=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark how long Music takes to resolve a track by database ID versus by
+persistent ID (the two lookups behind /play-track). Needs macOS with Music
+running and a populated library index; nothing is played.
+
+    python benchmarks/play_track_bench.py --tracks 50
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import applescript_commands  # noqa: E402
+from config import Config  # noqa: E402
+from library_index import LibraryIndex  # noqa: E402
+
+# The lookups of the play_track_by_* templates, without playing anything
+applescript_commands.templates.register('resolve_by_database_id', '''
+on run argv
+    tell application "Music"
+        return name of (first track of library playlist 1 whose database ID is (item 1 of argv as integer))
+    end tell
+end run
+''')
+
+applescript_commands.templates.register('resolve_by_persistent_id', '''
+on run argv
+    tell application "Music"
+        return name of (first track of library playlist 1 whose persistent ID is (item 1 of argv))
+    end tell
+end run
+''')
+
+
+def timed(label, template, ids):
+    times = []
+    for track_id in ids:
+        started = time.perf_counter()
+        result = applescript_commands.run_template(template, track_id, timeout=60)
+        times.append(time.perf_counter() - started)
+        if result.startswith("Error"):
+            print(f"  {template} {track_id}: {result}")
+    times.sort()
+    p95 = times[min(len(times) - 1, int(len(times) * 0.95))]
+    print(f"{label:16} median {statistics.median(times) * 1000:8.1f} ms  "
+          f"p95 {p95 * 1000:8.1f} ms  max {times[-1] * 1000:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tracks', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    if not applescript_commands.is_music_running():
+        sys.exit("Music is not running")
+    index = LibraryIndex(Config().library_db)
+    tracks = list(index.iter_tracks(['database_id', 'persistent_id']))
+    if not tracks:
+        sys.exit("The library index is empty; start the server once to sync it")
+    sample = random.Random(args.seed).sample(tracks, min(args.tracks, len(tracks)))
+    print(f"{len(sample)} tracks sampled from a library of {len(tracks)}")
+
+    # Warm up the runner and the compiled scripts
+    applescript_commands.run_template('resolve_by_database_id', sample[0][0])
+    applescript_commands.run_template('resolve_by_persistent_id', sample[0][1])
+
+    timed('database ID', 'resolve_by_database_id', [t[0] for t in sample])
+    timed('persistent ID', 'resolve_by_persistent_id', [t[1] for t in sample])
+
+
+if __name__ == '__main__':
+    main()
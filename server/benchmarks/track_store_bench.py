@@ -0,0 +1,103 @@
+"""
+Benchmark the columnar track store (track_store.py) against a list of
+per-track dicts: memory per track, open time, and a filter, sort and
+aggregation over the whole library.
+
+    python benchmarks/track_store_bench.py --tracks 100000
+"""
+
+import argparse
+import itertools
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from library_index import TRACK_FIELDS  # noqa: E402
+from simulated_player import SimulatedLibrary  # noqa: E402
+from track_store import TrackStore  # noqa: E402
+
+
+def measured(label, func):
+    """Run func, reporting wall time and memory it left allocated."""
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    # Separate traced run: tracemalloc slows allocation-heavy code down
+    tracemalloc.start()
+    result = func()
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"  {label:26} {elapsed * 1000:9.1f} ms  {allocated / (1024 * 1024):8.1f} MB")
+    return result, allocated
+
+
+def timed(label, func, repeat=3):
+    """First run (cold caches) and best of the rest."""
+    runs = []
+    for _ in range(repeat + 1):
+        started = time.perf_counter()
+        result = func()
+        runs.append(time.perf_counter() - started)
+    print(f"  {label:26} {runs[0] * 1000:9.1f} ms  {min(runs[1:]) * 1000:9.1f} ms  "
+          f"{len(result):>8} results")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tracks', type=int, default=100000)
+    args = parser.parse_args()
+
+    library = SimulatedLibrary(args.tracks)
+    source = [{field: track.get(field) for field in TRACK_FIELDS} for track in library.tracks]
+    for track in source:
+        track['database_id'] = int(track['database_id'])
+    path = os.path.join(tempfile.gettempdir(), f'music_remote_bench_{args.tracks}.tracks')
+
+    print(f"{args.tracks} tracks, memory held after loading:")
+    # Round-trip through JSON so every dict owns its strings, as rows read
+    # from SQLite would
+    encoded = json.dumps(source)
+    dicts, dict_bytes = measured('dicts', lambda: json.loads(encoded))
+    store, store_bytes = measured('columnar (in memory)', lambda: TrackStore.build(source))
+    store.save(path)
+    mapped, mapped_bytes = measured('columnar (mmap open)', lambda: TrackStore.open(path))
+    print(f"  per track: dicts {dict_bytes / args.tracks:.0f} B, columnar "
+          f"{store_bytes / args.tracks:.0f} B, file {os.path.getsize(path) / args.tracks:.0f} B "
+          f"({os.path.getsize(path) / (1024 * 1024):.1f} MB, paged in on demand)")
+
+    genre = source[0]['genre']
+    print("Queries (first run, then best of 3):")
+    timed('dicts: filter genre+year', lambda: [t for t in dicts if t['genre'] == genre
+                                                 and 1970 <= (t['year'] or 0) <= 1979])
+    timed('mmap: filter genre+year', lambda: mapped.filter_range(
+        'year', 1970, 1979, mapped.filter_strings('genre', lambda g: g == genre)))
+
+    timed('dicts: sort by artist', lambda: sorted(dicts, key=lambda t: (t['artist'] or '').casefold()))
+    timed('mmap: sort by artist', lambda: mapped.sort(mapped.all_rows(), 'artist'))
+
+    def dict_albums():
+        groups = {}
+        for track in dicts:
+            key = (track['album'], track['album_artist'])
+            count, duration = groups.get(key, (0, 0))
+            groups[key] = (count + 1, duration + (track['duration'] or 0))
+        return groups
+
+    timed('dicts: aggregate albums', dict_albums)
+    timed('mmap: aggregate albums', lambda: mapped.aggregate(['album', 'album_artist']))
+
+    ids = [track['database_id'] for track in itertools.islice(source, 0, None, 97)]
+    by_id = {track['database_id']: track for track in dicts}
+    timed('dicts: lookup by id', lambda: [by_id[i] for i in ids])
+    timed('mmap: lookup by id', lambda: [mapped.find(i) for i in ids])
+    mapped.close()
+    os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -6,6 +6,8 @@ import os
 import secrets
 from pathlib import Path
 
+from library_xml import default_library_xml
+
 
 class Config:
     """Configuration management for the server."""
@@ -17,8 +19,43 @@ class Config:
     def __init__(self):
         self.host = os.getenv('SERVER_HOST', '0.0.0.0')
         self.port = int(os.getenv('SERVER_PORT', 5000))
+        # Oldest cached player state (seconds) served before querying live
+        self.state_max_age = float(os.getenv('STATE_MAX_AGE', 2.0))
+        # How far (seconds) a sampled position may stray from the projected
+        # one before it is treated as a seek
+        self.position_tolerance = float(os.getenv('POSITION_TOLERANCE', 1.0))
+        # Monitor poll intervals (seconds): after commands / near track end,
+        # while playing, and while paused or stopped
+        self.poll_fast_interval = float(os.getenv('MONITOR_FAST_INTERVAL', 0.25))
+        self.poll_interval = float(os.getenv('MONITOR_POLL_INTERVAL', 1.0))
+        self.poll_idle_interval = float(os.getenv('MONITOR_IDLE_INTERVAL', 5.0))
+        # Longest wait (seconds) for next/previous/play-track to take effect
+        self.track_change_timeout = float(os.getenv('TRACK_CHANGE_TIMEOUT', 2.0))
         self.auth_token = self._load_or_generate_token()
         self.config_dir = str(self.CONFIG_DIR)  # String version for trusted devices
+        self.library_db = str(self.CONFIG_DIR / 'library.db')
+        # Columnar snapshot of the index, memory-mapped at startup
+        self.track_store = str(self.CONFIG_DIR / 'tracks.store')
+        # Seconds between incremental library syncs, and the largest share
+        # of time the sync may spend running scripts
+        self.library_sync_interval = float(os.getenv('LIBRARY_SYNC_INTERVAL', 300))
+        self.library_sync_share = float(os.getenv('LIBRARY_SYNC_SHARE', 0.1))
+        # Wait (seconds) before a typeahead request falls back to a live
+        # search, so keystrokes that are superseded never reach Music
+        self.suggest_debounce = float(os.getenv('SUGGEST_DEBOUNCE_MS', 150)) / 1000
+        # Seconds the playlist catalogue is served before it is refreshed in
+        # the background, and where it is kept across restarts
+        self.playlist_cache_ttl = float(os.getenv('PLAYLIST_CACHE_TTL', 60))
+        self.playlist_cache = str(self.CONFIG_DIR / 'playlists.json')
+        # Artwork store: disk budget and in-memory hot tier, in megabytes
+        self.artwork_dir = str(self.CONFIG_DIR / 'artwork')
+        self.artwork_cache_bytes = int(float(os.getenv('ARTWORK_CACHE_MB', 200)) * 1024 * 1024)
+        self.artwork_hot_bytes = int(float(os.getenv('ARTWORK_HOT_MB', 16)) * 1024 * 1024)
+        # Longest wait (seconds) for a new track's cover before its
+        # track_changed event is broadcast without it
+        self.artwork_prefetch_wait = float(os.getenv('ARTWORK_PREFETCH_WAIT_MS', 500)) / 1000
+        # Music's shared library XML, used to seed an empty index
+        self.library_xml = os.getenv('LIBRARY_XML') or default_library_xml()
         
     def _load_or_generate_token(self):
         """Load existing token or create a new one."""
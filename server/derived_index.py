@@ -0,0 +1,160 @@
+"""
+Base for in-memory search structures derived from the LibraryIndex.
+
+A derived index is built from one scan of the library index and rebuilt in
+the background whenever the library version changes. Lookups keep using
+the previous build until the new one is swapped in, so they never wait on
+a rebuild.
+"""
+
+import threading
+import time
+import unicodedata
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from library_index import LibraryIndex
+
+
+KINDS = ('track', 'album', 'artist')
+
+# Track columns the derived indexes are built from, in row order
+ENTRY_FIELDS = ['database_id', 'name', 'artist', 'album', 'album_artist', 'play_count']
+
+
+def normalize(text: str) -> str:
+    """Lower-case, strip accents and collapse whitespace."""
+    decomposed = unicodedata.normalize('NFKD', text.casefold())
+    stripped = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return ' '.join(stripped.split())
+
+
+class Entries(NamedTuple):
+    """Searchable tracks, albums and artists, as parallel lists."""
+    items: List[Dict[str, Any]]  # Result dicts shaped like /search results
+    scores: List[int]            # Play count (summed for albums and artists)
+    kinds: List[str]             # 'track', 'album' or 'artist'
+
+
+def collect_entries(rows: Iterable[tuple]) -> Entries:
+    """Group ENTRY_FIELDS rows into track, album and artist entries."""
+    entries = Entries([], [], [])
+    albums: Dict[Tuple[str, str], int] = {}
+    artists: Dict[str, int] = {}
+
+    def add(kind, item, score):
+        entries.items.append(item)
+        entries.scores.append(score)
+        entries.kinds.append(kind)
+        return len(entries.items) - 1
+
+    for database_id, name, artist, album, album_artist, play_count in rows:
+        plays = play_count or 0
+        if name:
+            add('track', {'type': 'track', 'name': name, 'artist': artist,
+                          'album': album, 'id': str(database_id)}, plays)
+        if album:
+            key = (album, album_artist or artist or '')
+            index = albums.get(key)
+            if index is None:
+                albums[key] = add('album', {'type': 'album', 'name': album,
+                                            'artist': key[1]}, plays)
+            else:
+                entries.scores[index] += plays
+        for artist_name in {artist, album_artist}:
+            if artist_name:
+                index = artists.get(artist_name)
+                if index is None:
+                    artists[artist_name] = add('artist', {'type': 'artist', 'name': artist_name}, plays)
+                else:
+                    entries.scores[index] += plays
+    return entries
+
+
+class DerivedIndex(ABC):
+    """Keeps a build of a derived structure in step with the library version."""
+
+    name = 'derived'
+    fields = ENTRY_FIELDS  # Columns passed to build(), in row order
+
+    def __init__(self, library_index: LibraryIndex):
+        self.library_index = library_index
+        self._build: Optional[Any] = None
+        self._version: Optional[int] = None
+        self._lock = threading.Lock()
+        self._building = False
+        self._listeners: List[Callable[[Any], None]] = []
+        self.build_seconds: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._build is not None
+
+    @property
+    def version(self) -> Optional[int]:
+        """Library version the current build was made from."""
+        return self._version
+
+    def refresh(self, wait: bool = False):
+        """
+        Rebuild in the background if the library changed since the last build.
+
+        An empty library drops the current build instead.
+
+        Args:
+            wait: Build synchronously instead
+        """
+        if self.library_index.is_empty():
+            # Nothing to search; don't keep serving a build of the old library
+            with self._lock:
+                self._build = None
+                self._version = None
+            return
+        if self._version == self.library_index.version:
+            return
+        with self._lock:
+            if self._building:
+                return
+            self._building = True
+        if wait:
+            self._rebuild()
+        else:
+            threading.Thread(target=self._rebuild, daemon=True).start()
+
+    def _rebuild(self):
+        try:
+            started = time.monotonic()
+            version = self.library_index.version
+            build = self.build(self.library_index.iter_tracks(self.fields))
+            with self._lock:
+                self._build = build
+                self._version = version
+            self.installed(build)
+            for listener in self._listeners:
+                listener(build)
+            self.build_seconds = round(time.monotonic() - started, 3)
+        except Exception as e:
+            print(f"{self.name.capitalize()} index error: {e}")
+        finally:
+            with self._lock:
+                self._building = False
+
+    @abstractmethod
+    def build(self, rows: Iterable[tuple]) -> Any:
+        """Build from rows of `fields`; the result replaces the current build."""
+        raise NotImplementedError
+
+    def add_listener(self, callback: Callable[[Any], None]):
+        """Call `callback(build)` (on the build thread) after each new build is installed."""
+        self._listeners.append(callback)
+
+    def installed(self, build: Any):
+        """Called after `build` becomes current (e.g. to reset caches)."""
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'ready': self.ready,
+            'version': self._version,
+            'build_seconds': self.build_seconds,
+            'building': self._building,
+        }
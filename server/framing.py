@@ -0,0 +1,76 @@
+"""
+Output framing shared by every script that returns structured data.
+
+Values are separated with ASCII control characters that cannot appear in
+track, album or playlist names, so no value can break the framing:
+
+    RS (0x1e)  separates records
+    US (0x1f)  separates the fields of a record
+
+Column exports use the same framing transposed: one record per property
+column, one field per track. Empty output means no records.
+
+Note that str.strip() treats RS and US as whitespace, so framed output must
+be read unstripped (run_template(..., strip=False)).
+"""
+
+from typing import Iterable, Iterator, List, Optional
+
+RS = '\x1e'
+US = '\x1f'
+
+
+def decode(text: str) -> List[List[str]]:
+    """Split framed text into records of fields."""
+    if not text:
+        return []
+    return [record.split(US) for record in text.split(RS)]
+
+
+def decode_record(text: str) -> List[str]:
+    """Fields of output that holds a single record."""
+    return text.split(US) if text else []
+
+
+def iter_records(text: str) -> Iterator[List[str]]:
+    """Decode records lazily, without splitting the whole text up front."""
+    if not text:
+        return
+    start = 0
+    find = text.find
+    while True:
+        end = find(RS, start)
+        if end < 0:
+            yield text[start:].split(US)
+            return
+        yield text[start:end].split(US)
+        start = end + 1
+
+
+def decode_columns(text: str, expected: int) -> Optional[List[List[str]]]:
+    """
+    Decode a column export.
+
+    Args:
+        text: One record per column, one field per row
+        expected: Number of columns the script emits
+
+    Returns:
+        list: `expected` equally long columns, or None if the output is
+              malformed (wrong column count, or columns of unequal length)
+    """
+    if not text.strip(RS):
+        return [[] for _ in range(expected)]  # No rows
+    columns = decode(text)
+    if len(columns) != expected:
+        return None
+    count = len(columns[0])
+    if any(len(column) != count for column in columns):
+        return None
+    return columns
+
+
+def encode(records: Iterable[Iterable[str]]) -> str:
+    """Frame records of fields (the inverse of decode)."""
+    return RS.join(US.join(record) for record in records)
+
@@ -0,0 +1,232 @@
+"""
+Typo-tolerant library search over character trigrams.
+
+Every searchable string (a track's "name artist album", an album's
+"album artist", an artist's name) is normalised and split into trigrams.
+Each trigram's posting list is a bitset over documents, held as one Python
+int; rare trigrams are stored as compact uint32 arrays and turned into
+bitsets on demand. A query adds its trigrams' bitsets into bit-sliced
+counters, so counting matches across the whole library is a few dozen
+whole-library bitwise operations rather than a loop over documents.
+
+Candidates are drawn from the highest match counts down, scored by Dice
+similarity of trigram sets, and blended with play count:
+
+    score = dice * (1 + POPULARITY_WEIGHT * log(1 + plays) / log(1 + max plays))
+
+so "beatls abey road" still finds Abbey Road, and the album you actually
+play wins among equally close matches.
+
+An artist's document is only their name, so a query that also names an
+album or track shares too few trigrams with it. Artist searches therefore
+also credit each artist with their closest album or track match, and
+"beatls abey road" finds The Beatles too.
+"""
+
+import heapq
+import math
+from array import array
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, NamedTuple, Tuple
+
+from derived_index import DerivedIndex, Entries, collect_entries, normalize
+
+
+# Trigrams in more than 1/DENSE_FRACTION of documents keep a ready bitset
+DENSE_FRACTION = 64
+
+# Candidates scored per query before picking the top results
+CANDIDATES = 300
+
+# Lowest share of the query's trigrams a candidate must contain
+MIN_OVERLAP = 1 / 3
+
+POPULARITY_WEIGHT = 0.25
+
+
+def trigrams(text: str) -> set:
+    """Trigrams of normalised text, padded so word starts weigh more."""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _to_bitset(ids: Iterable[int], size: int) -> int:
+    bits = bytearray((size + 7) // 8)
+    for i in ids:
+        bits[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(bits, 'little')
+
+
+def _set_bits(bitset: int, limit: int) -> List[int]:
+    """Positions of the lowest `limit` set bits."""
+    positions = []
+    digits = bin(bitset)[:1:-1]  # Least significant bit first
+    i = digits.find('1')
+    while i >= 0 and len(positions) < limit:
+        positions.append(i)
+        i = digits.find('1', i + 1)
+    return positions
+
+
+class TrigramSet:
+    """Trigram postings over one list of documents."""
+
+    def __init__(self, documents: List[str]):
+        self.size = len(documents)
+        self.all = (1 << self.size) - 1
+        self.lengths = array('H')
+        postings = defaultdict(list)
+        for i, document in enumerate(documents):
+            grams = trigrams(document)
+            self.lengths.append(min(len(grams), 0xffff))
+            for gram in grams:
+                postings[gram].append(i)
+
+        dense_min = max(1, self.size // DENSE_FRACTION)
+        self.dense: Dict[str, int] = {}
+        self.sparse: Dict[str, array] = {}
+        for gram, ids in postings.items():
+            if len(ids) > dense_min:
+                self.dense[gram] = _to_bitset(ids, self.size)
+            else:
+                self.sparse[gram] = array('I', ids)
+
+    def _bitset(self, gram: str) -> int:
+        bitset = self.dense.get(gram)
+        if bitset is not None:
+            return bitset
+        ids = self.sparse.get(gram)
+        return _to_bitset(ids, self.size) if ids is not None else 0
+
+    def _at_least(self, planes: List[int], count: int) -> int:
+        """Documents whose bit-sliced counter is >= count."""
+        below, equal = 0, self.all
+        for bit in reversed(range(max(len(planes), count.bit_length()))):
+            plane = planes[bit] if bit < len(planes) else 0
+            if count >> bit & 1:
+                below |= equal & ~plane
+                equal &= plane
+            else:
+                equal &= ~plane
+        return self.all & ~below
+
+    def match(self, grams: set, limit: int = CANDIDATES) -> List[Tuple[float, int]]:
+        """
+        Documents sharing the most trigrams with the query.
+
+        Returns:
+            list: (dice similarity, document index), up to `limit`, unordered
+        """
+        # Bit-sliced counters: planes[j] holds bit j of every document's count
+        planes: List[int] = []
+        for gram in grams:
+            carry = self._bitset(gram)
+            for j in range(len(planes)):
+                plane = planes[j]
+                planes[j] = plane ^ carry
+                carry &= plane
+                if not carry:
+                    break
+            if carry:
+                planes.append(carry)
+
+        wanted = len(grams)
+        floor = max(1, math.ceil(wanted * MIN_OVERLAP))
+        matches = []
+        above = 0
+        for count in range(wanted, floor - 1, -1):
+            reached = self._at_least(planes, count)
+            tier = reached & ~above
+            above = reached
+            if tier:
+                for i in _set_bits(tier, limit - len(matches)):
+                    matches.append((2 * count / (wanted + self.lengths[i]), i))
+                if len(matches) >= limit:
+                    break
+        return matches
+
+
+class _Build(NamedTuple):
+    entries: Entries
+    sets: Dict[str, TrigramSet]       # Per kind
+    members: Dict[str, List[int]]     # Per kind: entry index of each document
+    artists: Dict[str, List[int]]     # Album and track documents: artist entry index, or -1
+    max_plays: int
+
+
+class FuzzyIndex(DerivedIndex):
+    """Trigram index over tracks, albums and artists."""
+
+    name = 'fuzzy'
+
+    def build(self, rows: Iterable[tuple]) -> _Build:
+        entries = collect_entries(rows)
+        documents: Dict[str, List[str]] = {'track': [], 'album': [], 'artist': []}
+        members: Dict[str, List[int]] = {'track': [], 'album': [], 'artist': []}
+        artist_entries = {item['name']: index
+                          for index, (item, kind) in enumerate(zip(entries.items, entries.kinds))
+                          if kind == 'artist'}
+        artists: Dict[str, List[int]] = {'track': [], 'album': []}
+        for index, (item, kind) in enumerate(zip(entries.items, entries.kinds)):
+            if kind == 'track':
+                text = f"{item['name']} {item['artist']} {item['album']}"
+            elif kind == 'album':
+                text = f"{item['name']} {item['artist']}"
+            else:
+                text = item['name']
+            documents[kind].append(normalize(text))
+            members[kind].append(index)
+            if kind in artists:
+                artists[kind].append(artist_entries.get(item['artist'], -1))
+        return _Build(
+            entries=entries,
+            sets={kind: TrigramSet(docs) for kind, docs in documents.items()},
+            members=members,
+            artists=artists,
+            max_plays=max(entries.scores, default=0),
+        )
+
+    def search(self, query: str, search_type: str = 'track', limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Closest matches to `query`, tolerating typos and missing letters.
+
+        Returns:
+            list: Results shaped like /search results, each with a 'score'
+        """
+        build = self._build
+        text = normalize(query)
+        if build is None or not text or search_type not in build.sets:
+            return []
+
+        grams = trigrams(text)
+        candidates = max(CANDIDATES, limit)
+        members = build.members[search_type]
+        # Entry index -> best dice similarity
+        matches = {members[doc]: dice for dice, doc in build.sets[search_type].match(grams, candidates)}
+        if search_type == 'artist':
+            for kind, artists in build.artists.items():
+                for dice, doc in build.sets[kind].match(grams, candidates):
+                    artist = artists[doc]
+                    if artist >= 0 and dice > matches.get(artist, 0):
+                        matches[artist] = dice
+
+        scores = build.entries.scores
+        popularity = math.log1p(build.max_plays) or 1.0
+
+        def ranked(match):
+            entry, dice = match
+            return dice * (1 + POPULARITY_WEIGHT * math.log1p(scores[entry]) / popularity)
+
+        results = []
+        for match in heapq.nlargest(limit, matches.items(), key=ranked):
+            item = dict(build.entries.items[match[0]])
+            item['score'] = round(ranked(match), 4)
+            results.append(item)
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        build = self._build
+        stats = super().stats()
+        if build is not None:
+            stats['trigrams'] = {kind: len(s.dense) + len(s.sparse) for kind, s in build.sets.items()}
+        return stats
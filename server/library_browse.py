@@ -0,0 +1,257 @@
+"""
+Browse catalogue: the library grouped into artists and albums.
+
+Built from a TrackStore in one pass of whole-column operations, with each
+album's and artist's track count, total duration and play count summed up
+front, so browse requests only slice precomputed sorted lists.
+
+Pages use keyset cursors: a cursor holds the sort key of the last item
+returned, and the next page starts just after it. Pages stay consistent
+while the library changes underneath a client (nothing is skipped or
+repeated because earlier items were added or removed), and artist and
+album IDs are derived from names, so they survive index rebuilds.
+"""
+
+import base64
+import bisect
+import hashlib
+import itertools
+import json
+import operator
+import threading
+from array import array
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from derived_index import normalize
+from track_store import TrackStore, TrackStoreIndex
+
+
+# Sort orders per listing; names ascend, everything else descends
+ARTIST_SORTS = ('name', 'tracks', 'albums', 'duration', 'plays')
+ALBUM_SORTS = ('name', 'artist', 'year', 'tracks', 'duration', 'plays')
+
+MAX_PAGE_SIZE = 500
+
+
+class CursorError(ValueError):
+    """A cursor that is malformed or belongs to another listing."""
+
+
+def stable_id(*parts: str) -> str:
+    """Short ID derived from names, identical across index rebuilds."""
+    digest = hashlib.sha1('\x1f'.join(parts).encode('utf-8')).hexdigest()
+    return digest[:16].upper()
+
+
+def encode_cursor(listing: str, key: tuple) -> str:
+    text = json.dumps([listing, list(key)], separators=(',', ':'), ensure_ascii=False)
+    return base64.urlsafe_b64encode(text.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, listing: str) -> tuple:
+    """The sort key stored in `cursor`, which must have come from `listing`."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        name, key = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError, UnicodeError):
+        raise CursorError('Malformed cursor')
+    if name != listing or not isinstance(key, list):
+        raise CursorError('Cursor does not belong to this listing')
+    return tuple(key)
+
+
+class Page(NamedTuple):
+    items: List[Dict[str, Any]]
+    next_cursor: Optional[str]
+    total: int
+
+
+class _Sorted(NamedTuple):
+    keys: List[tuple]   # Ascending sort keys, unique (each ends with the item's ID)
+    items: List[int]    # Item index for each key
+
+
+def _page(listing: str, view: _Sorted, items: List[Dict[str, Any]],
+          cursor: Optional[str], limit: int) -> Page:
+    start = 0
+    if cursor:
+        try:
+            start = bisect.bisect_right(view.keys, decode_cursor(cursor, listing))
+        except TypeError:
+            raise CursorError('Malformed cursor')
+    end = min(start + limit, len(view.keys))
+    next_cursor = encode_cursor(listing, view.keys[end - 1]) if end < len(view.keys) else None
+    return Page([items[i] for i in view.items[start:end]], next_cursor, len(view.keys))
+
+
+class Catalogue:
+    """Artists and albums of one TrackStore, with aggregates."""
+
+    def __init__(self, store: TrackStore):
+        self.store = store
+        columns = store.columns
+        artist, album_artist = columns['artist'], columns['album_artist']
+
+        # Album artist, or the track artist where that is blank (string id 0):
+        # album_artist | (artist * (album_artist == 0)), column at a time
+        credited = array('I', map(operator.or_, album_artist, map(
+            operator.mul, artist, map(operator.not_, album_artist))))
+        album_keys = array('Q', map(operator.or_, map(
+            operator.lshift, columns['album'], itertools.repeat(32)), credited))
+
+        years = columns['year']
+        albums = store.group(album_keys)
+        self.albums: List[Dict[str, Any]] = []
+        self.album_rows: List[array] = []
+        self.album_index: Dict[str, int] = {}
+        albums_per_artist: Dict[int, int] = {}
+        for i, key in enumerate(albums.keys):
+            album_sid, artist_sid = key >> 32, key & 0xffffffff
+            if not album_sid:
+                continue  # Tracks without an album
+            rows = albums.rows(i)
+            name, artist_name = store.string(album_sid), store.string(artist_sid)
+            album_id = stable_id(name, artist_name)
+            self.album_index[album_id] = len(self.albums)
+            self.album_rows.append(rows)
+            self.albums.append({
+                'type': 'album',
+                'id': album_id,
+                'name': name,
+                'artist': artist_name,
+                'artist_id': stable_id(artist_name),
+                'year': max(map(years.__getitem__, rows)) or None,
+                'track_count': albums.count(i),
+                'duration': albums.durations[i] / 1000,
+                'play_count': albums.plays[i],
+            })
+            albums_per_artist[artist_sid] = albums_per_artist.get(artist_sid, 0) + 1
+
+        artists = store.group(credited)
+        self.artists: List[Dict[str, Any]] = []
+        self.artist_index: Dict[str, int] = {}
+        for i, key in enumerate(artists.keys):
+            if not key:
+                continue  # No artist at all
+            name = store.string(key)
+            artist_id = stable_id(name)
+            self.artist_index[artist_id] = len(self.artists)
+            self.artists.append({
+                'type': 'artist',
+                'id': artist_id,
+                'name': name,
+                'album_count': albums_per_artist.get(key, 0),
+                'track_count': artists.count(i),
+                'duration': artists.durations[i] / 1000,
+                'play_count': artists.plays[i],
+            })
+
+        self._names = {'artist': [normalize(a['name']) for a in self.artists],
+                       'album': [normalize(a['name']) for a in self.albums]}
+        self._views: Dict[Tuple, _Sorted] = {}
+        self._lock = threading.Lock()
+
+    def _view(self, kind: str, sort: str, artist_id: Optional[str] = None) -> _Sorted:
+        # Whole-library views are cached; one artist's albums are few enough
+        # to sort per request
+        cache_key = (kind, sort)
+        if artist_id is None:
+            with self._lock:
+                view = self._views.get(cache_key)
+            if view is not None:
+                return view
+
+        items = self.artists if kind == 'artist' else self.albums
+        names = self._names[kind]
+        indices = range(len(items))
+        if artist_id is not None:
+            indices = [i for i in indices if items[i]['artist_id'] == artist_id]
+
+        def key(i):
+            item = items[i]
+            if sort == 'name':
+                return (names[i], item['id'])
+            if sort == 'artist':
+                return (normalize(item['artist']), item.get('year') or 0, names[i], item['id'])
+            value = {'tracks': 'track_count', 'albums': 'album_count', 'duration': 'duration',
+                     'plays': 'play_count', 'year': 'year'}[sort]
+            return (-(item[value] or 0), names[i], item['id'])
+
+        pairs = sorted((key(i), i) for i in indices)
+        view = _Sorted([k for k, _ in pairs], [i for _, i in pairs])
+        if artist_id is None:
+            with self._lock:
+                self._views[cache_key] = view
+        return view
+
+    def artist_page(self, sort: str = 'name', cursor: Optional[str] = None,
+                    limit: int = 100) -> Page:
+        return _page(f'artists:{sort}', self._view('artist', sort), self.artists, cursor, limit)
+
+    def album_page(self, sort: str = 'name', cursor: Optional[str] = None,
+                   limit: int = 100, artist_id: Optional[str] = None) -> Page:
+        listing = f'albums:{sort}:{artist_id or ""}'
+        return _page(listing, self._view('album', sort, artist_id), self.albums, cursor, limit)
+
+    def album(self, album_id: str) -> Optional[Dict[str, Any]]:
+        index = self.album_index.get(album_id)
+        return None if index is None else self.albums[index]
+
+    def album_tracks(self, album_id: str, cursor: Optional[str] = None,
+                     limit: int = 100) -> Optional[Page]:
+        """
+        An album's tracks in database ID order (Music's import order).
+
+        Returns:
+            Page: Track dicts shaped like /search results, or None if there
+                  is no such album
+        """
+        index = self.album_index.get(album_id)
+        if index is None:
+            return None
+        rows = self.album_rows[index]
+        ids = self.store.columns['database_id']
+        listing = f'tracks:{album_id}'
+        start = 0
+        if cursor:
+            key = decode_cursor(cursor, listing)
+            if len(key) != 1 or not isinstance(key[0], int):
+                raise CursorError('Malformed cursor')
+            # Rows are in database ID order within the album
+            start = bisect.bisect_right(list(map(ids.__getitem__, rows)), key[0])
+        end = min(start + limit, len(rows))
+        tracks = [self.store.track_item(row) for row in rows[start:end]]
+        next_cursor = encode_cursor(listing, (ids[rows[end - 1]],)) if end < len(rows) else None
+        return Page(tracks, next_cursor, len(rows))
+
+    def stats(self) -> Dict[str, Any]:
+        return {'artists': len(self.artists), 'albums': len(self.albums), 'views': len(self._views)}
+
+
+class LibraryBrowser:
+    """Keeps a Catalogue for the current build of a TrackStoreIndex."""
+
+    def __init__(self, track_store: TrackStoreIndex):
+        self.track_store = track_store
+        self._catalogue: Optional[Catalogue] = None
+        self._lock = threading.Lock()
+        # Group each new store as soon as it is built, not on first browse
+        track_store.add_listener(lambda store: self.catalogue())
+
+    def catalogue(self) -> Optional[Catalogue]:
+        """Catalogue of the current store, or None until a store exists."""
+        store = self.track_store.store
+        if store is None:
+            return None
+        with self._lock:
+            if self._catalogue is None or self._catalogue.store is not store:
+                self._catalogue = Catalogue(store)
+            return self._catalogue
+
+    def warm(self):
+        """Build the catalogue in the background (e.g. for a store mapped at startup)."""
+        threading.Thread(target=self.catalogue, daemon=True).start()
+
+    def stats(self) -> Dict[str, Any]:
+        catalogue = self._catalogue
+        return catalogue.stats() if catalogue is not None else {'artists': 0, 'albums': 0, 'views': 0}
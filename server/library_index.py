@@ -0,0 +1,330 @@
+"""
+Local library index backed by SQLite FTS5.
+
+Populated from a bulk export of track metadata, it answers /search in
+milliseconds with ranking and LIMIT pushed down into SQLite, instead of
+asking Music to search and filtering the results afterwards.
+
+Every change bumps a library version stored alongside the data, which
+derived caches use to know when to rebuild.
+"""
+
+import calendar
+import itertools
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+
+# Fields stored per track, in export order
+TRACK_FIELDS = [
+    'database_id', 'persistent_id', 'name', 'artist', 'album',
+    'album_artist', 'genre', 'year', 'duration', 'play_count', 'modified',
+]
+
+# Columns mirrored into the full-text table
+FTS_FIELDS = ['name', 'artist', 'album', 'album_artist', 'genre']
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS tracks (
+    database_id INTEGER PRIMARY KEY,
+    persistent_id TEXT UNIQUE,
+    name TEXT,
+    artist TEXT,
+    album TEXT,
+    album_artist TEXT,
+    genre TEXT,
+    year INTEGER,
+    duration REAL,
+    play_count INTEGER,
+    modified TEXT
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS tracks_fts USING fts5(
+    name, artist, album, album_artist, genre,
+    content='tracks',
+    content_rowid='database_id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+'''
+
+# bm25 column weights: name, artist, album, album_artist, genre
+RANK = 'bm25(tracks_fts, 10.0, 5.0, 4.0, 2.0, 1.0)'
+
+BATCH_SIZE = 2000
+
+
+def modification_stamp(utc_seconds: float) -> str:
+    """
+    Canonical text form of a track's modification date.
+
+    AppleScript dates carry no time zone, so Music reports them as local
+    wall-clock time; every source stores whole seconds since 1970-01-01 on
+    that local clock so fingerprints compare equal across sources.
+    """
+    return str(calendar.timegm(time.localtime(utc_seconds)))
+
+
+def parse_database_id(text: Any) -> Optional[int]:
+    """A database ID as an int, or None unless `text` is a plain positive integer."""
+    text = str(text).strip()
+    if not (text.isascii() and text.isdigit()):
+        return None
+    value = int(text)
+    return value if 0 < value < 2 ** 32 else None
+
+
+def parse_persistent_id(text: Any) -> Optional[str]:
+    """A persistent ID in canonical upper case, or None unless `text` is 16 hex digits."""
+    text = str(text).strip().upper()
+    if len(text) != 16 or not text.isascii() or text.strip('0123456789ABCDEF'):
+        return None
+    return text
+
+
+def fts_query(query: str, columns: Optional[List[str]] = None) -> Optional[str]:
+    """
+    Turn free text into an FTS5 query: every word must match, as a prefix.
+
+    Returns:
+        str: The MATCH expression, or None if the query has no words
+    """
+    words = [w for w in query.replace('"', ' ').split() if w]
+    if not words:
+        return None
+    expression = ' '.join(f'"{word}"*' for word in words)
+    if columns:
+        return '{%s} : (%s)' % (' '.join(columns), expression)
+    return expression
+
+
+class LibraryIndex:
+    """SQLite full-text index over the music library."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.executescript(SCHEMA)
+            self._migrate()
+        self.version = int(self.get_meta('library_version', 0))
+
+    def _migrate(self):
+        """Add columns introduced after an index file was created."""
+        columns = {row[1] for row in self._conn.execute('PRAGMA table_info(tracks)')}
+        if 'modified' not in columns:
+            self._conn.execute('ALTER TABLE tracks ADD COLUMN modified TEXT')
+            self._conn.commit()
+
+    def _bump_version(self):
+        """Record that the library changed. Call inside a transaction."""
+        self.version += 1
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('library_version', ?)",
+                           (str(self.version),))
+
+    # Maintenance
+
+    def rebuild(self, tracks: Iterable[Dict[str, Any]]) -> int:
+        """
+        Replace the whole index with `tracks`.
+
+        Args:
+            tracks: Dicts with the keys in TRACK_FIELDS (streamed in batches)
+
+        Returns:
+            int: Number of tracks indexed
+        """
+        count = 0
+        rows = (tuple(track.get(field) for field in TRACK_FIELDS) for track in tracks)
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM tracks')
+            while True:
+                batch = list(itertools.islice(rows, BATCH_SIZE))
+                if not batch:
+                    break
+                self._conn.executemany(self._insert_sql(), batch)
+                count += len(batch)
+            self._conn.execute("INSERT INTO tracks_fts(tracks_fts) VALUES('rebuild')")
+            self._bump_version()
+        return count
+
+    @staticmethod
+    def _insert_sql() -> str:
+        placeholders = ', '.join('?' for _ in TRACK_FIELDS)
+        return f"INSERT OR REPLACE INTO tracks ({', '.join(TRACK_FIELDS)}) VALUES ({placeholders})"
+
+    def _fts_delete(self, where: str, params: Iterable[Any]):
+        """Remove rows matching `where` from the full-text table."""
+        columns = ', '.join(FTS_FIELDS)
+        self._conn.execute(f'''
+            INSERT INTO tracks_fts(tracks_fts, rowid, {columns})
+            SELECT 'delete', database_id, {columns} FROM tracks WHERE {where}
+        ''', tuple(params))
+
+    def apply_changes(self, upserts: Iterable[Dict[str, Any]], deleted: Iterable[str]) -> int:
+        """
+        Apply an incremental update in one transaction.
+
+        Args:
+            upserts: Added or changed tracks (dicts keyed by TRACK_FIELDS)
+            deleted: Persistent IDs of tracks removed from the library
+
+        Returns:
+            int: Number of rows touched
+        """
+        touched = 0
+        columns = ', '.join(FTS_FIELDS)
+        with self._lock, self._conn:
+            for persistent_id in deleted:
+                self._fts_delete('persistent_id = ?', (persistent_id,))
+                self._conn.execute('DELETE FROM tracks WHERE persistent_id = ?', (persistent_id,))
+                touched += 1
+            for track in upserts:
+                # A track's database ID can change (e.g. re-added); drop both
+                self._fts_delete('database_id = ? OR persistent_id = ?',
+                                 (track['database_id'], track['persistent_id']))
+                self._conn.execute('DELETE FROM tracks WHERE database_id = ? OR persistent_id = ?',
+                                   (track['database_id'], track['persistent_id']))
+                self._conn.execute(self._insert_sql(),
+                                   tuple(track.get(field) for field in TRACK_FIELDS))
+                self._conn.execute(f'''
+                    INSERT INTO tracks_fts(rowid, {columns})
+                    SELECT database_id, {columns} FROM tracks WHERE database_id = ?
+                ''', (track['database_id'],))
+                touched += 1
+            if touched:
+                self._bump_version()
+        return touched
+
+    def fingerprints(self) -> Dict[str, Optional[str]]:
+        """Persistent ID -> modification stamp for every indexed track."""
+        with self._lock:
+            return dict(self._conn.execute('SELECT persistent_id, modified FROM tracks'))
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM tracks').fetchone()[0]
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            return self._conn.execute('SELECT 1 FROM tracks LIMIT 1').fetchone() is None
+
+    def get_meta(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key: str, value: Any):
+        with self._lock, self._conn:
+            self._conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)',
+                               (key, str(value)))
+
+    # Queries
+
+    def iter_tracks(self, fields: Optional[List[str]] = None) -> Iterator[tuple]:
+        """
+        Stream every track as a tuple of `fields` (default TRACK_FIELDS).
+
+        Reads through a separate connection, so the scan sees one consistent
+        snapshot and does not hold the index lock while callers consume it.
+        """
+        fields = fields or TRACK_FIELDS
+        unknown = set(fields) - set(TRACK_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown track fields: {sorted(unknown)}")
+        conn = sqlite3.connect(self.db_path)
+        try:
+            cursor = conn.execute(f"SELECT {', '.join(fields)} FROM tracks ORDER BY database_id")
+            while True:
+                rows = cursor.fetchmany(BATCH_SIZE)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            conn.close()
+
+    def search(self, query: str, search_type: str = 'track', limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Search the index.
+
+        Args:
+            query: Free text; every word must match as a prefix
+            search_type: 'track', 'album' or 'artist'
+            limit: Maximum number of results
+
+        Returns:
+            list: Results shaped like applescript_commands.search_library
+        """
+        if search_type == 'album':
+            return self._search_albums(query, limit)
+        if search_type == 'artist':
+            return self._search_artists(query, limit)
+
+        match = fts_query(query)
+        if match is None:
+            return []
+        with self._lock:
+            rows = self._conn.execute(f'''
+                SELECT t.database_id, t.name, t.artist, t.album
+                FROM tracks_fts JOIN tracks t ON t.database_id = tracks_fts.rowid
+                WHERE tracks_fts MATCH ?
+                ORDER BY {RANK}
+                LIMIT ?
+            ''', (match, limit)).fetchall()
+        return [{
+            'type': 'track',
+            'name': row['name'],
+            'artist': row['artist'],
+            'album': row['album'],
+            'id': str(row['database_id']),
+        } for row in rows]
+
+    def _search_albums(self, query: str, limit: int) -> List[Dict[str, Any]]:
+        match = fts_query(query, ['album', 'artist', 'album_artist'])
+        if match is None:
+            return []
+        with self._lock:
+            rows = self._conn.execute(f'''
+                WITH hits AS MATERIALIZED (
+                    SELECT t.album AS album, t.artist AS artist, {RANK} AS score
+                    FROM tracks_fts JOIN tracks t ON t.database_id = tracks_fts.rowid
+                    WHERE tracks_fts MATCH ?
+                )
+                SELECT album, artist, MIN(score) AS score FROM hits
+                WHERE album != ''
+                GROUP BY album, artist
+                ORDER BY score
+                LIMIT ?
+            ''', (match, limit)).fetchall()
+        return [{'type': 'album', 'name': row['album'], 'artist': row['artist']} for row in rows]
+
+    def _search_artists(self, query: str, limit: int) -> List[Dict[str, Any]]:
+        match = fts_query(query, ['artist', 'album_artist'])
+        if match is None:
+            return []
+        with self._lock:
+            rows = self._conn.execute(f'''
+                WITH hits AS MATERIALIZED (
+                    SELECT t.artist AS artist, {RANK} AS score
+                    FROM tracks_fts JOIN tracks t ON t.database_id = tracks_fts.rowid
+                    WHERE tracks_fts MATCH ?
+                )
+                SELECT artist, MIN(score) AS score FROM hits
+                WHERE artist != ''
+                GROUP BY artist
+                ORDER BY score
+                LIMIT ?
+            ''', (match, limit)).fetchall()
+        return [{'type': 'artist', 'name': row['artist']} for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,165 @@
+"""
+Incremental library sync engine.
+
+Keeps the library index fresh without re-exporting the whole library: each
+run fetches only persistent IDs and modification dates, diffs them against
+the index, and pulls full metadata just for added and changed tracks.
+
+An empty index is seeded from Music's Library.xml when one is available
+(no AppleScript needed, and Music does not have to be running); the next
+diff then picks up whatever changed since the file was written.
+
+Sync work is throttled so it never takes more than a configured share of
+script time away from interactive commands.
+"""
+
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from library_index import LibraryIndex
+from library_xml import read_tracks
+from player_backend import PlayerBackend
+
+
+class LibrarySync:
+    """Background sync from the player's library into a LibraryIndex."""
+
+    def __init__(self, index: LibraryIndex, backend: PlayerBackend,
+                 interval: float = 300.0, max_share: float = 0.1,
+                 batch_size: int = 200, full_threshold: int = 5000,
+                 library_xml: Optional[str] = None,
+                 on_change: Optional[Callable[[Dict[str, Any]], None]] = None):
+        """
+        Args:
+            index: Index to keep in sync
+            backend: Player to read the library from
+            interval: Seconds between routine syncs
+            max_share: Largest fraction of wall time spent running sync
+                       scripts (0.1 = sleep 9x as long as each script took)
+            batch_size: Tracks fetched per script while pulling changes
+            full_threshold: Above this many added/changed tracks, a full
+                            export is cheaper than fetching them one by one
+            library_xml: Library.xml to seed an empty index from
+            on_change: Called with the sync result after the index changed
+        """
+        self.index = index
+        self.backend = backend
+        self.interval = interval
+        self.max_share = max(0.01, min(1.0, max_share))
+        self.batch_size = batch_size
+        self.full_threshold = full_threshold
+        self.library_xml = library_xml
+        self.on_change = on_change
+
+        self.running = False
+        self.thread: Optional[threading.Thread] = None
+        self.last_result: Dict[str, Any] = {}
+        self._wake = threading.Event()
+
+    def start(self):
+        """Start syncing in a background thread."""
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._sync_loop, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self._wake.set()
+
+    def request_sync(self):
+        """Run a sync as soon as possible."""
+        self._wake.set()
+
+    def _sync_loop(self):
+        while self.running:
+            try:
+                self.last_result = self.sync_once()
+                if self.last_result.get('changed'):
+                    print(f"📚 Library sync: {self.last_result}")
+                    if self.on_change:
+                        self.on_change(self.last_result)
+            except Exception as e:
+                print(f"Library sync error: {e}")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def _throttle(self, elapsed: float):
+        """Sleep long enough to keep script time under max_share."""
+        if self.max_share < 1.0 and self.running:
+            time.sleep(elapsed * (1 - self.max_share) / self.max_share)
+
+    def _timed(self, func, *args):
+        started = time.monotonic()
+        result = func(*args)
+        self._throttle(time.monotonic() - started)
+        return result
+
+    def sync_once(self) -> Dict[str, Any]:
+        """
+        Bring the index up to date.
+
+        Returns:
+            dict: What was done ('mode', counts, 'changed', 'seconds', 'version')
+        """
+        started = time.monotonic()
+
+        seeded = 0
+        if self.index.is_empty() and self.library_xml and os.path.exists(self.library_xml):
+            seeded = self.index.rebuild(read_tracks(self.library_xml))
+
+        # Never touch Music while it is closed: any script would launch it
+        if not self.backend.is_running():
+            return self._result('xml' if seeded else 'offline', started,
+                                added=seeded, changed=seeded > 0)
+
+        if self.index.is_empty():
+            tracks = self._timed(self.backend.export_library)
+            if tracks is None:
+                return self._result('failed', started)
+            count = self.index.rebuild(tracks)
+            return self._result('full', started, added=count, changed=count > 0)
+
+        remote = self._timed(self.backend.export_fingerprints)
+        if remote is None:
+            return self._result('failed', started)
+        local = self.index.fingerprints()
+        # Nothing at all from a library we hold tracks for is a failed script
+        # or a Music that has not loaded its library yet, never "all deleted"
+        if not remote and local:
+            return self._result('failed', started)
+
+        deleted = [pid for pid in local if pid not in remote]
+        pending = [pid for pid, stamp in remote.items()
+                   if pid not in local or local[pid] != stamp]
+        added = sum(1 for pid in pending if pid not in local)
+
+        if len(pending) > self.full_threshold:
+            tracks = self._timed(self.backend.export_library)
+            # An empty export of a non-empty library is a failed script, and
+            # rebuilding from it would wipe the index
+            if not tracks and (remote or local):
+                return self._result('failed', started)
+            count = self.index.rebuild(tracks)
+            return self._result('full', started, added=count, changed=True)
+
+        upserts = []
+        for i in range(0, len(pending), self.batch_size):
+            upserts.extend(self._timed(self.backend.fetch_tracks, pending[i:i + self.batch_size]))
+        touched = self.index.apply_changes(upserts, deleted)
+
+        return self._result('xml+incremental' if seeded else 'incremental', started,
+                            seeded=seeded, added=added, updated=len(pending) - added,
+                            deleted=len(deleted), changed=seeded > 0 or touched > 0)
+
+    def _result(self, mode: str, started: float, changed: bool = False, **counts) -> Dict[str, Any]:
+        return {
+            'mode': mode,
+            **counts,
+            'changed': changed,
+            'seconds': round(time.monotonic() - started, 3),
+            'version': self.index.version,
+        }
@@ -0,0 +1,148 @@
+"""
+Streaming importer for Music's exported Library.xml.
+
+Music can write the whole library as one XML property list (File > Library >
+Export Library, or "Share Library XML with other applications"). Reading it
+is far faster than pulling the library through AppleScript, but the file
+easily reaches hundreds of megabytes, so it is parsed incrementally: each
+track is converted and emitted as soon as its closing tag is seen, keeping
+memory flat regardless of library size. expat is driven directly so no
+element tree is ever built, and reading stops where the Tracks section
+ends (playlists follow it and are not needed).
+
+Tracks come out keyed by library_index.TRACK_FIELDS, with the same types
+as applescript_commands.export_library().
+"""
+
+import calendar
+import os
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Union
+from xml.parsers import expat
+
+from library_index import modification_stamp
+
+
+CHUNK_SIZE = 1 << 16
+
+# Nesting depth (1 = <plist>) of the elements the importer acts on
+SECTION_KEY_DEPTH = 3   # <key>Tracks</key> / <key>Playlists</key>
+ITEM_DEPTH = 4          # one track <dict>
+FIELD_DEPTH = 5         # a track's keys and values
+
+Source = Union[str, os.PathLike, BinaryIO]
+
+
+def default_library_xml() -> Optional[str]:
+    """Where Music shares its library XML, if the file exists."""
+    path = Path.home() / 'Music' / 'Music' / 'Library.xml'
+    return str(path) if path.exists() else None
+
+
+def _parse_date(text: str) -> Optional[str]:
+    """Convert a plist date (UTC, 2024-01-31T12:00:00Z) to a modification stamp."""
+    try:
+        fields = (text[0:4], text[5:7], text[8:10], text[11:13], text[14:16], text[17:19])
+        return modification_stamp(calendar.timegm(tuple(map(int, fields))))
+    except (TypeError, ValueError):
+        return None
+
+
+def _track(entry: Dict[str, Any]) -> Dict[str, Any]:
+    total_time = entry.get('Total Time')
+    return {
+        'database_id': entry.get('Track ID'),
+        'persistent_id': entry.get('Persistent ID'),
+        'name': entry.get('Name', ''),
+        'artist': entry.get('Artist', ''),
+        'album': entry.get('Album', ''),
+        'album_artist': entry.get('Album Artist', ''),
+        'genre': entry.get('Genre', ''),
+        'year': entry.get('Year', 0),
+        'duration': total_time / 1000 if total_time is not None else None,
+        'play_count': entry.get('Play Count', 0),
+        'modified': _parse_date(entry.get('Date Modified')),
+    }
+
+
+class _PlistHandler:
+    """
+    expat callbacks that turn the track <dict>s into dicts.
+
+    Only the flat key/value pairs at FIELD_DEPTH are kept; nested
+    containers are recorded as present.
+    """
+
+    def __init__(self):
+        self.pending: List[Dict[str, Any]] = []
+        self.depth = 0
+        self.section: Optional[str] = None
+        self.key: Optional[str] = None
+        self.fields: Dict[str, Any] = {}
+        self.text: List[str] = []
+        self.done = False
+
+    def start(self, name, attrs):
+        self.depth += 1
+        self.text.clear()
+
+    def data(self, text):
+        self.text.append(text)
+
+    def end(self, name):
+        depth = self.depth
+        self.depth -= 1
+
+        if depth == FIELD_DEPTH:
+            if name == 'key':
+                self.key = ''.join(self.text)
+            elif name == 'integer':
+                self.fields[self.key] = int(''.join(self.text))
+            elif name in ('string', 'date'):
+                self.fields[self.key] = ''.join(self.text)
+            elif name == 'true' or name == 'false':
+                self.fields[self.key] = name == 'true'
+            elif name == 'real':
+                self.fields[self.key] = float(''.join(self.text))
+            else:
+                self.fields[self.key] = True  # <data>, <dict>, <array>
+        elif depth == ITEM_DEPTH and name == 'dict':
+            if self.section == 'Tracks':
+                self.pending.append(_track(self.fields))
+            self.fields = {}
+        elif depth == SECTION_KEY_DEPTH and name == 'key':
+            self.done = self.section == 'Tracks'
+            self.section = ''.join(self.text)
+
+
+def read_tracks(source: Source, chunk_size: int = CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+    """
+    Stream the tracks out of a Library.xml file.
+
+    Args:
+        source: Path or binary file object
+        chunk_size: Bytes read per parser feed
+
+    Yields:
+        dict: One track, keyed by library_index.TRACK_FIELDS
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            yield from read_tracks(f, chunk_size)
+        return
+
+    handler = _PlistHandler()
+    parser = expat.ParserCreate()
+    parser.buffer_text = True
+    parser.StartElementHandler = handler.start
+    parser.EndElementHandler = handler.end
+    parser.CharacterDataHandler = handler.data
+
+    while not handler.done:
+        chunk = source.read(chunk_size)
+        parser.Parse(chunk, not chunk)
+        if handler.pending:
+            yield from handler.pending
+            handler.pending.clear()
+        if not chunk:
+            break
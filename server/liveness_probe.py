@@ -0,0 +1,81 @@
+"""
+Cheap "is Music running" probe with exponential backoff.
+
+Every `tell application "Music"` launches Music.app if it is closed, so
+background scripts must only run while the process is up. The probe checks
+at process level (no Apple Events) and backs off while Music is down.
+
+While Music is up, the snapshot script reports liveness as a side effect
+(it answers "offline" without talking to Music), and its result is fed in
+with observe() so no separate check runs per poll.
+"""
+
+import threading
+import time
+from typing import Callable, Optional
+
+
+class LivenessProbe:
+    """Tracks whether the player process is running and reports transitions."""
+
+    def __init__(self, check: Callable[[], bool], min_backoff: float = 1.0,
+                 max_backoff: float = 30.0, cache_ttl: float = 1.0):
+        """
+        Args:
+            check: Returns True if the player process is running
+            min_backoff: First retry delay after the player goes down
+            max_backoff: Longest retry delay while it stays down
+            cache_ttl: How long a result is reused by is_running()
+        """
+        self._check = check
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.cache_ttl = cache_ttl
+
+        self.running: Optional[bool] = None
+        self.backoff = min_backoff
+        self._checked_at = float('-inf')
+        self._reported: Optional[bool] = None
+        self._lock = threading.Lock()
+
+    def poll(self) -> bool:
+        """Run the check now and update the backoff."""
+        try:
+            running = bool(self._check())
+        except Exception:
+            running = False
+        return self.observe(running)
+
+    def observe(self, running: bool) -> bool:
+        """Record a liveness result learned some other way (e.g. from a snapshot)."""
+        with self._lock:
+            previous = self.running
+            self.running = running
+            self._checked_at = time.monotonic()
+            if running:
+                self.backoff = self.min_backoff
+            elif previous is False:
+                self.backoff = min(self.max_backoff, self.backoff * 2)
+        return running
+
+    def take_transition(self) -> Optional[str]:
+        """
+        Report a flip since the last call, once.
+
+        Returns:
+            str: 'offline' or 'online' when the state flipped, else None
+        """
+        with self._lock:
+            if self.running is None or self.running == self._reported:
+                return None
+            first = self._reported is None
+            self._reported = self.running
+            if self.running:
+                return None if first else 'online'
+            return 'offline'
+
+    def is_running(self) -> bool:
+        """Latest result, re-checked if older than cache_ttl."""
+        if self.running is None or time.monotonic() - self._checked_at > self.cache_ttl:
+            self.poll()
+        return bool(self.running)
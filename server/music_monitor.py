@@ -3,24 +3,39 @@ Background monitoring service for Apple Music state changes.
 Detects changes and triggers WebSocket broadcasts.
 """
 
-import time
 import threading
 from typing import Optional, Dict, Any
-import applescript_commands as asc
+from liveness_probe import LivenessProbe
+from player_backend import PlayerBackend, get_backend
+from player_state import PlayerSnapshot
+from poll_scheduler import PollScheduler
+from state_store import StateEntry, StateStore
 
 
 class MusicMonitor:
     """Monitors Apple Music for state changes and triggers callbacks."""
     
-    def __init__(self, on_change_callback):
+    def __init__(self, on_change_callback, backend: Optional[PlayerBackend] = None,
+                 store: Optional[StateStore] = None,
+                 scheduler: Optional[PollScheduler] = None,
+                 probe: Optional[LivenessProbe] = None):
         """
         Initialize the monitor.
         
         Args:
             on_change_callback: Function to call when state changes.
                                 Receives dict with changed fields.
+            backend: Player backend to poll (defaults to the shared one)
+            store: Where each polled snapshot is published for readers
+            scheduler: Decides when to poll (defaults to PollScheduler())
+            probe: Gates every background script on Music actually running
         """
         self.on_change_callback = on_change_callback
+        self.backend = backend or get_backend()
+        self.store = store or StateStore()
+        self.scheduler = scheduler or PollScheduler()
+        self.probe = probe or LivenessProbe(self.backend.is_running)
+        self._refresh_lock = threading.Lock()
         self.running = False
         self.thread: Optional[threading.Thread] = None
         
@@ -40,58 +55,155 @@ class MusicMonitor:
     def stop(self):
         """Stop monitoring."""
         self.running = False
+        self.scheduler.wake()
         if self.thread:
             self.thread.join(timeout=2)
         print("🎵 Music monitor stopped")
         
+    def get_state(self, max_age: float) -> StateEntry:
+        """
+        Get the published state, querying the player only if it is stale.
+        
+        Args:
+            max_age: Oldest acceptable snapshot age in seconds
+            
+        Returns:
+            StateEntry: Snapshot, state version and publish time
+        """
+        self.scheduler.note_reader()
+        entry = self.store.read()
+        if entry is not None and entry.age <= max_age:
+            return entry
+        
+        # One live query at a time; concurrent readers reuse its result
+        with self._refresh_lock:
+            entry = self.store.read()
+            if entry is not None and entry.age <= max_age:
+                return entry
+            # While Music is known to be up, the snapshot itself says if it quit
+            if not self.probe.running and not self.probe.is_running():
+                # Don't launch Music just to report that nothing is playing
+                return self.store.publish(PlayerSnapshot(running=False))
+            snapshot = self.backend.get_player_snapshot()
+            self.probe.observe(snapshot.running)
+            return self.store.publish(snapshot)
+        
+    def notify_command(self):
+        """A user command was sent to the player; look for its effect soon."""
+        self.scheduler.boost()
+        
+    def wait_for_track_change(self, previous_key: Optional[str], timeout: float,
+                              target_id: Optional[str] = None) -> StateEntry:
+        """
+        Wait for the published track to differ from `previous_key`.
+        
+        The monitor polls in burst mode while the caller waits, so this
+        returns as soon as Music has actually switched tracks.
+        
+        Args:
+            previous_key: Track key before the command was sent
+            timeout: Longest time to wait, in seconds
+            target_id: If given, wait for this database ID specifically
+            
+        Returns:
+            StateEntry: The new state, or a live query's result on timeout
+        """
+        def changed(entry: StateEntry) -> bool:
+            if target_id is not None:
+                return entry.snapshot.database_id == str(target_id)
+            return entry.snapshot.track_key != previous_key
+        
+        self.scheduler.begin_burst()
+        try:
+            entry = self.store.wait_for(changed, timeout)
+        finally:
+            self.scheduler.end_burst()
+        return entry if entry is not None else self.get_state(0)
+        
+    def add_subscriber(self):
+        self.scheduler.add_subscriber()
+        
+    def remove_subscriber(self):
+        self.scheduler.remove_subscriber()
+        
+    def metrics(self) -> Dict[str, Any]:
+        """Polling rate, lag and state version for diagnostics."""
+        return {
+            **self.scheduler.metrics(),
+            'state_version': self.store.version,
+            'player_running': self.probe.running,
+            'probe_backoff': self.probe.backoff,
+        }
+        
     def _monitor_loop(self):
         """Main monitoring loop - runs in background thread."""
         while self.running:
             try:
-                current_state = self._get_current_state()
-                changes = self._detect_changes(current_state)
-                
-                if changes:
-                    # Broadcast changes to all connected clients
-                    self.on_change_callback(changes)
+                # The process check only runs while Music is down; while it is
+                # up, each snapshot reports whether it is still running
+                if not self.probe.running:
+                    self.probe.poll()
+                current_state = self._get_current_state() if self.probe.running else {}
+                self._handle_liveness(self.probe.take_transition())
                 
-                # Always update last_state, even for position-only changes
-                self.last_state = current_state
+                if self.probe.running:
+                    changes = self._detect_changes(current_state)
+                    
+                    if changes:
+                        # Broadcast changes to all connected clients
+                        self.on_change_callback(changes)
+                    
+                    # Always update last_state, even for position-only changes
+                    self.last_state = current_state
                     
             except Exception as e:
                 print(f"Monitor error: {e}")
                 
-            # Poll every 500ms (only server-side, very efficient)
-            time.sleep(0.5)
+            if self.running:
+                offline_delay = None if self.probe.running else self.probe.backoff
+                self.scheduler.wait(self.store.read(), offline_delay)
+                
+    def _handle_liveness(self, transition: Optional[str]):
+        """React to Music being quit or launched."""
+        if transition == 'offline':
+            self.store.publish(PlayerSnapshot(running=False))
+            # Forget the old state so the next poll sends a full update
+            self.last_state = {}
+            self.on_change_callback({'type': 'player_offline'})
+        elif transition == 'online':
+            self.on_change_callback({'type': 'player_online'})
+            self.scheduler.boost()
             
     def _get_current_state(self) -> Dict[str, Any]:
-        """Get current Music.app state."""
+        """Get current Music.app state in a single script call and publish it."""
         try:
-            track_info = asc.get_current_track()
-            # Get playback state  
-            state = 'stopped'
-            try:
-                state_result = asc.execute_applescript('''
-                    tell application "Music"
-                        return player state as string
-                    end tell
-                ''')
-                state = state_result.strip().lower() if state_result else 'stopped'
-            except:
-                pass
-            
-            return {
-                'track_name': track_info.get('name'),
-                'track_artist': track_info.get('artist'),
-                'track_album': track_info.get('album'),
-                'position': track_info.get('position', 0),
-                'duration': track_info.get('duration', 0),
-                'state': state,
-                'volume': 50,  # We'll get this from status endpoint if needed
-            }
+            snapshot = self.backend.get_player_snapshot()
+            self.probe.observe(snapshot.running)
+            if not snapshot.running:
+                return {}
+            entry = self.store.publish(snapshot)
+            return self._state_dict(snapshot, seeked=entry.seeked)
         except Exception:
             return {}
             
+    @staticmethod
+    def _state_dict(snapshot: PlayerSnapshot, seeked: bool = False) -> Dict[str, Any]:
+        """Flatten a snapshot into the fields compared between polls."""
+        return {
+            'track_id': snapshot.database_id,
+            'track_persistent_id': snapshot.persistent_id,
+            'track_name': snapshot.name,
+            'track_artist': snapshot.artist,
+            'track_album': snapshot.album,
+            'position': snapshot.position,
+            'duration': snapshot.duration,
+            'state': snapshot.state,
+            'volume': snapshot.volume,
+            'shuffle': snapshot.shuffle,
+            'repeat': snapshot.repeat,
+            'seeked': seeked,
+        }
+            
     def _detect_changes(self, current_state: Dict[str, Any]) -> Dict[str, Any]:
         """
         Compare current state with last state and return changes.
@@ -106,10 +218,14 @@ class MusicMonitor:
         changes = {}
         
         # Check for track change
-        if (current_state.get('track_name') != self.last_state.get('track_name') or
+        if (current_state.get('track_id') != self.last_state.get('track_id') or
+            current_state.get('track_persistent_id') != self.last_state.get('track_persistent_id') or
+            current_state.get('track_name') != self.last_state.get('track_name') or
             current_state.get('track_artist') != self.last_state.get('track_artist')):
             changes['type'] = 'track_changed'
             changes['track'] = {
+                'id': current_state.get('track_id'),
+                'persistent_id': current_state.get('track_persistent_id'),
                 'name': current_state.get('track_name'),
                 'artist': current_state.get('track_artist'),
                 'album': current_state.get('track_album'),
@@ -129,8 +245,10 @@ class MusicMonitor:
                 changes['type'] = 'volume_changed'
             changes['volume'] = current_state.get('volume')
             
-        # Don't broadcast position-only updates
-        # The client's seek bar will handle smooth animation
-        # Only broadcast if there are actual changes above
+        # Position is projected between polls, so only broadcast it when
+        # it jumped away from the projection (a seek, or clock drift)
+        if current_state.get('seeked') and not changes.get('type'):
+            changes['type'] = 'position_changed'
+            changes['position'] = current_state.get('position')
             
         return changes if changes else None
@@ -0,0 +1,480 @@
+"""
+Pool of long-lived script runner processes.
+
+Spawning a fresh `osascript -e` for every command costs a process start and
+a script compile each time. Instead we keep a few runner processes alive and
+send them scripts over a pipe.
+
+Wire protocol (both directions): an ASCII decimal byte count, a newline, then
+that many bytes of UTF-8 JSON.
+
+    request:  {"id": 1, "op": "run", "source": "tell application ..."}
+              {"id": 2, "op": "exec", "key": "set_volume-ab12", "path": "/x.scpt",
+               "source": "on run argv ...", "argv": ["50"]}
+              {"id": 3, "op": "ping"}
+    response: {"id": 1, "ok": true, "result": "..."}
+              {"id": 1, "ok": false, "error": "..."}
+
+"exec" runs a script's `on run argv` handler with the given arguments. The
+runner keeps the compiled script in memory under "key", loading it from
+"path" (a compiled .scpt) or compiling "source" the first time it sees it.
+
+The default runner is a small JXA program hosted by osascript. Any other
+executable that speaks the protocol can be used instead by setting
+OSASCRIPT_RUNNER, which is how the pool is exercised on Linux.
+"""
+
+import json
+import os
+import queue
+import shlex
+import subprocess
+import threading
+import time
+from typing import Dict, List, Optional, Any
+
+
+# JXA program that reads framed requests from stdin and executes them with
+# NSAppleScript, writing framed responses to stdout.
+RUNNER_SOURCE = r'''
+ObjC.import('Foundation');
+
+var stdin = $.NSFileHandle.fileHandleWithStandardInput;
+var stdout = $.NSFileHandle.fileHandleWithStandardOutput;
+var compiled = {};
+
+function decode(data) {
+    return $.NSString.alloc.initWithDataEncoding(data, $.NSUTF8StringEncoding).js;
+}
+
+function encode(text) {
+    return $(text).dataUsingEncoding($.NSUTF8StringEncoding);
+}
+
+function readFrame() {
+    var header = '';
+    while (true) {
+        var byte = stdin.readDataOfLength(1);
+        if (byte.length === 0) return null;
+        var ch = decode(byte);
+        if (ch === '\n') break;
+        header += ch;
+    }
+    var length = parseInt(header, 10);
+    var body = $.NSMutableData.dataWithCapacity(length);
+    while (body.length < length) {
+        var chunk = stdin.readDataOfLength(length - body.length);
+        if (chunk.length === 0) return null;
+        body.appendData(chunk);
+    }
+    return JSON.parse(decode(body));
+}
+
+function writeFrame(message) {
+    var data = encode(JSON.stringify(message));
+    stdout.writeData(encode(String(data.length) + '\n'));
+    stdout.writeData(data);
+}
+
+function describe(desc) {
+    if (!desc || desc.isNil()) return '';
+    var type = desc.descriptorType;
+    if (type === 0x6c697374) {  // 'list' - mimic osascript's "a, b, c"
+        var items = [];
+        for (var i = 1; i <= desc.numberOfItems; i++) {
+            items.push(describe(desc.descriptorAtIndex(i)));
+        }
+        return items.join(', ');
+    }
+    if (type === 0x74727565 || type === 0x66616c73 || type === 0x626f6f6c) {
+        return desc.booleanValue ? 'true' : 'false';
+    }
+    var text = desc.stringValue;
+    return (!text || text.isNil()) ? '' : text.js;
+}
+
+function errorMessage(error) {
+    var info = error[0];
+    if (!info || info.isNil()) return 'Unknown AppleScript error';
+    var message = info.objectForKey('NSAppleScriptErrorMessage');
+    return (!message || message.isNil()) ? 'Unknown AppleScript error' : message.js;
+}
+
+function runEvent(args) {
+    // 'aevt'/'oapp' is the run event; its direct object becomes argv
+    var event = $.NSAppleEventDescriptor.appleEventWithEventClassEventIDTargetDescriptorReturnIDTransactionID(
+        0x61657674, 0x6f617070, $.NSAppleEventDescriptor.nullDescriptor, -1, 0);
+    var argv = $.NSAppleEventDescriptor.listDescriptor;
+    for (var i = 0; i < args.length; i++) {
+        argv.insertDescriptorAtIndex($.NSAppleEventDescriptor.descriptorWithString(String(args[i])), i + 1);
+    }
+    event.setParamDescriptorForKeyword(argv, 0x2d2d2d2d);  // keyDirectObject
+    return event;
+}
+
+function load(request) {
+    if (compiled[request.key]) return compiled[request.key];
+    var error = Ref();
+    var script;
+    if (request.path) {
+        script = $.NSAppleScript.alloc.initWithContentsOfURLError($.NSURL.fileURLWithPath(request.path), error);
+    } else {
+        script = $.NSAppleScript.alloc.initWithSource(request.source);
+        if (!script.compileAndReturnError(error)) throw new Error(errorMessage(error));
+    }
+    if (!script || script.isNil()) throw new Error(errorMessage(error));
+    compiled[request.key] = script;
+    return script;
+}
+
+function execute(script, args) {
+    var error = Ref();
+    var result = args ? script.executeAppleEventError(runEvent(args), error)
+                      : script.executeAndReturnError(error);
+    if (!result || result.isNil()) throw new Error(errorMessage(error));
+    return describe(result);
+}
+
+function handle(request) {
+    if (request.op === 'ping') return 'pong';
+    if (request.op === 'run') {
+        return execute($.NSAppleScript.alloc.initWithSource(request.source), null);
+    }
+    if (request.op === 'exec') {
+        return execute(load(request), request.argv || []);
+    }
+    throw new Error('Unknown op: ' + request.op);
+}
+
+function run() {
+    while (true) {
+        var request = readFrame();
+        if (request === null) return;
+        var response = {id: request.id, ok: true};
+        try {
+            response.result = handle(request);
+        } catch (e) {
+            response.ok = false;
+            response.error = String(e.message || e);
+        }
+        writeFrame(response);
+    }
+}
+'''
+
+# Refuse frames larger than this; a corrupt header must not make us allocate
+# an arbitrary amount of memory.
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+
+
+class WorkerError(Exception):
+    """The runner process failed, exited or spoke garbage."""
+
+
+class WorkerTimeout(WorkerError):
+    """The runner did not answer in time (or no runner was free)."""
+
+
+class ScriptError(Exception):
+    """The script itself raised an error inside the runner."""
+
+
+def default_runner_command() -> List[str]:
+    """Command used to start a runner process."""
+    override = os.getenv('OSASCRIPT_RUNNER')
+    if override:
+        return shlex.split(override)
+    return ['osascript', '-l', 'JavaScript', '-e', RUNNER_SOURCE]
+
+
+def _encode_frame(message: Dict[str, Any]) -> bytes:
+    data = json.dumps(message).encode('utf-8')
+    return b'%d\n' % len(data) + data
+
+
+class OsascriptWorker:
+    """A single runner process plus the thread reading its responses."""
+
+    def __init__(self, command: List[str]):
+        try:
+            self.process = subprocess.Popen(
+                command,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                bufsize=0
+            )
+        except OSError as e:
+            raise WorkerError(f"Could not start runner: {e}")
+
+        self.responses: queue.Queue = queue.Queue()
+        self.requests_served = 0
+        self.last_used = time.monotonic()
+        self._next_id = 0
+        self._reader = threading.Thread(target=self._read_loop, daemon=True)
+        self._reader.start()
+
+    def _read_exact(self, length: int) -> Optional[bytes]:
+        stream = self.process.stdout
+        chunks = []
+        remaining = length
+        while remaining > 0:
+            chunk = stream.read(remaining)
+            if not chunk:
+                return None
+            chunks.append(chunk)
+            remaining -= len(chunk)
+        return b''.join(chunks)
+
+    def _read_loop(self):
+        """Read framed responses until the process closes stdout."""
+        stream = self.process.stdout
+        try:
+            while True:
+                header = stream.readline()
+                if not header:
+                    break
+                length = int(header)
+                if length < 0 or length > MAX_FRAME_BYTES:
+                    break
+                payload = self._read_exact(length)
+                if payload is None:
+                    break
+                self.responses.put(json.loads(payload))
+        except (ValueError, OSError):
+            pass
+        # Sentinel: wakes any caller waiting on this worker
+        self.responses.put(None)
+
+    def is_alive(self) -> bool:
+        return self.process.poll() is None
+
+    def request(self, message: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        """Send one request and wait for its response."""
+        self._next_id += 1
+        request_id = self._next_id
+        frame = _encode_frame({**message, 'id': request_id})
+        if len(frame) > MAX_FRAME_BYTES:
+            raise ScriptError("Script too large")
+
+        try:
+            self.process.stdin.write(frame)
+            self.process.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            raise WorkerError(f"Runner pipe closed: {e}")
+
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise WorkerTimeout("Command timed out")
+            try:
+                response = self.responses.get(timeout=remaining)
+            except queue.Empty:
+                raise WorkerTimeout("Command timed out")
+            if response is None:
+                raise WorkerError("Runner exited")
+            if response.get('id') == request_id:
+                self.requests_served += 1
+                self.last_used = time.monotonic()
+                return response
+
+    def close(self):
+        """Stop the runner, killing it if it does not exit promptly."""
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+        try:
+            self.process.wait(timeout=0.5)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            try:
+                self.process.wait(timeout=1)
+            except subprocess.TimeoutExpired:
+                pass
+
+
+class OsascriptPool:
+    """
+    Bounded pool of runner processes.
+
+    Workers are started lazily up to `max_workers`. A worker that times out
+    is assumed hung and is killed; dead workers are replaced on checkout, and
+    workers idle for longer than `health_interval` are pinged before reuse.
+    Workers are recycled after `max_requests` scripts to cap memory growth.
+    """
+
+    def __init__(self, command: Optional[List[str]] = None, max_workers: int = 2,
+                 timeout: float = 5.0, health_interval: float = 30.0,
+                 max_requests: int = 1000):
+        self.command = command or default_runner_command()
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        self.health_interval = health_interval
+        self.max_requests = max_requests
+
+        self._idle: List[OsascriptWorker] = []
+        self._total = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+        # Counters for diagnostics
+        self.started = 0
+        self.restarts = 0
+        self.timeouts = 0
+
+    def _acquire(self, timeout: float) -> OsascriptWorker:
+        """Take an idle worker, start a new one, or wait for one to free up."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise WorkerError("Pool is closed")
+                if self._idle:
+                    return self._idle.pop()
+                if self._total < self.max_workers:
+                    self._total += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._cond.wait(remaining):
+                    raise WorkerTimeout("No runner available")
+
+        try:
+            worker = OsascriptWorker(self.command)
+        except WorkerError:
+            with self._cond:
+                self._total -= 1
+                self._cond.notify()
+            raise
+        self.started += 1
+        return worker
+
+    def _release(self, worker: OsascriptWorker, healthy: bool = True):
+        """Return a worker to the pool, or retire it."""
+        retire = (not healthy or self._closed or
+                  worker.requests_served >= self.max_requests)
+        if retire:
+            worker.close()
+        with self._cond:
+            if retire:
+                self._total -= 1
+            else:
+                self._idle.append(worker)
+            self._cond.notify()
+
+    def _checkout(self, timeout: float) -> OsascriptWorker:
+        """Acquire a worker that is known to be responsive."""
+        while True:
+            worker = self._acquire(timeout)
+            if not worker.is_alive():
+                self.restarts += 1
+                self._release(worker, healthy=False)
+                continue
+            if time.monotonic() - worker.last_used > self.health_interval:
+                try:
+                    worker.request({'op': 'ping'}, timeout=min(1.0, timeout))
+                except WorkerError:
+                    self.restarts += 1
+                    self._release(worker, healthy=False)
+                    continue
+            return worker
+
+    def request(self, message: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Send a raw protocol message to a free worker."""
+        timeout = self.timeout if timeout is None else timeout
+        worker = self._checkout(timeout)
+        try:
+            response = worker.request(message, timeout)
+        except WorkerTimeout:
+            # Restart-on-hang: never hand a stuck runner to the next caller
+            self.timeouts += 1
+            self._release(worker, healthy=False)
+            raise
+        except WorkerError:
+            self.restarts += 1
+            self._release(worker, healthy=False)
+            raise
+        self._release(worker)
+        return response
+
+    def run_script(self, source: str, timeout: Optional[float] = None) -> str:
+        """
+        Run AppleScript source in a pooled runner.
+
+        Returns:
+            str: The script result as text
+
+        Raises:
+            ScriptError: If the script raised an error
+            WorkerError: If no runner could execute it
+        """
+        response = self.request({'op': 'run', 'source': source}, timeout)
+        if not response.get('ok'):
+            raise ScriptError(response.get('error') or 'Unknown error')
+        return response.get('result') or ''
+
+    def run_compiled(self, key: str, argv, path: Optional[str] = None,
+                     source: Optional[str] = None, timeout: Optional[float] = None) -> str:
+        """
+        Run a script's `on run argv` handler with arguments.
+
+        The runner caches the compiled script under `key`, so only the first
+        call per runner pays for loading `path` or compiling `source`.
+        """
+        message = {'op': 'exec', 'key': key, 'argv': [str(arg) for arg in argv]}
+        if path:
+            message['path'] = path
+        else:
+            message['source'] = source
+        response = self.request(message, timeout)
+        if not response.get('ok'):
+            raise ScriptError(response.get('error') or 'Unknown error')
+        return response.get('result') or ''
+
+    def stats(self) -> Dict[str, int]:
+        """Pool counters for diagnostics."""
+        with self._cond:
+            return {
+                'workers': self._total,
+                'idle': len(self._idle),
+                'max_workers': self.max_workers,
+                'started': self.started,
+                'restarts': self.restarts,
+                'timeouts': self.timeouts,
+            }
+
+    def close(self):
+        """Stop all idle workers; busy ones are stopped when released."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._total -= len(idle)
+            self._cond.notify_all()
+        for worker in idle:
+            worker.close()
+
+
+_pool: Optional[OsascriptPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> Optional[OsascriptPool]:
+    """
+    Get the shared pool, creating it on first use.
+
+    Returns None when pooling is disabled with OSASCRIPT_POOL_SIZE=0.
+    """
+    global _pool
+    size = int(os.getenv('OSASCRIPT_POOL_SIZE', 2))
+    if size <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = OsascriptPool(
+                max_workers=size,
+                timeout=float(os.getenv('OSASCRIPT_TIMEOUT', 5)),
+                health_interval=float(os.getenv('OSASCRIPT_HEALTH_INTERVAL', 30)),
+                max_requests=int(os.getenv('OSASCRIPT_MAX_REQUESTS', 1000))
+            )
+        return _pool
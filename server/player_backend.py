@@ -0,0 +1,246 @@
+"""
+Player backends: the interface the server and monitor talk to.
+
+The AppleScript backend drives the real Music.app. The simulated backend
+(see simulated_player.py) lets the whole server run and be load-tested
+away from a Mac. Select with MUSIC_BACKEND=applescript|simulated.
+"""
+
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+
+from player_state import PlayerSnapshot
+
+
+class TrackNotFound(LookupError):
+    """The library has no track with the requested ID."""
+
+
+class PlayerBackend(ABC):
+    """Operations the server needs from a music player."""
+
+    name = 'base'
+
+    def is_running(self) -> bool:
+        """Whether the player process is up, checked without launching it."""
+        return True
+
+    # Playback control
+
+    @abstractmethod
+    def play(self) -> str:
+        raise NotImplementedError
+
+    @abstractmethod
+    def pause(self) -> str:
+        raise NotImplementedError
+
+    @abstractmethod
+    def next_track(self) -> str:
+        """Skip ahead; returns the persistent ID now current ("" if none)."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def previous_track(self) -> str:
+        """Skip back or restart; returns the persistent ID now current ("" if none)."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def set_volume(self, level: int) -> str:
+        raise NotImplementedError
+
+    @abstractmethod
+    def seek_to_position(self, position: float) -> str:
+        raise NotImplementedError
+
+    @abstractmethod
+    def set_repeat_mode(self, mode: str) -> str:
+        raise NotImplementedError
+
+    @abstractmethod
+    def set_shuffle_mode(self, enabled: bool) -> str:
+        raise NotImplementedError
+
+    # State
+
+    @abstractmethod
+    def get_player_snapshot(self) -> PlayerSnapshot:
+        raise NotImplementedError
+
+    def get_current_track(self) -> Dict[str, Any]:
+        return self.get_player_snapshot().to_track_dict()
+
+    def get_playback_state(self) -> str:
+        return self.get_player_snapshot().state
+
+    def get_volume(self) -> Optional[int]:
+        return self.get_player_snapshot().volume
+
+    def get_repeat_mode(self) -> str:
+        return self.get_player_snapshot().repeat
+
+    def get_shuffle_mode(self) -> bool:
+        return self.get_player_snapshot().shuffle
+
+    # Library
+
+    @abstractmethod
+    def get_playlists(self) -> List[str]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def play_playlist(self, playlist_name: str) -> str:
+        raise NotImplementedError
+
+    @abstractmethod
+    def export_playlists(self) -> Optional[List[Dict[str, Any]]]:
+        """Every playlist's persistent_id, name, kind, track_count and duration (None on failure)."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_playlist_track_ids(self, persistent_id: str) -> Optional[List[int]]:
+        """Database IDs of a playlist's tracks in order (None if there is no such playlist)."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def search_library(self, query: str, search_type: str = 'track',
+                       limit: int = 50) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def play_track_by_id(self, track_id: str) -> str:
+        """Play a track by database ID (raises TrackNotFound if there is none)."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def play_track_by_persistent_id(self, persistent_id: str) -> str:
+        """Play a track by persistent ID (raises TrackNotFound if there is none)."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_artwork(self) -> Optional[Tuple[str, Optional[bytes]]]:
+        """
+        Current track's database ID and artwork bytes.
+
+        The bytes are None when the track has no artwork; the whole result
+        is None when nothing is playing or the artwork could not be read.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def export_library(self) -> Optional[List[Dict[str, Any]]]:
+        """Metadata for every track, keyed by library_index.TRACK_FIELDS (None on failure)."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def export_fingerprints(self) -> Optional[Dict[str, str]]:
+        """Persistent ID -> modification stamp for every track (None on failure)."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def fetch_tracks(self, persistent_ids: List[str]) -> List[Dict[str, Any]]:
+        """Full metadata for specific tracks."""
+        raise NotImplementedError
+
+
+class AppleScriptBackend(PlayerBackend):
+    """Drives Music.app on macOS through applescript_commands."""
+
+    name = 'applescript'
+
+    def __init__(self):
+        import applescript_commands
+        self.asc = applescript_commands
+
+    def is_running(self):
+        return self.asc.is_music_running()
+
+    def play(self):
+        return self.asc.play()
+
+    def pause(self):
+        return self.asc.pause()
+
+    def next_track(self):
+        return self.asc.next_track()
+
+    def previous_track(self):
+        return self.asc.previous_track()
+
+    def set_volume(self, level):
+        return self.asc.set_volume(level)
+
+    def seek_to_position(self, position):
+        return self.asc.seek_to_position(position)
+
+    def set_repeat_mode(self, mode):
+        return self.asc.set_repeat_mode(mode)
+
+    def set_shuffle_mode(self, enabled):
+        return self.asc.set_shuffle_mode(enabled)
+
+    def get_player_snapshot(self):
+        return self.asc.get_player_snapshot()
+
+    def get_playlists(self):
+        return self.asc.get_playlists()
+
+    def play_playlist(self, playlist_name):
+        return self.asc.play_playlist(playlist_name)
+
+    def export_playlists(self):
+        return self.asc.export_playlists()
+
+    def get_playlist_track_ids(self, persistent_id):
+        return self.asc.get_playlist_track_ids(persistent_id)
+
+    def search_library(self, query, search_type='track', limit=50):
+        return self.asc.search_library(query, search_type, limit)
+
+    def play_track_by_id(self, track_id):
+        return self.asc.play_track_by_id(track_id)
+
+    def play_track_by_persistent_id(self, persistent_id):
+        return self.asc.play_track_by_persistent_id(persistent_id)
+
+    def get_artwork(self):
+        return self.asc.get_artwork()
+
+    def export_library(self):
+        return self.asc.export_library()
+
+    def export_fingerprints(self):
+        return self.asc.export_fingerprints()
+
+    def fetch_tracks(self, persistent_ids):
+        return self.asc.fetch_tracks(persistent_ids)
+
+
+_backend: Optional[PlayerBackend] = None
+_backend_lock = threading.Lock()
+
+
+def create_backend(kind: Optional[str] = None) -> PlayerBackend:
+    """Create a backend by name ('applescript' or 'simulated')."""
+    kind = (kind or os.getenv('MUSIC_BACKEND', 'applescript')).lower()
+    if kind == 'simulated':
+        from simulated_player import SimulatedBackend
+        return SimulatedBackend(
+            library_size=int(os.getenv('SIM_LIBRARY_SIZE', 1000)),
+            latency=float(os.getenv('SIM_LATENCY_MS', 0)) / 1000,
+            seed=int(os.getenv('SIM_SEED', 1))
+        )
+    if kind == 'applescript':
+        return AppleScriptBackend()
+    raise ValueError(f"Unknown music backend: {kind}")
+
+
+def get_backend() -> PlayerBackend:
+    """Get the shared backend, creating it on first use."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = create_backend()
+        return _backend
@@ -0,0 +1,57 @@
+"""
+Typed snapshot of the Music player, fetched in a single script round-trip.
+"""
+
+from dataclasses import dataclass, asdict, replace
+from typing import Any, Dict, Optional
+
+
+@dataclass(frozen=True)
+class PlayerSnapshot:
+    """Everything the server needs to know about the player at one instant."""
+
+    state: str = 'stopped'
+    volume: Optional[int] = None  # None when Music did not report it
+    shuffle: bool = False
+    repeat: str = 'off'
+    database_id: Optional[str] = None
+    persistent_id: Optional[str] = None
+    name: Optional[str] = None
+    artist: Optional[str] = None
+    album: Optional[str] = None
+    duration: float = 0
+    position: float = 0
+    # False when the snapshot found Music not running (no Apple Event sent)
+    running: bool = True
+
+    @property
+    def track_key(self) -> Optional[str]:
+        """Identity of the current track, stable across renames."""
+        return self.persistent_id or self.database_id
+
+    @property
+    def has_track(self) -> bool:
+        return self.track_key is not None
+
+    def same_state(self, other: Optional['PlayerSnapshot']) -> bool:
+        """Equal in everything except the playback position."""
+        return other is not None and replace(self, position=0) == replace(other, position=0)
+
+    def with_position(self, position: float) -> 'PlayerSnapshot':
+        return replace(self, position=position)
+
+    def to_track_dict(self) -> Dict[str, Any]:
+        """Current track in the shape returned by /current-track."""
+        return {
+            'id': self.database_id,
+            'persistent_id': self.persistent_id,
+            'name': self.name,
+            'artist': self.artist,
+            'album': self.album,
+            'duration': self.duration,
+            'position': self.position,
+            'state': self.state,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
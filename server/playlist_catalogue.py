@@ -0,0 +1,240 @@
+"""
+Cached playlist catalogue, keyed by persistent ID.
+
+Every playlist's name, kind, track count and total duration come from one
+bulk export script. Reads never wait on Music once something is cached:
+a catalogue older than `max_age` is still served while a single background
+refresh fetches a new one (stale-while-revalidate). Each catalogue carries
+an ETag derived from its content, so clients can revalidate with
+If-None-Match and get a 304 when nothing changed.
+
+The last catalogue is also saved to disk, so it is available immediately
+after a restart, even before Music is running.
+
+Playlist membership (database IDs in playlist order) is fetched on demand
+in one script per playlist and kept for the most recently opened
+playlists, so paging through one does not re-run the script. Concurrent
+opens of the same playlist share one fetch.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from player_backend import PlayerBackend
+
+
+class PlaylistUnavailable(Exception):
+    """Membership cannot be fetched now (Music is not running) and none is cached."""
+
+
+class Catalogue(NamedTuple):
+    playlists: List[Dict[str, Any]]   # In Music's playlist order
+    etag: str
+    fetched_at: float                 # time.time() of the export
+
+    @property
+    def age(self) -> float:
+        return max(0.0, time.time() - self.fetched_at)
+
+    def find(self, persistent_id: str) -> Optional[Dict[str, Any]]:
+        for playlist in self.playlists:
+            if playlist['persistent_id'] == persistent_id:
+                return playlist
+        return None
+
+
+def catalogue_etag(playlists: List[Dict[str, Any]]) -> str:
+    """Content hash of a playlist list (order and every field count)."""
+    canonical = json.dumps(playlists, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()[:20]
+
+
+class PlaylistCatalogue:
+    """Stale-while-revalidate cache of the backend's playlist export."""
+
+    def __init__(self, backend: PlayerBackend, max_age: float = 60.0,
+                 path: Optional[str] = None, members_cache_size: int = 16):
+        """
+        Args:
+            backend: Player to export playlists from
+            max_age: Seconds a catalogue (or a playlist's membership) is
+                     served before it is fetched again
+            path: JSON file the last catalogue is kept in across restarts
+            members_cache_size: Playlists whose membership is kept
+        """
+        self.backend = backend
+        self.max_age = max_age
+        self.path = path
+        self._catalogue: Optional[Catalogue] = None
+        self._stale = False
+        self._lock = threading.Lock()
+        self._refreshing: Optional[Future] = None
+        self.refreshes = 0
+        self.failures = 0
+        self.members_cache_size = members_cache_size
+        self._members: 'OrderedDict[str, Tuple[array, float]]' = OrderedDict()
+        self._fetching: Dict[str, Future] = {}
+        self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            playlists = data['playlists']
+            self._catalogue = Catalogue(playlists, catalogue_etag(playlists), float(data['fetched_at']))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Ignoring playlist cache {self.path}: {e}")
+
+    def _save(self, catalogue: Catalogue):
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'fetched_at': catalogue.fetched_at, 'playlists': catalogue.playlists},
+                          f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Could not save playlist cache: {e}")
+
+    def get(self) -> Optional[Catalogue]:
+        """
+        The cached catalogue, refreshing it in the background if stale.
+
+        Only a call with nothing cached (not even on disk) waits, for the
+        export it starts or the one already running.
+
+        Returns:
+            Catalogue: The catalogue, or None if none could be exported
+        """
+        catalogue = self._catalogue
+        if catalogue is None:
+            self.refresh()
+            return self._catalogue
+        if self._stale or catalogue.age > self.max_age:
+            self.refresh_async()
+        return catalogue
+
+    def cached(self) -> Optional[Catalogue]:
+        """The catalogue as it is, never fetching or refreshing it."""
+        return self._catalogue
+
+    def invalidate(self):
+        """Mark the catalogue stale; the next read refreshes it in the background."""
+        self._stale = True
+        with self._lock:
+            self._members.clear()
+
+    def members(self, persistent_id: str) -> Optional[array]:
+        """
+        Database IDs of a playlist's tracks, in playlist order.
+
+        Returns:
+            array: uint32 database IDs, or None if there is no such playlist
+
+        Raises:
+            PlaylistUnavailable: Music is not running and nothing is cached
+        """
+        now = time.monotonic()
+        with self._lock:
+            cached = self._members.get(persistent_id)
+            if cached is not None and now - cached[1] <= self.max_age:
+                self._members.move_to_end(persistent_id)
+                return cached[0]
+        if not self.backend.is_running():
+            if cached is None:
+                raise PlaylistUnavailable(persistent_id)
+            return cached[0]
+
+        with self._lock:
+            pending = self._fetching.get(persistent_id)
+            if pending is None:
+                future: Future = Future()
+                self._fetching[persistent_id] = future
+        if pending is not None:
+            return pending.result()
+
+        try:
+            ids = self.backend.get_playlist_track_ids(persistent_id)
+            members = array('I', ids) if ids is not None else None
+            if members is not None:
+                with self._lock:
+                    self._members[persistent_id] = (members, now)
+                    self._members.move_to_end(persistent_id)
+                    while len(self._members) > self.members_cache_size:
+                        self._members.popitem(last=False)
+            future.set_result(members)
+            return members
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._fetching.pop(persistent_id, None)
+
+    def _start_refresh(self) -> Tuple[Future, bool]:
+        """The running refresh, or a new one; and whether this call started it."""
+        with self._lock:
+            if self._refreshing is not None:
+                return self._refreshing, False
+            self._refreshing = Future()
+            return self._refreshing, True
+
+    def refresh_async(self):
+        """Start a background refresh unless one is already running."""
+        future, started = self._start_refresh()
+        if started:
+            threading.Thread(target=self._refresh, args=(future,), daemon=True).start()
+
+    def refresh(self):
+        """Export the catalogue now, or wait for the refresh already running."""
+        future, started = self._start_refresh()
+        if started:
+            self._refresh(future)
+        else:
+            future.result()
+
+    def _refresh(self, future: Future):
+        try:
+            # Never launch Music just to list playlists; keep serving the cache
+            if not self.backend.is_running():
+                return
+            playlists = self.backend.export_playlists()
+            if playlists is None:
+                self.failures += 1
+                return
+            catalogue = Catalogue(playlists, catalogue_etag(playlists), time.time())
+            previous = self._catalogue
+            self._catalogue = catalogue
+            self._stale = False
+            self.refreshes += 1
+            if previous is None or previous.etag != catalogue.etag:
+                self._save(catalogue)
+        except Exception as e:
+            self.failures += 1
+            print(f"Playlist catalogue error: {e}")
+        finally:
+            with self._lock:
+                self._refreshing = None
+            future.set_result(None)
+
+    def stats(self) -> Dict[str, Any]:
+        catalogue = self._catalogue
+        return {
+            'playlists': len(catalogue.playlists) if catalogue else 0,
+            'age': round(catalogue.age, 1) if catalogue else None,
+            'etag': catalogue.etag if catalogue else None,
+            'refreshing': self._refreshing is not None,
+            'refreshes': self.refreshes,
+            'failures': self.failures,
+            'cached_memberships': len(self._members),
+        }
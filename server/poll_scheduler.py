@@ -0,0 +1,184 @@
+"""
+Adaptive polling schedule for MusicMonitor.
+
+Polls run on fixed deadlines (the next deadline is the previous one plus the
+interval, so the time spent polling does not stretch the period) and the
+interval is chosen from context:
+
+    burst      while a request is waiting for a command to take effect
+    fast       shortly after a user command, or near the end of a track
+    normal     while playing
+    slow       while paused or stopped
+    offline    while Music is not running, at the liveness probe's backoff
+    suspended  when nobody is subscribed and no HTTP reader was seen recently
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from state_store import StateEntry
+
+
+class PollScheduler:
+    """Decides when the monitor polls next and keeps rate/lag metrics."""
+
+    def __init__(self, fast: float = 0.25, normal: float = 1.0, slow: float = 5.0,
+                 boost_duration: float = 3.0, end_window: float = 3.0,
+                 reader_window: float = 10.0, burst: float = 0.05,
+                 clock: Callable[[], float] = time.monotonic):
+        self.burst = burst
+        self.fast = fast
+        self.normal = normal
+        self.slow = slow
+        self.boost_duration = boost_duration
+        self.end_window = end_window
+        self.reader_window = reader_window
+        self._clock = clock
+
+        self._subscribers = 0
+        self._last_reader = float('-inf')
+        self._boost_until = 0.0
+        self._bursts = 0
+        self._deadline: Optional[float] = None
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.mode = 'normal'
+        self.interval: Optional[float] = normal
+        self.ticks = 0
+        self._last_tick: Optional[float] = None
+        self._period_avg: Optional[float] = None
+        self._lag_avg = 0.0
+        self._lag_max = 0.0
+
+    # Context signals
+
+    def add_subscriber(self):
+        with self._lock:
+            self._subscribers += 1
+        self._wake.set()
+
+    def remove_subscriber(self):
+        with self._lock:
+            self._subscribers = max(0, self._subscribers - 1)
+
+    @property
+    def subscribers(self) -> int:
+        return self._subscribers
+
+    def note_reader(self):
+        """An HTTP client read the state; keep polling for a while."""
+        was_suspended = self.mode == 'suspended'
+        self._last_reader = self._clock()
+        if was_suspended:
+            self._wake.set()
+
+    def boost(self, duration: Optional[float] = None):
+        """Poll fast for a while (after a user command) and poll right away."""
+        duration = self.boost_duration if duration is None else duration
+        with self._lock:
+            self._boost_until = max(self._boost_until, self._clock() + duration)
+        self._wake.set()
+
+    def begin_burst(self):
+        """Poll as fast as possible until end_burst() (nestable)."""
+        with self._lock:
+            self._bursts += 1
+        self._wake.set()
+
+    def end_burst(self):
+        with self._lock:
+            self._bursts = max(0, self._bursts - 1)
+
+    def wake(self):
+        """Cut the current wait short."""
+        self._wake.set()
+
+    # Scheduling
+
+    def choose_interval(self, entry: Optional[StateEntry],
+                        offline_delay: Optional[float] = None) -> Optional[float]:
+        """Interval for the next poll, or None to suspend polling."""
+        now = self._clock()
+        if self._bursts:
+            self.mode = 'burst'
+            return self.burst
+        if self._subscribers == 0 and now - self._last_reader > self.reader_window:
+            self.mode = 'suspended'
+            return None
+        if offline_delay is not None:
+            self.mode = 'offline'
+            return offline_delay
+        if now < self._boost_until:
+            self.mode = 'boost'
+            return self.fast
+        if entry is not None and entry.snapshot.state == 'playing':
+            duration = entry.snapshot.duration
+            if duration and duration - entry.position < self.end_window:
+                self.mode = 'track_end'
+                return self.fast
+            self.mode = 'playing'
+            return self.normal
+        self.mode = 'idle'
+        return self.slow
+
+    def wait(self, entry: Optional[StateEntry], offline_delay: Optional[float] = None):
+        """
+        Block until the next poll is due (or the wait is cut short).
+
+        Args:
+            entry: Latest published state
+            offline_delay: Retry delay if the player is not running
+        """
+        interval = self.choose_interval(entry, offline_delay)
+        self.interval = interval
+        if interval is None:
+            self._wake.wait()
+            self._wake.clear()
+            self._deadline = None
+            self._record_tick()
+            return
+
+        now = self._clock()
+        if self._deadline is None:
+            deadline = now + interval
+        else:
+            deadline = self._deadline + interval
+            if deadline < now:
+                # Overran: start from now instead of bursting to catch up
+                self._record_lag(now - deadline)
+                deadline = now
+        self._deadline = deadline
+
+        if self._wake.wait(max(0.0, deadline - now)):
+            self._wake.clear()
+            self._deadline = self._clock()
+        else:
+            self._record_lag(self._clock() - deadline)
+        self._record_tick()
+
+    def _record_lag(self, lag: float):
+        self._lag_avg = 0.9 * self._lag_avg + 0.1 * lag
+        self._lag_max = max(self._lag_max, lag)
+
+    def _record_tick(self):
+        now = self._clock()
+        if self._last_tick is not None:
+            period = now - self._last_tick
+            self._period_avg = period if self._period_avg is None else 0.9 * self._period_avg + 0.1 * period
+        self._last_tick = now
+        self.ticks += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        """Effective polling rate and scheduling lag."""
+        return {
+            'mode': self.mode,
+            'interval': self.interval,
+            'effective_hz': round(1 / self._period_avg, 3) if self._period_avg else 0,
+            'lag_avg_ms': round(self._lag_avg * 1000, 2),
+            'lag_max_ms': round(self._lag_max * 1000, 2),
+            'ticks': self.ticks,
+            'subscribers': self._subscribers,
+        }
@@ -0,0 +1,68 @@
+"""
+Server-side playback position model.
+
+Music's position only needs sampling to anchor the model: between samples
+the position is projected from the last sample, the player state and a
+monotonic timestamp. A sample that disagrees with the projection by more
+than a tolerance is treated as a seek (or clock drift) and reported.
+"""
+
+import time
+from typing import Optional
+
+from player_state import PlayerSnapshot
+
+
+def project_position(snapshot: PlayerSnapshot, sampled_at: float,
+                     now: Optional[float] = None) -> float:
+    """
+    Project the playback position of a snapshot to `now`.
+
+    Args:
+        snapshot: Sampled player state
+        sampled_at: time.monotonic() when the snapshot was taken
+        now: Time to project to (defaults to time.monotonic())
+
+    Returns:
+        float: Projected position in seconds, clamped to the track duration
+    """
+    if snapshot.state != 'playing':
+        return snapshot.position
+    now = time.monotonic() if now is None else now
+    position = snapshot.position + max(0.0, now - sampled_at)
+    if snapshot.duration:
+        position = min(position, snapshot.duration)
+    return position
+
+
+class PositionModel:
+    """Tracks the last position sample and flags seeks and drift."""
+
+    def __init__(self, tolerance: float = 1.0):
+        self.tolerance = tolerance
+        self._anchor: Optional[PlayerSnapshot] = None
+        self._sampled_at = 0.0
+
+    def project(self, now: Optional[float] = None) -> float:
+        """Projected position now, or 0 before the first sample."""
+        if self._anchor is None:
+            return 0.0
+        return project_position(self._anchor, self._sampled_at, now)
+
+    def observe(self, snapshot: PlayerSnapshot, sampled_at: Optional[float] = None) -> bool:
+        """
+        Re-anchor the model on a new sample.
+
+        Returns:
+            bool: True if the sample is on the same track but its position
+                  differs from the prediction by more than the tolerance
+        """
+        sampled_at = time.monotonic() if sampled_at is None else sampled_at
+        jumped = False
+        if (self._anchor is not None and snapshot.has_track and
+                snapshot.track_key == self._anchor.track_key):
+            predicted = project_position(self._anchor, self._sampled_at, sampled_at)
+            jumped = abs(snapshot.position - predicted) > self.tolerance
+        self._anchor = snapshot
+        self._sampled_at = sampled_at
+        return jumped
@@ -0,0 +1,99 @@
+"""
+Registry of parameterised AppleScript templates, compiled once to disk.
+
+Templates take their values through `on run argv` instead of string
+interpolation, so each one is compiled a single time (`osacompile` to a
+.scpt keyed by a hash of its source) and the compiled file survives
+restarts.
+"""
+
+import hashlib
+import os
+import subprocess
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+
+class ScriptTemplate:
+    """A named AppleScript whose `on run argv` handler takes the arguments."""
+
+    def __init__(self, name: str, source: str):
+        self.name = name
+        self.source = source
+        self.digest = hashlib.sha256(source.encode('utf-8')).hexdigest()[:16]
+
+    @property
+    def key(self) -> str:
+        """Identifier that changes whenever the source changes."""
+        return f"{self.name}-{self.digest}"
+
+
+class ScriptCache:
+    """Compiles registered templates into a content-hashed on-disk cache."""
+
+    def __init__(self, cache_dir):
+        self.cache_dir = Path(cache_dir)
+        self.templates: Dict[str, ScriptTemplate] = {}
+        self._compiled: Dict[str, Optional[str]] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, source: str) -> ScriptTemplate:
+        """Add a template to the registry."""
+        template = ScriptTemplate(name, source)
+        self.templates[name] = template
+        return template
+
+    def get(self, name: str) -> ScriptTemplate:
+        return self.templates[name]
+
+    def compiled_path(self, name: str) -> Optional[str]:
+        """
+        Get the path of the compiled script, compiling it if needed.
+
+        Returns:
+            str: Path to the .scpt file, or None if it could not be compiled
+                 (e.g. osacompile is unavailable); callers then run the source.
+        """
+        template = self.templates[name]
+        with self._lock:
+            if template.key in self._compiled:
+                return self._compiled[template.key]
+            path = self.cache_dir / f"{template.key}.scpt"
+            if not path.exists():
+                path = self._compile(template, path)
+            self._compiled[template.key] = str(path) if path else None
+            return self._compiled[template.key]
+
+    def _compile(self, template: ScriptTemplate, path: Path) -> Optional[Path]:
+        """Compile a template with osacompile, replacing stale versions."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        fd, source_path = tempfile.mkstemp(suffix='.applescript', dir=self.cache_dir)
+        tmp_output = path.with_suffix('.scpt.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(template.source)
+            result = subprocess.run(
+                ['osacompile', '-o', str(tmp_output), source_path],
+                capture_output=True,
+                timeout=10
+            )
+            if result.returncode != 0:
+                return None
+            os.replace(tmp_output, path)
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+        finally:
+            os.unlink(source_path)
+            if tmp_output.exists():
+                tmp_output.unlink()
+
+        # Drop compiled copies of older versions of this template
+        for stale in self.cache_dir.glob(f"{template.name}-*.scpt"):
+            if stale != path:
+                try:
+                    stale.unlink()
+                except OSError:
+                    pass
+        return path
@@ -3,14 +3,30 @@ Flask server for controlling Apple Music remotely.
 Provides REST API endpoints and mDNS service advertisement.
 """
 
-from flask import Flask, jsonify, request, send_file
+from flask import Flask, Response, jsonify, request, stream_with_context
 from flask_socketio import SocketIO, emit, disconnect
 from functools import wraps
+import json
+import math
 import socket
 from zeroconf import ServiceInfo, Zeroconf
-import applescript_commands as asc
+from artwork_prefetch import ArtworkPrefetcher
+from artwork_store import ArtworkStore
+from artwork_variants import FORMATS, SIZES, ArtworkVariants, sniff_mime
 from config import Config
+from library_browse import (ALBUM_SORTS, ARTIST_SORTS, MAX_PAGE_SIZE, CursorError, LibraryBrowser,
+                            decode_cursor, encode_cursor)
+from library_index import LibraryIndex, parse_database_id, parse_persistent_id
+from library_sync import LibrarySync
 from music_monitor import MusicMonitor
+from player_backend import TrackNotFound, get_backend
+from playlist_catalogue import PlaylistCatalogue, PlaylistUnavailable
+from poll_scheduler import PollScheduler
+from state_store import StateStore
+from fuzzy_index import FuzzyIndex
+from suggest_index import Generations, SuggestIndex
+from track_store import TrackStoreIndex
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 import time # Added for socketio ping timestamp
 
 # Initialize Flask app and SocketIO
@@ -21,6 +37,75 @@ socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
 # Load configuration
 config = Config()
 
+# Music player backend (Music.app via AppleScript, or the simulator)
+backend = get_backend()
+
+# Local full-text library index; /search uses it once it has been built
+library_index = LibraryIndex(config.library_db)
+
+# Typo-tolerant trigram search, used when an exact search finds nothing
+fuzzy_index = FuzzyIndex(library_index)
+
+# Typeahead: in-memory prefix index, per-client generations to drop
+# superseded keystrokes, and one worker for live searches so they queue
+# instead of piling up
+suggest_index = SuggestIndex(library_index)
+suggest_generations = Generations()
+live_search_executor = ThreadPoolExecutor(max_workers=1)
+
+# Columnar snapshot of the whole library for lookups, browsing and
+# aggregates; mapped from disk when it matches the index version
+track_store = TrackStoreIndex(library_index, config.track_store)
+
+# Artists and albums with precomputed aggregates, for /library browsing
+library_browser = LibraryBrowser(track_store)
+
+# Playlists with kinds, counts and durations, refreshed in the background
+playlist_catalogue = PlaylistCatalogue(
+    backend,
+    max_age=config.playlist_cache_ttl,
+    path=config.playlist_cache
+)
+
+# Current-track artwork, deduplicated by content within a disk budget
+artwork_store = ArtworkStore(
+    config.artwork_dir,
+    max_bytes=config.artwork_cache_bytes,
+    hot_bytes=config.artwork_hot_bytes
+)
+
+# Resized WebP/JPEG covers for /artwork?size=&format=, rendered once per hash
+artwork_variants = ArtworkVariants(artwork_store)
+
+# Extracts each new track's cover as soon as the monitor sees it
+artwork_prefetcher = ArtworkPrefetcher(backend, artwork_store, artwork_variants)
+
+# Longest wait (seconds) for a missing artwork variant before the
+# original is served instead
+VARIANT_WAIT = 2.0
+
+# Sends monitor events to WebSocket clients, in order, off the monitor thread
+broadcast_executor = ThreadPoolExecutor(max_workers=1)
+
+# Seconds a client is asked to wait before retrying /playlists when no
+# catalogue could be exported yet
+PLAYLISTS_RETRY_AFTER = 10
+
+# Tracks per write when streaming a playlist's contents as NDJSON
+PLAYLIST_STREAM_CHUNK = 200
+
+
+def refresh_derived_indexes():
+    """Start rebuilding in-memory indexes that lag the library index."""
+    for derived in (track_store, suggest_index, fuzzy_index):
+        derived.refresh()
+
+
+def library_changed(result):
+    """Library sync changed the index: update everything cached from the library."""
+    refresh_derived_indexes()
+    playlist_catalogue.invalidate()
+
 
 def require_auth(f):
     """Decorator to require authentication token for endpoints."""
@@ -44,6 +129,18 @@ def require_auth(f):
     return decorated_function
 
 
+def revalidated(response, etag, weak=False, cache_control='private, no-cache'):
+    """
+    Tag a response and turn it into a 304 if the client's copy matches.
+    
+    Weak tags are for state responses, whose projected position and age
+    change between polls while the state version stays the same.
+    """
+    response.set_etag(etag, weak=weak)
+    response.headers['Cache-Control'] = cache_control
+    return response.make_conditional(request)
+
+
 # Public endpoint - no auth required
 @app.route('/ping', methods=['GET'])
 def ping():
@@ -55,28 +152,58 @@ def ping():
 @app.route('/status', methods=['GET'])
 @require_auth
 def get_status():
-    """Get current playback status."""
-    state = asc.get_playback_state()
-    volume = asc.get_volume()
-    return jsonify({
-        'state': state,
-        'volume': volume
+    """Get current playback status from the monitor's cached state."""
+    entry = music_monitor.get_state(config.state_max_age)
+    snapshot = entry.snapshot
+    response = jsonify({
+        'state': snapshot.state,
+        'volume': snapshot.volume,
+        'shuffle': snapshot.shuffle,
+        'repeat': snapshot.repeat,
+        'state_version': entry.version,
+        'age_ms': int(entry.age * 1000)
     })
+    return revalidated(response, f"s{entry.version}", weak=True)
 
 
 @app.route('/current-track', methods=['GET'])
 @require_auth
 def get_current_track():
-    """Get current track information."""
-    track_info = asc.get_current_track()
-    return jsonify(track_info)
+    """Get current track information from the monitor's cached state."""
+    entry = music_monitor.get_state(config.state_max_age)
+    track_info = entry.current().to_track_dict()
+    track_info['state_version'] = entry.version
+    track_info['age_ms'] = int(entry.age * 1000)
+    # Hash of the cover if it is already stored, for /artwork/<hash>
+    artwork_hash = artwork_store.hash_for(track_info['id']) if track_info['id'] else None
+    track_info['artwork_hash'] = artwork_hash
+    return revalidated(jsonify(track_info), f"t{entry.version}-{artwork_hash or ''}", weak=True)
+
+
+@app.route('/metrics', methods=['GET'])
+@require_auth
+def get_metrics():
+    """Get background monitor polling metrics."""
+    return jsonify({
+        'monitor': music_monitor.metrics(),
+        'library_sync': library_sync.last_result,
+        'suggest': suggest_index.stats(),
+        'fuzzy': fuzzy_index.stats(),
+        'track_store': track_store.stats(),
+        'browse': library_browser.stats(),
+        'playlists': playlist_catalogue.stats(),
+        'artwork': artwork_store.stats(),
+        'artwork_variants': artwork_variants.stats(),
+        'artwork_prefetch': artwork_prefetcher.stats()
+    })
 
 
 @app.route('/play', methods=['POST'])
 @require_auth
 def play():
     """Start or resume playback."""
-    result = asc.play()
+    result = backend.play()
+    music_monitor.notify_command()
     return jsonify({
         'action': 'play',
         'success': True,
@@ -88,7 +215,8 @@ def play():
 @require_auth
 def pause():
     """Pause playback."""
-    result = asc.pause()
+    result = backend.pause()
+    music_monitor.notify_command()
     return jsonify({
         'action': 'pause',
         'success': True,
@@ -96,15 +224,39 @@ def pause():
     })
 
 
+def skip_track(command):
+    """
+    Send a skip command and wait for the monitor to publish its effect.
+    
+    The track before the command is read live, not from the cache, so a
+    change Music made on its own is not mistaken for the command's. The
+    command reports the track that is current afterwards. When that is the
+    same track (player stopped, end of the queue, or "previous" restarting
+    the track), the command has already taken effect and the state is read
+    back at once instead of waiting for a track change.
+    
+    Returns:
+        StateEntry: The state after the command
+    """
+    previous_key = music_monitor.get_state(0).snapshot.track_key
+    result = command()
+    music_monitor.notify_command()
+    if result.startswith("Error"):
+        raise RuntimeError(result)
+    if not previous_key or result in ('', previous_key):
+        return music_monitor.get_state(0)
+    return music_monitor.wait_for_track_change(previous_key, config.track_change_timeout)
+
+
 @app.route('/next', methods=['POST'])
 @require_auth
 def next_track():
     """Skip to next track."""
-    result = asc.next_track()
-    # Small delay to let the track change
-    import time
-    time.sleep(0.5)
-    track_info = asc.get_current_track()
+    try:
+        entry = skip_track(backend.next_track)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    track_info = entry.current().to_track_dict()
     return jsonify({
         'action': 'next',
         'success': True,
@@ -115,12 +267,12 @@ def next_track():
 @app.route('/previous', methods=['POST'])
 @require_auth
 def previous_track():
-    """Go to previous track."""
-    result = asc.previous_track()
-    # Small delay to let the track change
-    import time
-    time.sleep(0.5)
-    track_info = asc.get_current_track()
+    """Go to previous track (or back to the start of this one)."""
+    try:
+        entry = skip_track(backend.previous_track)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    track_info = entry.current().to_track_dict()
     return jsonify({
         'action': 'previous',
         'success': True,
@@ -139,7 +291,8 @@ def set_volume():
     
     try:
         level = int(data['level'])
-        result = asc.set_volume(level)
+        result = backend.set_volume(level)
+        music_monitor.notify_command()
         return jsonify({
             'action': 'set_volume',
             'success': True,
@@ -152,19 +305,106 @@ def set_volume():
 @app.route('/playlists', methods=['GET'])
 @require_auth
 def get_playlists():
-    """Get list of available playlists."""
-    playlists = asc.get_playlists()
-    return jsonify({
-        'playlists': playlists,
-        'count': len(playlists)
+    """
+    Get the playlist catalogue.
+    
+    `playlists` lists names (as older clients expect); `items` has each
+    playlist's persistent_id, name, kind, track_count and duration. Served
+    from cache with an ETag, so If-None-Match gets a 304 when nothing
+    changed.
+    """
+    catalogue = playlist_catalogue.get()
+    if catalogue is None:
+        # Nothing exported yet, e.g. Music has never been running; asking
+        # Music directly would launch it
+        response = jsonify({'error': 'Playlists are not available yet'})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(PLAYLISTS_RETRY_AFTER)
+        return response
+    response = jsonify({
+        'playlists': [playlist['name'] for playlist in catalogue.playlists],
+        'items': catalogue.playlists,
+        'count': len(catalogue.playlists)
     })
+    return revalidated(response, catalogue.etag)
+
+
+@app.route('/playlists/<playlist_id>/tracks', methods=['GET'])
+@require_auth
+def playlist_tracks(playlist_id):
+    """
+    List a playlist's tracks, by playlist persistent ID.
+    
+    format=ndjson (default) streams one JSON object per line: the playlist
+    first, then every track in playlist order. format=json returns a page
+    of `limit` tracks with a `next_cursor` for the following page.
+    Membership comes from one script; track metadata from the track store.
+    """
+    persistent_id = parse_persistent_id(playlist_id)
+    if persistent_id is None:
+        return jsonify({'error': 'Invalid playlist ID'}), 400
+    output = request.args.get('format', 'ndjson')
+    if output not in ['ndjson', 'json']:
+        return jsonify({'error': 'Invalid format'}), 400
+    args, error = browse_page_args()
+    if error:
+        return error
+    _, cursor, limit = args
+    
+    try:
+        members = playlist_catalogue.members(persistent_id)
+    except PlaylistUnavailable:
+        return jsonify({'error': 'Music is not running'}), 503
+    if members is None:
+        return jsonify({'error': 'Playlist not found'}), 404
+    # Only what is cached: the header line never waits on an export
+    catalogue = playlist_catalogue.cached()
+    playlist = (catalogue.find(persistent_id) if catalogue else None) or {'persistent_id': persistent_id}
+    track_store.refresh()
+    store = track_store.store
+    
+    def track(database_id):
+        row = store.find(database_id) if store is not None else None
+        if row is None:
+            # Not indexed yet; the next library sync will pick it up
+            return {'type': 'track', 'id': str(database_id)}
+        return store.track_item(row)
+    
+    if output == 'json':
+        listing = f'playlist:{persistent_id}'
+        try:
+            start = decode_cursor(cursor, listing)[0] if cursor else 0
+        except (CursorError, IndexError) as e:
+            return jsonify({'error': str(e) or 'Malformed cursor'}), 400
+        if not isinstance(start, int) or start < 0:
+            return jsonify({'error': 'Malformed cursor'}), 400
+        end = min(start + limit, len(members))
+        return jsonify({
+            'playlist': playlist,
+            'items': [track(database_id) for database_id in members[start:end]],
+            'count': max(0, end - start),
+            'total': len(members),
+            'next_cursor': encode_cursor(listing, (end,)) if end < len(members) else None,
+            'library_version': track_store.version
+        })
+    
+    def stream():
+        yield json.dumps({**playlist, 'type': 'playlist', 'total': len(members)}) + '\n'
+        # A chunk at a time: the first lines reach the client right away and
+        # memory stays flat however long the playlist is
+        for start in range(0, len(members), PLAYLIST_STREAM_CHUNK):
+            chunk = members[start:start + PLAYLIST_STREAM_CHUNK]
+            yield ''.join(json.dumps(track(database_id)) + '\n' for database_id in chunk)
+    
+    return Response(stream_with_context(stream()), mimetype='application/x-ndjson')
 
 
 @app.route('/playlist/<playlist_name>/play', methods=['POST'])
 @require_auth
 def play_playlist(playlist_name):
     """Play a specific playlist."""
-    result = asc.play_playlist(playlist_name)
+    result = backend.play_playlist(playlist_name)
+    music_monitor.notify_command()
     return jsonify({
         'action': 'play_playlist',
         'playlist': playlist_name,
@@ -172,22 +412,121 @@ def play_playlist(playlist_name):
     })
 
 
+def current_artwork():
+    """
+    Artwork of the current track, from the artwork store when possible.
+    
+    The monitor's state says which track is playing, so a cover that has
+    been stored (normally by the prefetch on track change) is served
+    without running a script, and a request during extraction joins it.
+    
+    Returns:
+        Artwork: The artwork, or None if there is none
+    """
+    track_id = music_monitor.get_state(config.state_max_age).snapshot.database_id
+    if track_id:
+        return artwork_prefetcher.get(track_id)
+    fetched = backend.get_artwork()
+    if fetched is None:
+        return None
+    fetched_id, data = fetched
+    if data is None:
+        artwork_store.mark_no_artwork(fetched_id)
+        return None
+    return artwork_store.put(fetched_id, data)
+
+
+def artwork_args():
+    """
+    Parse size and format for an artwork request (error response on failure).
+    
+    Returns:
+        tuple: ((size, format, negotiated), error), where negotiated means
+               the format was picked from the Accept header
+    """
+    size = request.args.get('size')
+    if size is not None:
+        try:
+            size = int(size)
+        except ValueError:
+            size = None
+        if size not in SIZES:
+            return None, (jsonify({'error': f"Invalid size, expected one of: {', '.join(map(str, SIZES))}"}), 400)
+    image_format = request.args.get('format')
+    if image_format is not None and image_format not in FORMATS:
+        return None, (jsonify({'error': f"Invalid format, expected one of: {', '.join(FORMATS)}"}), 400)
+    negotiated = size is not None and image_format is None
+    if negotiated:
+        image_format = 'webp' if request.accept_mimetypes['image/webp'] else 'jpeg'
+    elif image_format is not None and size is None:
+        size = max(SIZES)
+    return (size, image_format, negotiated), None
+
+
+def artwork_response(artwork, size, image_format, negotiated, immutable):
+    """
+    Serve artwork, resized if asked, tagged by content hash.
+    
+    Query parameters (see artwork_args):
+        size: Longest side in pixels (64, 300 or 600); the original if omitted
+        format: webp or jpeg; defaults to webp when the client accepts it
+    """
+    if size is not None:
+        # A stored variant is found without rendering, so revalidating polls
+        # get their 304 at once. On a miss, a client that already holds the
+        # original fallback is not kept waiting for the render either.
+        variant = artwork_variants.cached(artwork, size, image_format)
+        if variant is None:
+            wait = 0 if artwork.hash in request.if_none_match else VARIANT_WAIT
+            variant = artwork_variants.get(artwork, size, image_format, timeout=wait)
+        # Falls back to the original while Pillow is missing or still busy
+        if variant is None:
+            immutable = False  # Let the variant replace it once rendered
+        else:
+            artwork = variant
+    
+    response = Response(artwork.data, mimetype=sniff_mime(artwork.data))
+    if negotiated:
+        # The same URL serves WebP or JPEG depending on the client
+        response.vary.add('Accept')
+    if immutable:
+        return revalidated(response, artwork.hash,
+                           cache_control='private, max-age=31536000, immutable')
+    return revalidated(response, artwork.hash)
+
+
 @app.route('/artwork', methods=['GET'])
 @require_auth
 def get_artwork():
-    """Get artwork for the current track."""
-    import os
+    """
+    Get artwork for the current track.
     
-    artwork_path = asc.get_artwork()
-    
-    if artwork_path and os.path.exists(artwork_path):
-        return send_file(
-            artwork_path,
-            mimetype='image/jpeg',
-            as_attachment=False
-        )
-    else:
+    Revalidated by content hash, so polling clients get a 304 until the
+    cover changes. /artwork/<hash> serves the same bytes as an immutable URL.
+    """
+    args, error = artwork_args()
+    if error:
+        return error
+    artwork = current_artwork()
+    if artwork is None:
         return jsonify({'error': 'No artwork available'}), 404
+    response = artwork_response(artwork, *args, immutable=False)
+    query = request.query_string.decode()
+    response.headers['Content-Location'] = f"/artwork/{artwork.hash}" + (f"?{query}" if query else '')
+    return response
+
+
+@app.route('/artwork/<artwork_hash>', methods=['GET'])
+@require_auth
+def get_artwork_by_hash(artwork_hash):
+    """Get stored artwork by content hash (cacheable forever)."""
+    args, error = artwork_args()
+    if error:
+        return error
+    artwork = artwork_store.get(artwork_hash.lower())
+    if artwork is None:
+        return jsonify({'error': 'Artwork not found'}), 404
+    return artwork_response(artwork, *args, immutable=True)
 
 
 @app.route('/seek', methods=['POST'])
@@ -201,22 +540,37 @@ def seek():
     
     try:
         position = float(data['position'])
-        result = asc.seek_to_position(position)
-        return jsonify({
-            'action': 'seek',
-            'success': True,
-            'position': position
-        })
-    except ValueError:
+    except (TypeError, ValueError):
         return jsonify({'error': 'Invalid position'}), 400
+    if not math.isfinite(position):
+        return jsonify({'error': 'Invalid position'}), 400
+    
+    # Clamp into the current track (past the end would skip it), using the
+    # published duration rather than querying Music before the seek
+    entry = music_monitor.store.read()
+    duration = entry.snapshot.duration if entry is not None else 0
+    position = max(0.0, min(position, duration) if duration else position)
+    backend.seek_to_position(position)
+    music_monitor.notify_command()
+    return jsonify({
+        'action': 'seek',
+        'success': True,
+        'position': position
+    })
 
 
 @app.route('/search', methods=['GET'])
 @require_auth
 def search():
-    """Search the Apple Music library."""
+    """
+    Search the Apple Music library.
+    
+    mode=exact matches words as prefixes, mode=fuzzy tolerates typos, and
+    mode=auto (the default) is exact, falling back to fuzzy on no results.
+    """
     query = request.args.get('query', '')
     search_type = request.args.get('type', 'track')
+    mode = request.args.get('mode', 'auto')
     
     if not query:
         return jsonify({'error': 'Query parameter required'}), 400
@@ -224,27 +578,286 @@ def search():
     if search_type not in ['track', 'album', 'artist']:
         return jsonify({'error': 'Invalid search type'}), 400
     
+    if mode not in ['auto', 'exact', 'fuzzy']:
+        return jsonify({'error': 'Invalid mode'}), 400
+    
     try:
-        results = asc.search_library(query, search_type)
+        limit = max(1, min(200, int(request.args.get('limit', 50))))
+    except ValueError:
+        return jsonify({'error': 'Invalid limit'}), 400
+    
+    try:
+        fuzzy_index.refresh()
+        use_fuzzy = mode == 'fuzzy' and fuzzy_index.ready
+        if not use_fuzzy:
+            if not library_index.is_empty():
+                results = library_index.search(query, search_type, limit)
+            else:
+                results = backend.search_library(query, search_type, limit)
+            use_fuzzy = not results and mode == 'auto' and fuzzy_index.ready
+        if use_fuzzy:
+            results = fuzzy_index.search(query, search_type, limit)
+        mode = 'fuzzy' if use_fuzzy else 'exact'
         return jsonify({
             'query': query,
             'type': search_type,
+            'mode': mode,
             'results': results,
-            'count': len(results)
+            'count': len(results),
+            'library_version': library_index.version
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/search/suggest', methods=['GET'])
+@require_auth
+def search_suggest():
+    """
+    Typeahead suggestions for a partial query.
+    
+    Query params: query, types (comma-separated track,album,artist), limit.
+    Clients identify themselves with an X-Client-Id header (the remote
+    address otherwise); a newer request from the same client cancels any
+    older one still waiting on a live search.
+    """
+    query = request.args.get('query', '')
+    types = [t for t in request.args.get('types', 'track,album,artist').split(',') if t]
+    
+    if not query.strip():
+        return jsonify({'error': 'Query parameter required'}), 400
+    
+    if not types or any(t not in ['track', 'album', 'artist'] for t in types):
+        return jsonify({'error': 'Invalid types'}), 400
+    
+    try:
+        limit = max(1, min(50, int(request.args.get('limit', 10))))
+    except ValueError:
+        return jsonify({'error': 'Invalid limit'}), 400
+    
+    client = request.headers.get('X-Client-Id') or request.remote_addr
+    generation = suggest_generations.begin(client)
+    started = time.perf_counter()
+    
+    try:
+        suggest_index.refresh()
+        truncated = False
+        if suggest_index.ready:
+            source = 'index'
+            results, truncated = suggest_index.suggest(query, limit, types)
+        else:
+            source = 'live'
+            results = live_suggest(client, generation, query, types, limit)
+        
+        response = {
+            'query': query,
+            'generation': generation,
+            'source': source,
+            'took_ms': round((time.perf_counter() - started) * 1000, 2)
+        }
+        if results is None:
+            response.update({'cancelled': True, 'results': [], 'count': 0})
+        else:
+            response.update({'results': results, 'count': len(results), 'truncated': truncated})
+        return jsonify(response)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+def live_suggest(client, generation, query, types, limit):
+    """
+    Suggestions from a live backend search, for before the index is built.
+    
+    Waits out a short debounce, then queues the search behind any other
+    live search. Returns None as soon as a newer request from the same
+    client arrives (a search already running in Music finishes, but no
+    one waits for it and queued ones never start).
+    """
+    def current():
+        return suggest_generations.is_current(client, generation)
+    
+    if len(query.strip()) < 2:
+        return []
+    time.sleep(config.suggest_debounce)
+    if not current():
+        return None
+    
+    def run():
+        results = []
+        for search_type in types:
+            if not current():
+                return None
+            results.extend(backend.search_library(query, search_type, limit))
+        return results[:limit]
+    
+    future = live_search_executor.submit(run)
+    while True:
+        try:
+            return future.result(timeout=0.05)
+        except FutureTimeout:
+            if not current():
+                return None
+
+
+def browse_page_args(sorts=None):
+    """Parse sort, cursor and limit for a browse listing (error response on failure)."""
+    sort = request.args.get('sort', 'name') if sorts else None
+    if sorts and sort not in sorts:
+        return None, (jsonify({'error': f"Invalid sort, expected one of: {', '.join(sorts)}"}), 400)
+    try:
+        limit = max(1, min(MAX_PAGE_SIZE, int(request.args.get('limit', 100))))
+    except ValueError:
+        return None, (jsonify({'error': 'Invalid limit'}), 400)
+    return (sort, request.args.get('cursor') or None, limit), None
+
+
+def browse_response(page, **fields):
+    return jsonify({
+        **fields,
+        'items': page.items,
+        'count': len(page.items),
+        'total': page.total,
+        'next_cursor': page.next_cursor,
+        'library_version': track_store.version
+    })
+
+
+def browse_catalogue():
+    """The browse catalogue, or an error response while the library is not indexed yet."""
+    track_store.refresh()
+    catalogue = library_browser.catalogue()
+    if catalogue is None:
+        return None, (jsonify({'error': 'Library index is still being built'}), 503)
+    return catalogue, None
+
+
+@app.route('/library/artists', methods=['GET'])
+@require_auth
+def browse_artists():
+    """
+    Page through every artist, with album and track counts.
+    
+    sort=name|tracks|albums|duration|plays; pass next_cursor back as
+    cursor for the following page.
+    """
+    args, error = browse_page_args(ARTIST_SORTS)
+    if error:
+        return error
+    catalogue, error = browse_catalogue()
+    if error:
+        return error
+    sort, cursor, limit = args
+    try:
+        page = catalogue.artist_page(sort, cursor, limit)
+    except CursorError as e:
+        return jsonify({'error': str(e)}), 400
+    return browse_response(page, sort=sort)
+
+
+@app.route('/library/albums', methods=['GET'])
+@require_auth
+def browse_albums():
+    """
+    Page through albums, optionally one artist's (artist=<artist id>).
+    
+    sort=name|artist|year|tracks|duration|plays.
+    """
+    args, error = browse_page_args(ALBUM_SORTS)
+    if error:
+        return error
+    catalogue, error = browse_catalogue()
+    if error:
+        return error
+    sort, cursor, limit = args
+    artist_id = request.args.get('artist') or None
+    try:
+        page = catalogue.album_page(sort, cursor, limit, artist_id)
+    except CursorError as e:
+        return jsonify({'error': str(e)}), 400
+    return browse_response(page, sort=sort, artist=artist_id)
+
+
+@app.route('/library/albums/<album_id>/tracks', methods=['GET'])
+@require_auth
+def browse_album_tracks(album_id):
+    """Page through one album's tracks."""
+    args, error = browse_page_args()
+    if error:
+        return error
+    catalogue, error = browse_catalogue()
+    if error:
+        return error
+    _, cursor, limit = args
+    try:
+        page = catalogue.album_tracks(album_id, cursor, limit)
+    except CursorError as e:
+        return jsonify({'error': str(e)}), 400
+    if page is None:
+        return jsonify({'error': 'Album not found'}), 404
+    return browse_response(page, album=catalogue.album(album_id))
+
+
+def start_track(database_id, persistent_id):
+    """
+    Ask Music to play a track, addressed as cheaply as possible.
+    
+    A database ID is translated to the track's persistent ID through the
+    track store, and Music is asked for the track by persistent ID. The
+    database ID lookup is only used when the store does not know the track
+    or its persistent ID turns out to be stale; either means the library
+    index is behind, so a sync is requested too.
+    
+    Returns:
+        tuple: (result message, database ID the player should switch to)
+        
+    Raises:
+        TrackNotFound: Music has no such track
+    """
+    store = track_store.store
+    if store is not None:
+        if persistent_id is None:
+            persistent_id = store.persistent_id_for(database_id)
+        elif database_id is None:
+            row = store.find_persistent(persistent_id)
+            if row is not None:
+                database_id = store.columns['database_id'][row]
+    
+    if persistent_id is not None:
+        try:
+            return backend.play_track_by_persistent_id(persistent_id), database_id
+        except TrackNotFound:
+            if database_id is None:
+                library_sync.request_sync()
+                raise
+    
+    library_sync.request_sync()
+    return backend.play_track_by_id(database_id), database_id
+
+
 @app.route('/play-track/<track_id>', methods=['POST'])
 @require_auth
 def play_track(track_id):
-    """Play a specific track by ID."""
+    """Play a specific track by database ID or persistent ID."""
+    database_id = parse_database_id(track_id)
+    persistent_id = parse_persistent_id(track_id) if database_id is None else None
+    if database_id is None and persistent_id is None:
+        return jsonify({'error': 'Invalid track ID'}), 400
+    
     try:
-        result = asc.play_track_by_id(track_id)
-        import time
-        time.sleep(0.5)
-        track_info = asc.get_current_track()
+        # Read live, as in skip_track, so a stale cache can't match the target
+        previous_key = music_monitor.get_state(0).snapshot.track_key
+        try:
+            result, target_id = start_track(database_id, persistent_id)
+        except TrackNotFound:
+            return jsonify({'error': 'Track not found'}), 404
+        if result.startswith("Error"):
+            return jsonify({'error': result}), 500
+        music_monitor.notify_command()
+        entry = music_monitor.wait_for_track_change(
+            previous_key, config.track_change_timeout,
+            target_id=str(target_id) if target_id is not None else None
+        )
+        track_info = entry.current().to_track_dict()
         return jsonify({
             'action': 'play_track',
             'success': True,
@@ -327,9 +940,9 @@ def remove_device(device_fingerprint):
 @app.route('/repeat', methods=['GET'])
 @require_auth
 def get_repeat():
-    """Get current repeat mode."""
-    mode = asc.get_repeat_mode()
-    return jsonify({'repeat': mode})
+    """Get current repeat mode from the monitor's cached state."""
+    entry = music_monitor.get_state(config.state_max_age)
+    return jsonify({'repeat': entry.snapshot.repeat})
 
 
 @app.route('/repeat', methods=['POST'])
@@ -342,16 +955,17 @@ def set_repeat():
     if mode not in ['off', 'one', 'all']:
         return jsonify({'error': 'Invalid mode. Use: off, one, or all'}), 400
     
-    result = asc.set_repeat_mode(mode)
+    result = backend.set_repeat_mode(mode)
+    music_monitor.notify_command()
     return jsonify({'action': 'set_repeat', 'mode': mode, 'result': result})
 
 
 @app.route('/shuffle', methods=['GET'])
 @require_auth
 def get_shuffle():
-    """Get current shuffle mode."""
-    enabled = asc.get_shuffle_mode()
-    return jsonify({'shuffle': enabled})
+    """Get current shuffle mode from the monitor's cached state."""
+    entry = music_monitor.get_state(config.state_max_age)
+    return jsonify({'shuffle': entry.snapshot.shuffle})
 
 
 @app.route('/shuffle', methods=['POST'])
@@ -361,7 +975,8 @@ def set_shuffle():
     data = request.get_json()
     enabled = data.get('enabled', False)
     
-    result = asc.set_shuffle_mode(enabled)
+    result = backend.set_shuffle_mode(enabled)
+    music_monitor.notify_command()
     return jsonify({'action': 'set_shuffle', 'enabled': enabled, 'result': result})
 
 # WebSocket event handlers
@@ -378,13 +993,14 @@ def handle_connect():
         return False
     
     print(f"✅ WebSocket client connected: {request.sid}")
+    music_monitor.add_subscriber()
     # Send initial state
     try:
-        track = asc.get_current_track()
-        status = asc.get_playback_state() # Changed from get_player_state() to get_playback_state() for consistency
+        entry = music_monitor.get_state(config.state_max_age)
         emit('initial_state', {
-            'track': track,
-            'status': status
+            'track': entry.current().to_track_dict(),
+            'status': entry.snapshot.state,
+            'state_version': entry.version
         })
     except Exception as e:
         print(f"Error sending initial state: {e}")
@@ -394,6 +1010,7 @@ def handle_connect():
 def handle_disconnect():
     """Handle client disconnection."""
     print(f"❌ WebSocket client disconnected: {request.sid}")
+    music_monitor.remove_subscriber()
 
 
 @socketio.on('ping')
@@ -404,7 +1021,28 @@ def handle_ping():
 
 # Music monitor callback
 def on_music_change(changes):
-    """Broadcast music state changes to all connected clients."""
+    """
+    Broadcast music state changes to all connected clients.
+    
+    Called on the monitor thread, so broadcasting is handed to a single
+    worker: events still go out in order, and waiting for a new track's
+    cover never holds up polling.
+    """
+    track_id = None
+    if changes.get('type') == 'track_changed':
+        track_id = changes['track']['id']
+    elif changes.get('type') == 'full_update':
+        track_id = changes.get('track_id')
+    broadcast_executor.submit(broadcast_change, changes, track_id)
+
+
+def broadcast_change(changes, track_id=None):
+    if track_id:
+        try:
+            prefetch_artwork(changes, track_id)
+        except Exception as e:
+            # Still send the change, just without its cover
+            print(f"Artwork prefetch error: {e}")
     try:
         socketio.emit('music_update', changes)
         print(f"📢 Broadcast: {changes.get('type')}")
@@ -412,11 +1050,61 @@ def on_music_change(changes):
         print(f"Broadcast error: {e}")
 
 
+def prefetch_artwork(changes, track_id):
+    """
+    Extract the new track's cover before its change is broadcast.
+    
+    Waits up to ARTWORK_PREFETCH_WAIT_MS so the event can carry
+    `artwork_hash`; a slower extraction is announced afterwards with an
+    `artwork_ready` update.
+    """
+    known = artwork_store.hash_for(track_id)
+    if known is not None or artwork_store.known_without_artwork(track_id):
+        changes['artwork_hash'] = known
+        return
+    future = artwork_prefetcher.fetch(track_id)
+    try:
+        artwork = future.result(timeout=config.artwork_prefetch_wait)
+    except FutureTimeout:
+        def announce(done):
+            artwork = done.result()
+            if artwork is not None:
+                on_music_change({'type': 'artwork_ready', 'track_id': track_id,
+                                 'artwork_hash': artwork.hash})
+        future.add_done_callback(announce)
+        changes['artwork_hash'] = None
+        return
+    changes['artwork_hash'] = artwork.hash if artwork else None
+
+
 # Initialize music monitor
-music_monitor = MusicMonitor(on_change_callback=on_music_change)
+music_monitor = MusicMonitor(
+    on_change_callback=on_music_change,
+    backend=backend,
+    store=StateStore(position_tolerance=config.position_tolerance),
+    scheduler=PollScheduler(
+        fast=config.poll_fast_interval,
+        normal=config.poll_interval,
+        slow=config.poll_idle_interval
+    )
+)
 music_monitor.start()
 
 
+# Keep the library index in sync in the background
+library_sync = LibrarySync(
+    library_index,
+    backend,
+    interval=config.library_sync_interval,
+    max_share=config.library_sync_share,
+    library_xml=config.library_xml,
+    on_change=library_changed
+)
+library_sync.start()
+refresh_derived_indexes()
+library_browser.warm()
+
+
 # Global variables for zeroconf
 zeroconf = None
 service_info = None
@@ -0,0 +1,530 @@
+"""
+Simulated Music.app backend.
+
+Keeps a playback clock, a synthetic library of configurable size, playlists
+and artwork blobs, and can add a fixed latency to every command to mimic
+Apple Event round-trips. Lets the server run and be benchmarked on Linux.
+"""
+
+import random
+import struct
+import threading
+import time
+import zlib
+from functools import wraps
+from typing import Any, Dict, List, Optional
+from xml.sax.saxutils import escape
+
+from library_index import TRACK_FIELDS, modification_stamp
+from player_backend import PlayerBackend, TrackNotFound
+from player_state import PlayerSnapshot
+
+
+WORDS = [
+    'love', 'night', 'blue', 'fire', 'river', 'dream', 'heart', 'light',
+    'summer', 'city', 'rain', 'gold', 'shadow', 'road', 'ocean', 'star',
+    'wild', 'electric', 'silver', 'echo', 'midnight', 'paper', 'stone',
+    'glass', 'velvet', 'thunder', 'garden', 'winter', 'highway', 'neon',
+    'ghost', 'honey', 'mirror', 'sugar', 'crystal', 'desert', 'forever',
+    'golden', 'broken', 'sweet', 'lonely', 'happy', 'falling', 'rising',
+]
+
+GENRES = ['Rock', 'Pop', 'Jazz', 'Electronic', 'Hip-Hop', 'Classical',
+          'Folk', 'Soul', 'Metal', 'Ambient']
+
+# What a command gets back while the simulated Music is quit
+NOT_RUNNING = "Error: Music is not running"
+
+TRACKS_PER_ALBUM = 12
+ALBUMS_PER_ARTIST = 4
+
+
+def make_png(width: int, height: int, rgb) -> bytes:
+    """Encode a solid-colour RGB PNG."""
+    def chunk(kind, data):
+        body = kind + data
+        return struct.pack('>I', len(data)) + body + struct.pack('>I', zlib.crc32(body) & 0xffffffff)
+
+    row = b'\x00' + bytes(rgb) * width
+    raw = zlib.compress(row * height, 6)
+    header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) +
+            chunk(b'IDAT', raw) + chunk(b'IEND', b''))
+
+
+class SimulatedLibrary:
+    """Deterministic synthetic music library."""
+
+    def __init__(self, size: int = 1000, seed: int = 1, artwork_size: int = 600):
+        rng = random.Random(seed)
+        self.artwork_size = artwork_size
+        self.tracks: List[Dict[str, Any]] = []
+        self.by_id: Dict[str, Dict[str, Any]] = {}
+        self.by_persistent_id: Dict[str, Dict[str, Any]] = {}
+        self._artwork: Dict[str, bytes] = {}
+
+        def title(n):
+            return ' '.join(rng.choice(WORDS) for _ in range(n)).title()
+
+        artist_names: Dict[int, str] = {}
+        album_names: Dict[int, str] = {}
+        now = time.time()
+        for i in range(size):
+            album_index = i // TRACKS_PER_ALBUM
+            artist_index = album_index // ALBUMS_PER_ARTIST
+            if artist_index not in artist_names:
+                artist_names[artist_index] = f"The {title(1)} {title(1)}s"
+            if album_index not in album_names:
+                album_names[album_index] = title(rng.randint(1, 3))
+            artist = artist_names[artist_index]
+            track = {
+                'database_id': str(1000 + i),
+                'persistent_id': '%016X' % rng.getrandbits(64),
+                'name': title(rng.randint(1, 4)),
+                'artist': artist,
+                'album': album_names[album_index],
+                'album_artist': artist,
+                'genre': GENRES[artist_index % len(GENRES)],
+                'year': 1960 + (album_index * 7) % 64,
+                'track_number': i % TRACKS_PER_ALBUM + 1,
+                'duration': round(rng.uniform(90, 420), 3),
+                'play_count': int(rng.paretovariate(1.2)) - 1,
+                'modified': modification_stamp(now - rng.uniform(0, 5 * 365 * 86400)),
+            }
+            self.tracks.append(track)
+            self.by_id[track['database_id']] = track
+            self.by_persistent_id[track['persistent_id']] = track
+
+        self.playlists: List[Dict[str, Any]] = []
+        all_ids = [t['database_id'] for t in self.tracks]
+        self.add_playlist('Library', all_ids, kind='library')
+        self.add_playlist('Favourites', rng.sample(all_ids, min(len(all_ids), 100)))
+        self.add_playlist('Recently Added', all_ids[-min(len(all_ids), 250):])
+        for n in range(1, 6):
+            self.add_playlist(f"Mix {n}", rng.sample(all_ids, min(len(all_ids), 25 * n)))
+
+    def add_playlist(self, name: str, track_ids: List[str], kind: str = 'user'):
+        self.playlists.append({
+            'persistent_id': '%016X' % zlib.crc32(name.encode('utf-8')),
+            'name': name,
+            'kind': kind,
+            'track_ids': list(track_ids),
+        })
+
+    def edit_track(self, database_id: str, **fields):
+        """Change a track's metadata, as a user editing it in Music would."""
+        track = self.by_id[str(database_id)]
+        track.update(fields)
+        track['modified'] = modification_stamp(time.time())
+
+    def remove_track(self, database_id: str):
+        track = self.by_id.pop(str(database_id))
+        self.by_persistent_id.pop(track['persistent_id'], None)
+        self.tracks.remove(track)
+        for playlist in self.playlists:
+            if track['database_id'] in playlist['track_ids']:
+                playlist['track_ids'].remove(track['database_id'])
+
+    def find_playlist(self, name: str) -> Optional[Dict[str, Any]]:
+        for playlist in self.playlists:
+            if playlist['name'] == name:
+                return playlist
+        return None
+
+    def write_library_xml(self, path: str):
+        """
+        Write the library in Music's Library.xml format, streamed to disk.
+
+        Includes the extra per-track keys a real export has, so fixture
+        files are a realistic size for benchmarking the importer.
+        """
+        def key(name, tag, value):
+            return f"\t\t\t<key>{name}</key><{tag}>{value}</{tag}>\n"
+
+        def xml_date(stamp):
+            # Stamps are local wall-clock seconds; plist dates are UTC
+            local = time.gmtime(int(stamp))
+            utc = time.mktime(time.struct_time(local[:8] + (-1,)))
+            return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(utc))
+
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                    '<!DOCTYPE plist PUBLIC "-//Apple Computer//DTD PLIST 1.0//EN" '
+                    '"http://www.apple.com/DTDs/PropertyList-1.0.dtd">\n'
+                    '<plist version="1.0">\n<dict>\n'
+                    '\t<key>Major Version</key><integer>1</integer>\n'
+                    '\t<key>Minor Version</key><integer>1</integer>\n'
+                    '\t<key>Application Version</key><string>1.4.5.7</string>\n'
+                    '\t<key>Music Folder</key><string>file:///Users/sim/Music/Music/Media.localized/</string>\n'
+                    '\t<key>Tracks</key>\n\t<dict>\n')
+            for track in self.tracks:
+                modified = xml_date(track['modified'])
+                f.write(f"\t\t<key>{track['database_id']}</key>\n\t\t<dict>\n")
+                f.write(key('Track ID', 'integer', track['database_id']) +
+                        key('Name', 'string', escape(track['name'])) +
+                        key('Artist', 'string', escape(track['artist'])) +
+                        key('Album Artist', 'string', escape(track['album_artist'])) +
+                        key('Album', 'string', escape(track['album'])) +
+                        key('Genre', 'string', escape(track['genre'])) +
+                        key('Kind', 'string', 'Apple Music AAC audio file') +
+                        key('Size', 'integer', int(track['duration'] * 32000)) +
+                        key('Total Time', 'integer', int(round(track['duration'] * 1000))) +
+                        key('Track Number', 'integer', track['track_number']) +
+                        key('Year', 'integer', track['year']) +
+                        key('Date Modified', 'date', modified) +
+                        key('Date Added', 'date', modified) +
+                        key('Bit Rate', 'integer', 256) +
+                        key('Sample Rate', 'integer', 44100) +
+                        key('Play Count', 'integer', track['play_count']) +
+                        key('Persistent ID', 'string', track['persistent_id']) +
+                        key('Track Type', 'string', 'File') +
+                        key('Location', 'string', 'file:///Users/sim/Music/Music/Media.localized/' +
+                            escape(f"{track['artist']}/{track['album']}/{track['name']}.m4a".replace(' ', '%20'))))
+                f.write('\t\t</dict>\n')
+            f.write('\t</dict>\n\t<key>Playlists</key>\n\t<array>\n')
+            for playlist in self.playlists:
+                f.write('\t\t<dict>\n\t\t\t<key>Name</key><string>%s</string>\n' % escape(playlist['name']))
+                if playlist['kind'] == 'library':
+                    f.write('\t\t\t<key>Master</key><true/>\n\t\t\t<key>Visible</key><false/>\n')
+                f.write('\t\t\t<key>Playlist Persistent ID</key><string>%s</string>\n'
+                        '\t\t\t<key>All Items</key><true/>\n'
+                        '\t\t\t<key>Playlist Items</key>\n\t\t\t<array>\n' % playlist['persistent_id'])
+                for track_id in playlist['track_ids']:
+                    f.write('\t\t\t\t<dict>\n\t\t\t\t\t<key>Track ID</key><integer>%s</integer>\n\t\t\t\t</dict>\n' % track_id)
+                f.write('\t\t\t</array>\n\t\t</dict>\n')
+            f.write('\t</array>\n</dict>\n</plist>\n')
+
+    def artwork_for(self, track: Dict[str, Any]) -> bytes:
+        """Artwork blob shared by every track on an album."""
+        key = f"{track['album_artist']}\x1f{track['album']}"
+        blob = self._artwork.get(key)
+        if blob is None:
+            crc = zlib.crc32(key.encode('utf-8'))
+            rgb = (crc & 0xff, (crc >> 8) & 0xff, (crc >> 16) & 0xff)
+            blob = make_png(self.artwork_size, self.artwork_size, rgb)
+            self._artwork[key] = blob
+        return blob
+
+
+def _exported(track: Dict[str, Any]) -> Dict[str, Any]:
+    """A track as the AppleScript export returns it (integer database ID)."""
+    exported = {field: track[field] for field in TRACK_FIELDS}
+    exported['database_id'] = int(track['database_id'])
+    return exported
+
+
+def _needs_running(command):
+    """Refuse a command while Music is quit, instead of acting on it."""
+    @wraps(command)
+    def guarded(self, *args, **kwargs):
+        if not self.running:
+            return NOT_RUNNING
+        return command(self, *args, **kwargs)
+    return guarded
+
+
+class SimulatedBackend(PlayerBackend):
+    """A stateful stand-in for Music.app with a real playback clock."""
+
+    name = 'simulated'
+
+    def __init__(self, library_size: int = 1000, latency: float = 0.0, seed: int = 1):
+        self.library = SimulatedLibrary(library_size, seed)
+        self.latency = latency
+        self.running = True
+        self.commands = 0
+
+        self.state = 'stopped'
+        self.volume = 50
+        self.shuffle = False
+        self.repeat = 'off'
+
+        self._queue: List[str] = [t['database_id'] for t in self.library.tracks]
+        self._index = 0
+        self._position = 0.0
+        self._since = time.monotonic()
+        self._rng = random.Random(seed)
+        self._lock = threading.RLock()
+
+    # Internals
+
+    def _command(self):
+        """Account for one Apple Event round-trip. Call with the lock held."""
+        self.commands += 1
+        if self.latency:
+            time.sleep(self.latency)
+        self._tick()
+
+    def _current(self) -> Optional[Dict[str, Any]]:
+        if self.state == 'stopped' or not self._queue:
+            return None
+        return self.library.by_id.get(self._queue[self._index])
+
+    def _elapsed(self) -> float:
+        if self.state == 'playing':
+            return self._position + (time.monotonic() - self._since)
+        return self._position
+
+    def _set_position(self, position: float):
+        self._position = max(0.0, position)
+        self._since = time.monotonic()
+
+    def _tick(self):
+        """Advance the clock across track boundaries."""
+        track = self._current()
+        while track is not None and self.state == 'playing':
+            position = self._elapsed()
+            if position < track['duration']:
+                return
+            overflow = position - track['duration']
+            if self.repeat != 'one' and not self._step(1, wrap=self.repeat == 'all'):
+                self.state = 'stopped'
+                self._set_position(0)
+                return
+            self._set_position(overflow)
+            track = self._current()
+
+    def _step(self, delta: int, wrap: bool = True) -> bool:
+        if not self._queue:
+            return False
+        if self.shuffle and delta > 0:
+            self._index = self._rng.randrange(len(self._queue))
+            return True
+        index = self._index + delta
+        if not 0 <= index < len(self._queue):
+            if not wrap:
+                return False
+            index %= len(self._queue)
+        self._index = index
+        return True
+
+    def _start(self, queue: List[str], index: int = 0):
+        self._queue = queue
+        self._index = index
+        self.state = 'playing'
+        self._set_position(0)
+
+    def is_running(self):
+        return self.running
+
+    def set_running(self, running: bool):
+        """Simulate Music being launched or quit."""
+        with self._lock:
+            self.running = running
+            if not running:
+                self.state = 'stopped'
+                self._set_position(0)
+
+    # Playback control
+
+    @_needs_running
+    def play(self):
+        with self._lock:
+            self._command()
+            if self.state != 'playing':
+                self._set_position(self._elapsed() if self.state == 'paused' else 0)
+                self.state = 'playing'
+            return ''
+
+    @_needs_running
+    def pause(self):
+        with self._lock:
+            self._command()
+            if self.state == 'playing':
+                self._set_position(self._elapsed())
+                self.state = 'paused'
+            return ''
+
+    @_needs_running
+    def next_track(self):
+        with self._lock:
+            self._command()
+            if self._current() is not None:
+                self._step(1)
+                self._set_position(0)
+            return self._current_persistent_id()
+
+    @_needs_running
+    def previous_track(self):
+        with self._lock:
+            self._command()
+            if self._current() is not None:
+                # Like Music: restart the track unless we are near its start
+                if self._elapsed() < 3:
+                    self._step(-1)
+                self._set_position(0)
+            return self._current_persistent_id()
+
+    def _current_persistent_id(self) -> str:
+        track = self._current()
+        return track['persistent_id'] if track is not None else ''
+
+    @_needs_running
+    def set_volume(self, level):
+        with self._lock:
+            self._command()
+            self.volume = max(0, min(100, int(level)))
+            return ''
+
+    @_needs_running
+    def seek_to_position(self, position):
+        with self._lock:
+            self._command()
+            track = self._current()
+            if track is not None:
+                self._set_position(min(max(0.0, float(position)), track['duration']))
+            return ''
+
+    @_needs_running
+    def set_repeat_mode(self, mode):
+        with self._lock:
+            self._command()
+            self.repeat = mode if mode in ('off', 'one', 'all') else 'off'
+            return f"Repeat set to: {mode}"
+
+    @_needs_running
+    def set_shuffle_mode(self, enabled):
+        with self._lock:
+            self._command()
+            self.shuffle = bool(enabled)
+            return f"Shuffle: {'true' if enabled else 'false'}"
+
+    # State
+
+    def get_player_snapshot(self):
+        with self._lock:
+            if not self.running:
+                return PlayerSnapshot(running=False)
+            self._command()
+            fields = {
+                'state': self.state,
+                'volume': self.volume,
+                'shuffle': self.shuffle,
+                'repeat': self.repeat,
+            }
+            track = self._current()
+            if track is not None:
+                fields.update({
+                    'database_id': track['database_id'],
+                    'persistent_id': track['persistent_id'],
+                    'name': track['name'],
+                    'artist': track['artist'],
+                    'album': track['album'],
+                    'duration': track['duration'],
+                    'position': round(self._elapsed(), 3),
+                })
+            return PlayerSnapshot(**fields)
+
+    # Library
+
+    def get_playlists(self):
+        with self._lock:
+            self._command()
+            return [p['name'] for p in self.library.playlists]
+
+    def export_playlists(self):
+        with self._lock:
+            self._command()
+            by_id = self.library.by_id
+            return [{
+                'persistent_id': playlist['persistent_id'],
+                'name': playlist['name'],
+                'kind': playlist['kind'],
+                'track_count': len(playlist['track_ids']),
+                'duration': round(sum(by_id[i]['duration'] for i in playlist['track_ids']), 3),
+            } for playlist in self.library.playlists]
+
+    def get_playlist_track_ids(self, persistent_id):
+        with self._lock:
+            self._command()
+            for playlist in self.library.playlists:
+                if playlist['persistent_id'] == str(persistent_id).upper():
+                    return [int(i) for i in playlist['track_ids']]
+            return None
+
+    @_needs_running
+    def play_playlist(self, playlist_name):
+        with self._lock:
+            self._command()
+            playlist = self.library.find_playlist(playlist_name)
+            if playlist is None:
+                return f"Error: Can't get playlist \"{playlist_name}\"."
+            if playlist['track_ids']:
+                self._start(list(playlist['track_ids']))
+            return ''
+
+    def search_library(self, query, search_type='track', limit=50):
+        if not query or len(query) < 2:
+            return []
+        with self._lock:
+            self._command()
+            needle = query.lower()
+            results = []
+            seen = set()
+            for track in self.library.tracks:
+                haystack = f"{track['name']}\n{track['artist']}\n{track['album']}".lower()
+                if needle not in haystack:
+                    continue
+                if search_type == 'track':
+                    results.append({
+                        'type': 'track',
+                        'name': track['name'],
+                        'artist': track['artist'],
+                        'album': track['album'],
+                        'id': track['database_id'],
+                    })
+                elif search_type == 'album':
+                    key = (track['album'], track['artist'])
+                    if key not in seen:
+                        seen.add(key)
+                        results.append({'type': 'album', 'name': key[0], 'artist': key[1]})
+                elif track['artist'] and track['artist'] not in seen:
+                    seen.add(track['artist'])
+                    results.append({'type': 'artist', 'name': track['artist']})
+                if len(results) >= limit:
+                    break
+            return results
+
+    @_needs_running
+    def play_track_by_id(self, track_id):
+        with self._lock:
+            self._command()
+            return self._play_track(self.library.by_id.get(str(track_id)))
+
+    @_needs_running
+    def play_track_by_persistent_id(self, persistent_id):
+        with self._lock:
+            self._command()
+            return self._play_track(self.library.by_persistent_id.get(str(persistent_id).upper()))
+
+    def _play_track(self, track):
+        if track is None:
+            raise TrackNotFound("not found")
+        queue = [t['database_id'] for t in self.library.tracks]
+        self._start(queue, queue.index(track['database_id']))
+        return f"Playing: {track['name']}"
+
+    def get_artwork(self):
+        with self._lock:
+            self._command()
+            track = self._current()
+            if track is None:
+                return None
+            return track['database_id'], self.library.artwork_for(track)
+
+    def export_library(self):
+        with self._lock:
+            self._command()
+            return [_exported(track) for track in self.library.tracks]
+
+    def export_fingerprints(self):
+        with self._lock:
+            self._command()
+            return {t['persistent_id']: t['modified'] for t in self.library.tracks}
+
+    def fetch_tracks(self, persistent_ids):
+        with self._lock:
+            self._command()
+            wanted = set(persistent_ids)
+            return [_exported(track) for track in self.library.tracks
+                    if track['persistent_id'] in wanted]
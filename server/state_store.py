@@ -0,0 +1,93 @@
+"""
+In-memory authoritative player state.
+
+MusicMonitor publishes each PlayerSnapshot here; request handlers read the
+latest one directly instead of running a script per request. Positions are
+projected from the last sample (see position_model.py), so the version only
+moves when something other than the playing clock changes, or on a seek.
+"""
+
+import threading
+import time
+from typing import Callable, NamedTuple, Optional
+
+from player_state import PlayerSnapshot
+from position_model import PositionModel, project_position
+
+
+class StateEntry(NamedTuple):
+    """An immutable published snapshot plus its bookkeeping."""
+
+    snapshot: PlayerSnapshot
+    version: int
+    updated_at: float  # time.monotonic() when published
+    seeked: bool = False  # position jumped away from the projection
+
+    @property
+    def age(self) -> float:
+        """Seconds since this snapshot was taken."""
+        return time.monotonic() - self.updated_at
+
+    @property
+    def position(self) -> float:
+        """Playback position projected to now."""
+        return project_position(self.snapshot, self.updated_at)
+
+    def current(self) -> PlayerSnapshot:
+        """The snapshot with its position projected to now."""
+        return self.snapshot.with_position(round(self.position, 3))
+
+
+class StateStore:
+    """Holds the latest snapshot and a monotonically increasing version."""
+
+    def __init__(self, position_tolerance: float = 1.0):
+        self._entry: Optional[StateEntry] = None
+        self._version = 0
+        self._positions = PositionModel(position_tolerance)
+        self._cond = threading.Condition()
+
+    def publish(self, snapshot: PlayerSnapshot) -> StateEntry:
+        """
+        Publish a fresh snapshot.
+
+        The version increases when anything but the position changes, or
+        when the position disagrees with the projection (a seek). The
+        timestamp, and with it the projection anchor, is refreshed either way.
+        """
+        with self._cond:
+            now = time.monotonic()
+            previous = self._entry
+            seeked = self._positions.observe(snapshot, now)
+            if previous is None or seeked or not snapshot.same_state(previous.snapshot):
+                self._version += 1
+            self._entry = StateEntry(snapshot, self._version, now, seeked)
+            self._cond.notify_all()
+            return self._entry
+
+    def wait_for(self, predicate: Callable[[StateEntry], bool],
+                 timeout: float) -> Optional[StateEntry]:
+        """
+        Block until a published entry satisfies `predicate`.
+
+        Returns:
+            StateEntry: The first matching entry, or None on timeout
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                entry = self._entry
+                if entry is not None and predicate(entry):
+                    return entry
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+
+    def read(self) -> Optional[StateEntry]:
+        """Latest entry, or None if nothing has been published yet."""
+        return self._entry
+
+    @property
+    def version(self) -> int:
+        return self._version
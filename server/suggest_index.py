@@ -0,0 +1,161 @@
+"""
+In-memory prefix index for typeahead suggestions.
+
+Track, album and artist names are normalised (case-folded, accents
+stripped) and every word-start suffix of each name is stored in one sorted
+list, so a prefix lookup is a bisect plus a short scan: "lo" finds both
+"Lonely Road" and "Endless Love". Results are ranked by whether the whole
+name starts with the query, then by play count. A lookup examines at most
+`max_scan` keys; when a short prefix matches more than that, the result is
+marked truncated, since better-ranked names may lie past the cut.
+
+Typeahead clients send a request per keystroke. Generations gives each
+client a counter so that work for a superseded keystroke can be dropped.
+"""
+
+import bisect
+import heapq
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, NamedTuple, Tuple
+
+from derived_index import KINDS, DerivedIndex, Entries, collect_entries, normalize
+from library_index import LibraryIndex
+
+
+class _Build(NamedTuple):
+    """One immutable generation of the index."""
+    keys: List[str]   # Sorted word-start suffixes
+    refs: List[int]   # refs[i]: entry index, negated if keys[i] is the whole name
+    entries: Entries
+
+
+class Suggestions(NamedTuple):
+    items: List[Dict[str, Any]]
+    truncated: bool  # More keys matched than max_scan; ranking saw only some
+
+
+class SuggestIndex(DerivedIndex):
+    """Sorted-array prefix index over a LibraryIndex."""
+
+    name = 'suggest'
+
+    def __init__(self, library_index: LibraryIndex, max_scan: int = 50000,
+                 cache_size: int = 2048):
+        """
+        Args:
+            library_index: Source of track metadata
+            max_scan: Most matching keys examined per lookup
+            cache_size: Lookups remembered per build (short prefixes are
+                        both the most common and the most expensive)
+        """
+        super().__init__(library_index)
+        self.max_scan = max_scan
+        self.cache_size = cache_size
+        self._cache: 'OrderedDict[Tuple, Suggestions]' = OrderedDict()
+
+    def build(self, rows: Iterable[tuple]) -> _Build:
+        entries = collect_entries(rows)
+        pairs = []
+        for index, item in enumerate(entries.items):
+            words = normalize(item['name']).split(' ')
+            for position in range(len(words)):
+                suffix = ' '.join(words[position:])
+                if suffix:
+                    pairs.append((suffix, -index - 1 if position == 0 else index))
+        pairs.sort()
+        return _Build(
+            keys=[key for key, _ in pairs],
+            refs=[ref for _, ref in pairs],
+            entries=entries,
+        )
+
+    def installed(self, build: _Build):
+        with self._lock:
+            self._cache.clear()
+        # Single characters match the most keys; answer them ahead of time
+        for first in sorted({key[0] for key in build.keys}):
+            self.suggest(first)
+
+    def suggest(self, query: str, limit: int = 10,
+                kinds: Iterable[str] = KINDS) -> Suggestions:
+        """
+        Names starting with `query` (at any word), best first.
+
+        Args:
+            query: What the user has typed so far
+            limit: Maximum number of suggestions
+            kinds: Subset of 'track', 'album', 'artist'
+
+        Returns:
+            Suggestions: Result dicts shaped like /search results, and
+                         whether the scan stopped at max_scan keys
+        """
+        build = self._build
+        prefix = normalize(query)
+        if build is None or not prefix:
+            return Suggestions([], False)
+        allowed = set(kinds)
+        kinds = tuple(k for k in KINDS if k in allowed)
+        cache_key = (prefix, limit, kinds)
+        with self._lock:
+            cached = self._cache.get(cache_key)
+            if cached is not None and self._build is build:
+                self._cache.move_to_end(cache_key)
+                return cached
+
+        start = bisect.bisect_left(build.keys, prefix)
+        end = bisect.bisect_left(build.keys, prefix + '\uffff', start,
+                                 min(len(build.keys), start + self.max_scan))
+        truncated = end < len(build.keys) and build.keys[end].startswith(prefix)
+        best: Dict[int, bool] = {}
+        for ref in build.refs[start:end]:
+            index = -ref - 1 if ref < 0 else ref
+            if build.entries.kinds[index] in allowed:
+                best[index] = best.get(index, False) or ref < 0
+        top = heapq.nlargest(limit, best.items(),
+                             key=lambda item: (item[1], build.entries.scores[item[0]]))
+        results = Suggestions([build.entries.items[index] for index, _ in top], truncated)
+
+        with self._lock:
+            if self._build is build:
+                self._cache[cache_key] = results
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        build = self._build
+        return {
+            **super().stats(),
+            'keys': len(build.keys) if build else 0,
+            'entries': len(build.entries.items) if build else 0,
+        }
+
+
+class Generations:
+    """
+    Per-client request counters for cancelling superseded work.
+
+    Each new request from a client takes the next generation; anything
+    still running for an older generation can check is_current() and give
+    up early.
+    """
+
+    def __init__(self, max_clients: int = 1024):
+        self.max_clients = max_clients
+        self._current: 'OrderedDict[str, int]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def begin(self, client: str) -> int:
+        with self._lock:
+            generation = self._current.pop(client, 0) + 1
+            self._current[client] = generation
+            if len(self._current) > self.max_clients:
+                self._current.popitem(last=False)
+            return generation
+
+    def is_current(self, client: str, generation: int) -> bool:
+        with self._lock:
+            current = self._current.get(client)
+        return current is None or current == generation
@@ -0,0 +1,35 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Server modules import each other by top-level name
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Keep tests away from the real ~/.music_remote (tokens, indexes, caches)
+os.environ['HOME'] = tempfile.mkdtemp(prefix='music-remote-tests-')
+
+
+@pytest.fixture(scope='session')
+def server():
+    """The server module, running against the simulated backend."""
+    pytest.importorskip('flask')
+    pytest.importorskip('flask_socketio')
+    pytest.importorskip('zeroconf')
+    os.environ.update({
+        'MUSIC_BACKEND': 'simulated',
+        'SIM_LIBRARY_SIZE': '200',
+        'OSASCRIPT_POOL_SIZE': '0',
+        'LIBRARY_SYNC_INTERVAL': '3600',
+        'TRACK_CHANGE_TIMEOUT': '1',
+    })
+    import server
+    return server
+
+
+@pytest.fixture
+def client(server):
+    client = server.app.test_client()
+    client.environ_base['HTTP_AUTHORIZATION'] = f'Bearer {server.config.auth_token}'
+    return client
@@ -0,0 +1,83 @@
+"""
+Stand-in runner speaking the pool's wire protocol, for tests.
+
+A "run" source is a command rather than AppleScript:
+
+    echo <text>    result is <text>
+    sleep <secs>   sleep, then result "slept"
+    fail <text>    script error <text>
+    exit           the process exits without answering
+    garbage        a malformed frame header, then exit
+    pid            the runner's process ID
+
+"exec" answers with the script key and its arguments, and reports whether
+the key was compiled by an earlier request.
+"""
+
+import json
+import os
+import sys
+import time
+
+
+def read_frame(stream):
+    header = stream.readline()
+    if not header:
+        return None
+    return json.loads(stream.read(int(header)))
+
+
+def write_frame(stream, message):
+    data = json.dumps(message).encode('utf-8')
+    stream.write(b'%d\n' % len(data) + data)
+    stream.flush()
+
+
+def run(source):
+    command, _, arg = source.partition(' ')
+    if command == 'echo':
+        return arg
+    if command == 'sleep':
+        time.sleep(float(arg))
+        return 'slept'
+    if command == 'fail':
+        raise RuntimeError(arg)
+    if command == 'exit':
+        sys.exit(0)
+    if command == 'garbage':
+        sys.stdout.buffer.write(b'not a length\n')
+        sys.stdout.buffer.flush()
+        sys.exit(0)
+    if command == 'pid':
+        return str(os.getpid())
+    raise RuntimeError(f'Unknown command: {command}')
+
+
+def main():
+    stdin, stdout = sys.stdin.buffer, sys.stdout.buffer
+    compiled = set()
+    while True:
+        request = read_frame(stdin)
+        if request is None:
+            return
+        response = {'id': request['id'], 'ok': True}
+        try:
+            if request['op'] == 'ping':
+                response['result'] = 'pong'
+            elif request['op'] == 'run':
+                response['result'] = run(request['source'])
+            elif request['op'] == 'exec':
+                cached = request['key'] in compiled
+                compiled.add(request['key'])
+                response['result'] = ' '.join([request['key'], 'cached' if cached else 'compiled']
+                                              + request['argv'])
+            else:
+                raise RuntimeError(f"Unknown op: {request['op']}")
+        except RuntimeError as e:
+            response['ok'] = False
+            response['error'] = str(e)
+        write_frame(stdout, response)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,29 @@
+"""Small synthetic libraries shared by the index tests."""
+
+
+def track(database_id, name, artist, album, **fields):
+    return {
+        'database_id': database_id,
+        'persistent_id': '%016X' % (0xA000000000000000 + database_id),
+        'name': name,
+        'artist': artist,
+        'album': album,
+        'album_artist': fields.get('album_artist', ''),
+        'genre': fields.get('genre', 'Rock'),
+        'year': fields.get('year', 2000),
+        'duration': fields.get('duration', 180.0),
+        'play_count': fields.get('play_count', 0),
+        'modified': fields.get('modified', '1700000000'),
+    }
+
+
+LIBRARY = [
+    track(101, 'Hyperballad', 'Björk', 'Post', year=1995, play_count=12),
+    track(102, 'Army of Me', 'Björk', 'Post', year=1995, play_count=3),
+    track(103, 'Jóga', 'Björk', 'Homogenic', year=1997, duration=305.0),
+    track(104, 'Teardrop', 'Massive Attack', 'Mezzanine', year=1998, play_count=40),
+    track(105, 'Angel', 'Massive Attack', 'Mezzanine', year=1998),
+    track(106, 'Intro', 'Various', 'Café del Mar', album_artist='DJ Compiler', year=2001),
+    track(107, 'Outro', 'Someone Else', 'Café del Mar', album_artist='DJ Compiler', year=2001),
+    track(108, 'Loose Track', 'Nobody', ''),
+]
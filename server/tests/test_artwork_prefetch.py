@@ -0,0 +1,73 @@
+import threading
+
+import pytest
+
+from artwork_prefetch import ArtworkPrefetcher
+from artwork_store import ArtworkStore
+
+
+class Backend:
+    """Reports `playing` as the current track; get_artwork waits for `release`."""
+
+    def __init__(self, playing='1'):
+        self.playing = playing
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def get_artwork(self):
+        self.calls += 1
+        self.started.set()
+        self.release.wait(5)
+        return self.playing, bytes([int(self.playing)]) * 100
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ArtworkStore(str(tmp_path))
+
+
+def test_concurrent_fetches_share_one_extraction(store):
+    backend = Backend()
+    backend.release.clear()
+    prefetcher = ArtworkPrefetcher(backend, store)
+    first = prefetcher.fetch('1')
+    assert backend.started.wait(5)
+    second = prefetcher.fetch(1)
+    assert second is first
+    backend.release.set()
+    assert first.result(5).hash == store.hash_for('1')
+    assert backend.calls == 1
+    assert prefetcher.stats()['joined'] == 1
+    assert prefetcher.stats()['pending'] == 0
+
+
+def test_get_reads_the_store_first(store):
+    backend = Backend()
+    prefetcher = ArtworkPrefetcher(backend, store)
+    assert prefetcher.get('1', timeout=5) is not None
+    assert prefetcher.get('1') is not None
+    assert backend.calls == 1
+
+
+def test_track_changed_mid_extraction(store):
+    backend = Backend(playing='2')
+    prefetcher = ArtworkPrefetcher(backend, store)
+    assert prefetcher.fetch('1').result(5) is None
+    # The cover is kept for the track it belongs to
+    assert store.get_for_track('2') is not None
+    assert store.get_for_track('1') is None
+    assert not store.known_without_artwork('1')
+    # ...and the first track is asked for again once it is current
+    backend.playing = '1'
+    assert prefetcher.fetch('1').result(5).hash == store.hash_for('1')
+    assert backend.calls == 2
+
+
+def test_no_artwork_is_remembered(store):
+    backend = Backend()
+    backend.get_artwork = lambda: ('1', None)
+    prefetcher = ArtworkPrefetcher(backend, store)
+    assert prefetcher.fetch('1').result(5) is None
+    assert store.known_without_artwork('1')
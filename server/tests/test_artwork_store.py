@@ -0,0 +1,74 @@
+import os
+
+from artwork_store import ArtworkStore, content_hash
+
+
+def cover(seed, size=1000):
+    return bytes([seed]) * size
+
+
+def test_put_get_dedupes(tmp_path):
+    store = ArtworkStore(str(tmp_path))
+    first = store.put('1', cover(1))
+    second = store.put('2', cover(1))
+    assert first.hash == second.hash == content_hash(cover(1))
+    assert store.stats()['files'] == 1
+    assert store.get_for_track('2').data == cover(1)
+    assert store.get_for_track('3') is None
+
+
+def test_evicts_least_recently_used(tmp_path):
+    store = ArtworkStore(str(tmp_path), max_bytes=2500, hot_bytes=0)
+    a = store.put('a', cover(1))
+    b = store.put('b', cover(2))
+    store.get(a.hash)  # a is now more recent than b
+    store.put('c', cover(3))
+    assert store.stats()['evictions'] == 1
+    assert store.get(b.hash) is None
+    assert store.hash_for('b') is None
+    assert store.get_for_track('a') is not None
+    assert not os.path.exists(os.path.join(str(tmp_path), b.hash[:2], b.hash))
+
+
+def test_keeps_newest_file_over_budget(tmp_path):
+    store = ArtworkStore(str(tmp_path), max_bytes=10)
+    store.put('big', cover(1))
+    assert store.get_for_track('big') is not None
+
+
+def test_hot_tier_bounded(tmp_path):
+    store = ArtworkStore(str(tmp_path), hot_bytes=1500)
+    a = store.put('a', cover(1))
+    store.put('b', cover(2))
+    assert store.stats()['hot_files'] == 1
+    store.get(a.hash)
+    assert store.hits['disk'] == 1
+    store.get(a.hash)
+    assert store.hits['hot'] == 1
+
+
+def test_reload_restores_map_and_budget(tmp_path):
+    store = ArtworkStore(str(tmp_path))
+    store.put('a', cover(1))
+    store.put('b', cover(2))
+    reopened = ArtworkStore(str(tmp_path), max_bytes=1000)
+    # Over budget on reload: the older file and its mapping are dropped
+    assert reopened.stats()['files'] == 1
+    assert sum(reopened.hash_for(t) is not None for t in ('a', 'b')) == 1
+
+
+def test_vanished_file_is_forgotten(tmp_path):
+    store = ArtworkStore(str(tmp_path), hot_bytes=0)
+    artwork = store.put('a', cover(1))
+    os.remove(os.path.join(str(tmp_path), artwork.hash[:2], artwork.hash))
+    assert store.get_for_track('a') is None
+    assert store.hash_for('a') is None
+    assert store.total_bytes == 0
+
+
+def test_no_artwork_cleared_by_put(tmp_path):
+    store = ArtworkStore(str(tmp_path))
+    store.mark_no_artwork('a')
+    assert store.known_without_artwork('a')
+    store.put('a', cover(1))
+    assert not store.known_without_artwork('a')
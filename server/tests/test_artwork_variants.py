@@ -0,0 +1,62 @@
+import io
+
+import pytest
+
+from artwork_store import ArtworkStore
+from artwork_variants import ArtworkVariants, sniff_mime
+
+
+HEIC = b'\x00\x00\x00\x18ftypheic' + b'\x00' * 100
+
+
+@pytest.mark.parametrize('data, mime', [
+    (b'\xff\xd8\xff\xe0rest', 'image/jpeg'),
+    (b'\x89PNG\r\n\x1a\nrest', 'image/png'),
+    (b'GIF89arest', 'image/gif'),
+    (b'BMrest', 'image/bmp'),
+    (b'MM\x00*rest', 'image/tiff'),
+    (b'RIFF\x10\x00\x00\x00WEBPVP8 ', 'image/webp'),
+    (HEIC, 'image/heic'),
+    (b'RIFF\x10\x00\x00\x00WAVEfmt ', 'application/octet-stream'),
+    (b'', 'application/octet-stream'),
+])
+def test_sniff_mime(data, mime):
+    assert sniff_mime(data) == mime
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ArtworkStore(str(tmp_path))
+
+
+@pytest.fixture
+def variants(store):
+    pytest.importorskip('PIL')
+    return ArtworkVariants(store)
+
+
+def png(width, height):
+    from PIL import Image
+    out = io.BytesIO()
+    Image.new('RGB', (width, height), (200, 30, 30)).save(out, 'PNG')
+    return out.getvalue()
+
+
+def test_get_renders_once(store, variants):
+    from PIL import Image
+    original = store.put('1', png(800, 400))
+    variant = variants.get(original, 300, 'webp', timeout=10)
+    assert sniff_mime(variant.data) == 'image/webp'
+    with Image.open(io.BytesIO(variant.data)) as image:
+        assert image.size == (300, 150)
+    assert variants.get(original, 300, 'webp').hash == variant.hash
+    assert variants.get(original, 64, 'jpeg', timeout=10).data[:3] == b'\xff\xd8\xff'
+    assert variants.stats()['rendered'] == 2
+
+
+def test_render_failure_is_not_retried(store, variants):
+    original = store.put('1', HEIC)
+    assert variants.get(original, 300, 'webp', timeout=10) is None
+    assert variants.get(original, 300, 'webp', timeout=10) is None
+    assert variants.request(original, 300, 'webp') is None
+    assert variants.stats()['failures'] == 1
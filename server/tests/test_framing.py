@@ -0,0 +1,41 @@
+import pytest
+
+from framing import RS, US, decode, decode_columns, decode_record, encode, iter_records
+
+
+RECORDS = [['1', 'Song', 'Artist'], ['2', '', 'A, B; C\n"quoted"'], ['3', 'Ünïcödé', '']]
+
+
+def test_round_trip():
+    assert decode(encode(RECORDS)) == RECORDS
+    assert list(iter_records(encode(RECORDS))) == RECORDS
+
+
+def test_empty_output_has_no_records():
+    assert decode('') == []
+    assert list(iter_records('')) == []
+    assert decode_record('') == []
+
+
+def test_empty_fields_survive():
+    text = RS.join([US * 2, ''])
+    assert decode(text) == [['', '', ''], ['']]
+    assert list(iter_records(text)) == [['', '', ''], ['']]
+
+
+def test_decode_record():
+    assert decode_record(US.join(['a', 'b', ''])) == ['a', 'b', '']
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('', [[], [], []]),
+    (RS * 2, [[], [], []]),
+    (RS.join(['1' + US + '2', 'a' + US + 'b', 'x' + US + 'y']), [['1', '2'], ['a', 'b'], ['x', 'y']]),
+])
+def test_decode_columns(text, expected):
+    assert decode_columns(text, 3) == expected
+
+
+def test_decode_columns_rejects_malformed():
+    assert decode_columns(RS.join(['1', 'a']), 3) is None
+    assert decode_columns(RS.join(['1' + US + '2', 'a', 'x' + US + 'y']), 3) is None
@@ -0,0 +1,69 @@
+import pytest
+
+from fuzzy_index import FuzzyIndex
+from library_fixtures import LIBRARY, track
+from library_index import LibraryIndex
+
+
+BEATLES = [
+    track(201, 'Come Together', 'The Beatles', 'Abbey Road', play_count=5),
+    track(202, 'Something', 'The Beatles', 'Abbey Road'),
+    track(203, 'Help!', 'The Beatles', 'Help!'),
+]
+
+
+@pytest.fixture
+def library(tmp_path):
+    index = LibraryIndex(str(tmp_path / 'library.db'))
+    index.rebuild(LIBRARY + BEATLES)
+    yield index
+    index.close()
+
+
+@pytest.fixture
+def fuzzy(library):
+    fuzzy = FuzzyIndex(library)
+    fuzzy.refresh(wait=True)
+    assert fuzzy.ready
+    return fuzzy
+
+
+def names(results):
+    return [r['name'] for r in results]
+
+
+def test_tolerates_typos(fuzzy):
+    assert names(fuzzy.search('teardorp'))[0] == 'Teardrop'
+    assert names(fuzzy.search('beatls abey road', 'album'))[0] == 'Abbey Road'
+
+
+def test_ignores_case_and_accents(fuzzy):
+    assert names(fuzzy.search('BJORK', 'artist'))[0] == 'Björk'
+
+
+def test_artist_found_through_their_album(fuzzy):
+    results = fuzzy.search('beatls abey road', 'artist')
+    assert names(results)[0] == 'The Beatles'
+    assert results[0]['type'] == 'artist'
+
+
+def test_results_are_ranked_and_limited(fuzzy):
+    results = fuzzy.search('massive attack', 'track', limit=1)
+    assert len(results) == 1
+    assert results[0]['artist'] == 'Massive Attack'
+    assert results[0]['score'] > 0
+
+
+def test_unknown_type_or_empty_query(fuzzy):
+    assert fuzzy.search('post', 'playlist') == []
+    assert fuzzy.search('   ') == []
+
+
+def test_emptied_library_drops_the_build(library, fuzzy):
+    library.rebuild([])
+    fuzzy.refresh(wait=True)
+    assert not fuzzy.ready
+    assert fuzzy.search('teardrop') == []
+    library.rebuild(LIBRARY)
+    fuzzy.refresh(wait=True)
+    assert names(fuzzy.search('teardrop'))[0] == 'Teardrop'
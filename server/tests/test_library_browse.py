@@ -0,0 +1,91 @@
+import pytest
+
+from library_browse import Catalogue, CursorError, decode_cursor, encode_cursor, stable_id
+from library_fixtures import LIBRARY, track
+from track_store import TrackStore
+
+
+@pytest.fixture
+def catalogue():
+    return Catalogue(TrackStore.build(LIBRARY))
+
+
+def walk(fetch):
+    """Every item of a paged listing, following cursors."""
+    items, cursor = [], None
+    while True:
+        page = fetch(cursor)
+        items += page.items
+        cursor = page.next_cursor
+        if cursor is None:
+            return items
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor('artists:name', ('björk', 'ABC'))
+    assert decode_cursor(cursor, 'artists:name') == ('björk', 'ABC')
+
+
+def test_cursor_from_other_listing():
+    cursor = encode_cursor('artists:name', ('x',))
+    with pytest.raises(CursorError):
+        decode_cursor(cursor, 'albums:name:')
+
+
+@pytest.mark.parametrize('cursor', ['!!!', 'bm90IGpzb24', encode_cursor('artists:name', ())[:-2]])
+def test_malformed_cursor(catalogue, cursor):
+    with pytest.raises(CursorError):
+        catalogue.artist_page(cursor=cursor)
+
+
+def test_album_artist_credited(catalogue):
+    names = [a['name'] for a in catalogue.artists]
+    assert 'DJ Compiler' in names
+    assert 'Various' not in names
+    album = catalogue.album(stable_id('Café del Mar', 'DJ Compiler'))
+    assert album['track_count'] == 2
+    assert album['artist_id'] == stable_id('DJ Compiler')
+
+
+def test_tracks_without_album_are_not_an_album(catalogue):
+    assert all(album['name'] for album in catalogue.albums)
+    assert 'Nobody' in [a['name'] for a in catalogue.artists]
+
+
+def test_aggregates(catalogue):
+    post = catalogue.album(stable_id('Post', 'Björk'))
+    assert post['play_count'] == 15
+    assert post['duration'] == 360.0
+    bjork = next(a for a in catalogue.artists if a['name'] == 'Björk')
+    assert bjork['album_count'] == 2 and bjork['track_count'] == 3
+
+
+@pytest.mark.parametrize('sort', ['name', 'tracks', 'albums', 'duration', 'plays'])
+def test_artist_paging_visits_everything_once(catalogue, sort):
+    whole = catalogue.artist_page(sort=sort, limit=100).items
+    paged = walk(lambda cursor: catalogue.artist_page(sort=sort, cursor=cursor, limit=2))
+    assert paged == whole
+    assert len({a['id'] for a in paged}) == len(catalogue.artists)
+
+
+def test_album_paging_by_artist(catalogue):
+    artist_id = stable_id('Björk')
+    albums = walk(lambda cursor: catalogue.album_page(cursor=cursor, limit=1, artist_id=artist_id))
+    assert [a['name'] for a in albums] == ['Homogenic', 'Post']
+
+
+def test_cursor_survives_library_change(catalogue):
+    first = catalogue.album_page(limit=2)
+    grown = Catalogue(TrackStore.build(LIBRARY + [track(300, 'A', 'Aaa', 'Aardvark')]))
+    # The new album sorts before the cursor, so the next page is unchanged
+    assert grown.album_page(cursor=first.next_cursor, limit=2).items == \
+        catalogue.album_page(cursor=first.next_cursor, limit=2).items
+
+
+def test_album_tracks_paging(catalogue):
+    album_id = stable_id('Post', 'Björk')
+    tracks = walk(lambda cursor: catalogue.album_tracks(album_id, cursor=cursor, limit=1))
+    assert [t['id'] for t in tracks] == ['101', '102']
+    assert catalogue.album_tracks('missing') is None
+    with pytest.raises(CursorError):
+        catalogue.album_tracks(album_id, cursor=encode_cursor(f'tracks:{album_id}', ('x',)))
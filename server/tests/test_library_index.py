@@ -0,0 +1,100 @@
+import pytest
+
+from library_index import LibraryIndex, fts_query, parse_database_id, parse_persistent_id
+from library_fixtures import LIBRARY, track
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = LibraryIndex(str(tmp_path / 'library.db'))
+    index.rebuild(LIBRARY)
+    yield index
+    index.close()
+
+
+def test_fts_query_prefix_matches_every_word():
+    assert fts_query('army me') == '"army"* "me"*'
+
+
+def test_fts_query_neutralises_quotes_and_blanks():
+    assert fts_query('"a') == '"a"*'
+    assert fts_query('  ') is None
+    assert fts_query('"') is None
+
+
+def test_fts_query_column_filter():
+    assert fts_query('bjork', ['artist', 'album_artist']) == '{artist album_artist} : ("bjork"*)'
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('42', 42), (' 7 ', 7), ('0', None), ('-1', None), ('4294967296', None), ('1e3', None), ('٣', None),
+])
+def test_parse_database_id(text, expected):
+    assert parse_database_id(text) == expected
+
+
+def test_parse_persistent_id():
+    assert parse_persistent_id('0123456789abcdef') == '0123456789ABCDEF'
+    assert parse_persistent_id('0123456789ABCDEG') is None
+    assert parse_persistent_id('0123') is None
+
+
+def test_rebuild_counts_and_versions(tmp_path):
+    index = LibraryIndex(str(tmp_path / 'library.db'))
+    assert index.is_empty()
+    assert index.rebuild(LIBRARY) == len(LIBRARY)
+    assert index.count() == len(LIBRARY)
+    assert index.version == 1
+    index.close()
+    # The version survives reopening
+    assert LibraryIndex(str(tmp_path / 'library.db')).version == 1
+
+
+def test_track_search_prefix_and_diacritics(index):
+    results = index.search('bjor hyper')
+    assert [r['id'] for r in results] == ['101']
+    assert index.search('joga')[0]['name'] == 'Jóga'
+
+
+def test_track_search_limit(index):
+    assert len(index.search('bjork', limit=2)) == 2
+
+
+def test_album_search_groups_tracks(index):
+    results = index.search('mezz', 'album')
+    assert results == [{'type': 'album', 'name': 'Mezzanine', 'artist': 'Massive Attack'}]
+
+
+def test_artist_search_skips_blank(index):
+    names = [r['name'] for r in index.search('massive', 'artist')]
+    assert names == ['Massive Attack']
+
+
+def test_empty_query(index):
+    assert index.search('   ') == []
+    assert index.search('"', 'album') == []
+
+
+def test_apply_changes(index):
+    renamed = track(101, 'Hyperballad (Remix)', 'Björk', 'Post')
+    added = track(200, 'Unfinished Sympathy', 'Massive Attack', 'Blue Lines')
+    touched = index.apply_changes([renamed, added], [LIBRARY[-1]['persistent_id']])
+    assert touched == 3
+    assert index.version == 2
+    assert index.count() == len(LIBRARY)
+    assert index.search('remix')[0]['id'] == '101'
+    assert index.search('sympathy')[0]['id'] == '200'
+    assert index.search('loose') == []
+
+
+def test_apply_no_changes_keeps_version(index):
+    assert index.apply_changes([], []) == 0
+    assert index.version == 1
+
+
+def test_iter_tracks(index):
+    rows = list(index.iter_tracks(['database_id', 'name']))
+    assert rows[0] == (101, 'Hyperballad')
+    assert len(rows) == len(LIBRARY)
+    with pytest.raises(ValueError):
+        list(index.iter_tracks(['nope']))
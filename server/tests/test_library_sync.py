@@ -0,0 +1,69 @@
+import subprocess
+
+import pytest
+
+import applescript_commands
+from library_index import LibraryIndex
+from library_sync import LibrarySync
+from simulated_player import SimulatedBackend
+
+
+@pytest.fixture
+def backend():
+    return SimulatedBackend(library_size=50)
+
+
+@pytest.fixture
+def sync(tmp_path, backend):
+    index = LibraryIndex(str(tmp_path / 'library.db'))
+    yield LibrarySync(index, backend, max_share=1.0)
+    index.close()
+
+
+def test_first_sync_exports_everything(sync):
+    result = sync.sync_once()
+    assert result['mode'] == 'full'
+    assert sync.index.count() == 50
+
+
+def test_incremental_sync_picks_up_changes(sync, backend):
+    sync.sync_once()
+    edited = backend.library.tracks[0]['database_id']
+    backend.library.edit_track(edited, name='Renamed')
+    backend.library.remove_track(backend.library.tracks[1]['database_id'])
+    result = sync.sync_once()
+    assert result['mode'] == 'incremental'
+    assert (result['updated'], result['deleted']) == (1, 1)
+    assert sync.index.search('renamed')[0]['id'] == str(edited)
+
+
+def test_empty_fingerprints_never_wipe_the_index(sync, backend, monkeypatch):
+    sync.sync_once()
+    version = sync.index.version
+    monkeypatch.setattr(backend, 'export_fingerprints', lambda: {})
+    assert sync.sync_once()['mode'] == 'failed'
+    assert sync.index.count() == 50
+    assert sync.index.version == version
+
+
+def test_failed_export_leaves_index_empty(sync, backend, monkeypatch):
+    monkeypatch.setattr(backend, 'export_library', lambda: None)
+    assert sync.sync_once()['mode'] == 'failed'
+    assert sync.index.is_empty()
+
+
+def test_offline_music_is_not_touched(sync, backend):
+    backend.set_running(False)
+    assert sync.sync_once()['mode'] == 'offline'
+    assert backend.commands == 0
+
+
+def test_failed_osascript_is_an_error_not_empty_output(monkeypatch):
+    failed = subprocess.CompletedProcess(['osascript'], 1, stdout='',
+                                         stderr="execution error: Music got an error (-1728)\n")
+    monkeypatch.setattr(subprocess, 'run', lambda *args, **kwargs: failed)
+    result = applescript_commands._run_osascript(['-e', 'return 1'], strip=False)
+    assert result == "Error: execution error: Music got an error (-1728)"
+    # A fallback export that fails is reported as a failure, not an empty library
+    monkeypatch.setattr(applescript_commands, 'get_pool', lambda: None)
+    assert applescript_commands.export_fingerprints() is None
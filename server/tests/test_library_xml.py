@@ -0,0 +1,59 @@
+import io
+
+import pytest
+
+from library_index import TRACK_FIELDS
+from library_xml import read_tracks
+from simulated_player import SimulatedBackend
+
+
+@pytest.fixture(scope='module')
+def backend():
+    return SimulatedBackend(library_size=120)
+
+
+@pytest.fixture(scope='module')
+def library_xml(backend, tmp_path_factory):
+    path = tmp_path_factory.mktemp('xml') / 'Library.xml'
+    backend.library.write_library_xml(str(path))
+    return path
+
+
+def test_tracks_match_the_export(backend, library_xml):
+    assert list(read_tracks(str(library_xml))) == backend.export_library()
+
+
+def test_field_types(library_xml):
+    track = next(read_tracks(str(library_xml)))
+    assert list(track) == TRACK_FIELDS
+    assert isinstance(track['database_id'], int)
+    assert isinstance(track['year'], int) and isinstance(track['play_count'], int)
+    assert isinstance(track['duration'], float)
+    assert isinstance(track['modified'], str) and track['modified'].isdigit()
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 4096])
+def test_chunk_boundaries_do_not_matter(library_xml, chunk_size):
+    with open(library_xml, 'rb') as f:
+        streamed = list(read_tracks(f, chunk_size=chunk_size))
+    assert streamed == list(read_tracks(str(library_xml)))
+
+
+def test_stops_after_the_tracks_section(library_xml):
+    data = library_xml.read_bytes()
+    # Anything after the Tracks dict is never parsed
+    cut = data.index(b'<key>Playlists</key>') + len(b'<key>Playlists</key>')
+    source = io.BytesIO(data[:cut] + b'<not xml')
+    assert len(list(read_tracks(source))) == 120
+
+
+def test_missing_fields_get_defaults():
+    xml = (b'<?xml version="1.0" encoding="UTF-8"?><plist version="1.0"><dict>'
+           b'<key>Tracks</key><dict><key>7</key><dict>'
+           b'<key>Track ID</key><integer>7</integer>'
+           b'<key>Name</key><string>Caf\xc3\xa9 &amp; Bar</string>'
+           b'<key>Persistent ID</key><string>00000000000000AB</string>'
+           b'</dict></dict></dict></plist>')
+    [track] = read_tracks(io.BytesIO(xml))
+    assert track['name'] == 'Café & Bar'
+    assert (track['artist'], track['year'], track['duration'], track['modified']) == ('', 0, None, None)
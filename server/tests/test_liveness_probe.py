@@ -0,0 +1,86 @@
+import subprocess
+
+import pytest
+
+import applescript_commands
+from liveness_probe import LivenessProbe
+
+
+class Pgrep:
+    """Stands in for subprocess.run; each call pops the next outcome."""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = []
+
+    def __call__(self, args, **kwargs):
+        self.calls.append(args)
+        outcome = self.outcomes.pop(0) if len(self.outcomes) > 1 else self.outcomes[0]
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return subprocess.CompletedProcess(args, outcome)
+
+
+@pytest.fixture
+def pgrep(monkeypatch):
+    def install(*outcomes):
+        fake = Pgrep(*outcomes)
+        monkeypatch.setattr(applescript_commands.subprocess, 'run', fake)
+        return fake
+    return install
+
+
+@pytest.mark.parametrize('outcome, running', [
+    (0, True),
+    (1, False),  # No matching process
+    (2, False),  # pgrep usage error
+    (FileNotFoundError('pgrep'), False),
+    (subprocess.TimeoutExpired('pgrep', 2), False),
+])
+def test_pgrep_result(pgrep, outcome, running):
+    fake = pgrep(outcome)
+    assert applescript_commands.is_music_running() is running
+    assert fake.calls == [['pgrep', '-x', 'Music']]
+
+
+def test_backoff_doubles_while_down_and_resets(pgrep):
+    pgrep(1, 1, 1, 1, 1, 0, 1)
+    probe = LivenessProbe(applescript_commands.is_music_running, min_backoff=1.0, max_backoff=6.0)
+    backoffs = []
+    for _ in range(5):
+        assert probe.poll() is False
+        backoffs.append(probe.backoff)
+    assert backoffs == [1.0, 2.0, 4.0, 6.0, 6.0]
+    assert probe.poll() is True
+    assert probe.backoff == 1.0
+    assert probe.poll() is False
+    assert probe.backoff == 1.0
+
+
+def test_transitions_are_reported_once(pgrep):
+    pgrep(0, 1, 1, 0)
+    probe = LivenessProbe(applescript_commands.is_music_running)
+    probe.poll()
+    assert probe.take_transition() is None  # Running from the start
+    probe.poll()
+    assert probe.take_transition() == 'offline'
+    probe.poll()
+    assert probe.take_transition() is None
+    probe.poll()
+    assert probe.take_transition() == 'online'
+
+
+def test_is_running_reuses_a_recent_result(pgrep):
+    fake = pgrep(0)
+    probe = LivenessProbe(applescript_commands.is_music_running, cache_ttl=60)
+    assert probe.is_running() and probe.is_running()
+    assert len(fake.calls) == 1
+    probe.observe(False)
+    assert probe.is_running() is False
+    assert len(fake.calls) == 1
+
+
+def test_failing_check_counts_as_down():
+    def check():
+        raise RuntimeError('no process table')
+    assert LivenessProbe(check).poll() is False
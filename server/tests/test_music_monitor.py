@@ -0,0 +1,100 @@
+from music_monitor import MusicMonitor
+from poll_scheduler import PollScheduler
+from simulated_player import SimulatedBackend
+
+
+def make_monitor(**kwargs):
+    backend = SimulatedBackend(library_size=20)
+    return backend, MusicMonitor(lambda changes: None, backend=backend, **kwargs)
+
+
+def test_track_events_use_the_current_track_ids():
+    backend, monitor = make_monitor()
+    backend.play()
+    monitor.last_state = monitor._get_current_state()
+    backend.next_track()
+    changes = monitor._detect_changes(monitor._get_current_state())
+    track = backend.get_current_track()
+    assert changes['type'] == 'track_changed'
+    assert changes['track']['id'] == track['id']
+    assert changes['track']['persistent_id'] == track['persistent_id']
+
+
+class Scheduler(PollScheduler):
+    """Runs one monitor loop iteration per run() and records each wait."""
+
+    def __init__(self, **kwargs):
+        super().__init__(clock=lambda: self.now, **kwargs)
+        self.now = 1000.0
+        self.monitor = None
+        self.delays = []
+
+    def wait(self, entry, offline_delay=None):
+        self.interval = self.choose_interval(entry, offline_delay)
+        self.delays.append(offline_delay)
+        self.monitor.running = False
+
+    def run(self):
+        self.monitor.running = True
+        self.monitor._monitor_loop()
+
+
+def looped():
+    events = []
+    backend = SimulatedBackend(library_size=20)
+    scheduler = Scheduler()
+    monitor = MusicMonitor(events.append, backend=backend, scheduler=scheduler)
+    scheduler.monitor = monitor
+    scheduler.add_subscriber()
+    return backend, monitor, scheduler, events
+
+
+def test_loop_reports_changes_and_liveness():
+    backend, monitor, scheduler, events = looped()
+    scheduler.run()
+    assert events[-1]['type'] == 'full_update'
+    backend.play()
+    scheduler.run()
+    assert events[-1]['type'] == 'track_changed'
+    assert scheduler.mode == 'playing'
+
+    backend.set_running(False)
+    scheduler.run()
+    assert events[-1] == {'type': 'player_offline'}
+    assert monitor.store.read().snapshot.running is False
+    assert scheduler.mode == 'offline'
+    assert scheduler.delays[-1] == monitor.probe.backoff
+
+    backend.set_running(True)
+    scheduler.run()
+    assert [e['type'] for e in events[-2:]] == ['player_online', 'full_update']
+
+
+def test_commands_switch_polling_mode():
+    backend, monitor, scheduler, events = looped()
+    monitor.notify_command()
+    assert scheduler.choose_interval(None) == scheduler.fast
+    assert scheduler.mode == 'boost'
+    scheduler.now += scheduler.boost_duration + 1
+    assert scheduler.choose_interval(None) == scheduler.slow
+
+
+def test_waiting_for_a_track_change_polls_in_burst_mode():
+    backend, monitor, scheduler, events = looped()
+    backend.play()
+    previous = monitor.get_state(0).snapshot.track_key
+    modes = []
+    monitor.store.wait_for = lambda changed, timeout: modes.append(scheduler.choose_interval(None))
+    monitor.wait_for_track_change(previous, 1.0)
+    assert modes == [scheduler.burst]
+    assert scheduler.choose_interval(None) != scheduler.burst
+
+
+def test_metrics():
+    backend, monitor, scheduler, events = looped()
+    scheduler.run()
+    metrics = monitor.metrics()
+    assert metrics['state_version'] == monitor.store.version == 1
+    assert metrics['player_running'] is True
+    assert metrics['subscribers'] == 1
+    assert metrics['mode'] == 'idle'
@@ -0,0 +1,134 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+from osascript_pool import (OsascriptPool, ScriptError, WorkerError, WorkerTimeout,
+                            default_runner_command)
+
+FAKE_RUNNER = [sys.executable, os.path.join(os.path.dirname(__file__), 'fake_runner.py')]
+
+
+@pytest.fixture
+def pool():
+    pool = OsascriptPool(command=FAKE_RUNNER, max_workers=2, timeout=5.0)
+    yield pool
+    pool.close()
+
+
+def test_runner_command_override(monkeypatch):
+    monkeypatch.setenv('OSASCRIPT_RUNNER', 'python3 "/tmp/my runner.py"')
+    assert default_runner_command() == ['python3', '/tmp/my runner.py']
+
+
+def test_run_script_round_trip(pool):
+    assert pool.run_script('echo hello') == 'hello'
+    assert pool.run_script('echo') == ''
+
+
+def test_frames_carry_unicode_and_separators(pool):
+    text = 'Sigur Rós – \x1e\x1f\n' * 1000
+    assert pool.run_script('echo ' + text) == text
+
+
+def test_script_error(pool):
+    with pytest.raises(ScriptError, match='boom'):
+        pool.run_script('fail boom')
+    # The runner survives a script error
+    assert pool.run_script('echo ok') == 'ok'
+    assert pool.stats()['restarts'] == 0
+
+
+def test_run_compiled_caches_per_runner(pool):
+    assert pool.run_compiled('set_volume-1', [50], source='on run argv') == 'set_volume-1 compiled 50'
+    assert pool.run_compiled('set_volume-1', [60], source='on run argv') == 'set_volume-1 cached 60'
+
+
+def test_workers_are_reused(pool):
+    first = pool.run_script('pid')
+    assert pool.run_script('pid') == first
+    assert pool.stats()['started'] == 1
+
+
+def test_timeout_kills_hung_runner(pool):
+    hung = pool.run_script('pid')
+    with pytest.raises(WorkerTimeout):
+        pool.run_script('sleep 10', timeout=0.3)
+    stats = pool.stats()
+    assert stats['timeouts'] == 1
+    assert stats['workers'] == 0
+    # The next request gets a fresh runner, not the stuck one
+    assert pool.run_script('pid') != hung
+
+
+def test_respawn_after_exit(pool):
+    first = pool.run_script('pid')
+    with pytest.raises(WorkerError):
+        pool.run_script('exit')
+    assert pool.stats()['restarts'] == 1
+    assert pool.run_script('pid') != first
+
+
+def test_malformed_frame_retires_runner(pool):
+    with pytest.raises(WorkerError):
+        pool.run_script('garbage')
+    assert pool.run_script('echo ok') == 'ok'
+
+
+def test_dead_idle_runner_replaced_on_checkout(pool):
+    pool.run_script('echo warm')
+    worker = pool._idle[0]
+    worker.process.kill()
+    worker.process.wait()
+    assert pool.run_script('echo ok') == 'ok'
+    assert pool.stats()['restarts'] == 1
+
+
+def test_idle_runner_pinged_before_reuse():
+    pool = OsascriptPool(command=FAKE_RUNNER, max_workers=1, health_interval=0)
+    try:
+        first = pool.run_script('pid')
+        time.sleep(0.01)
+        assert pool.run_script('pid') == first
+        assert pool.stats()['restarts'] == 0
+    finally:
+        pool.close()
+
+
+def test_recycled_after_max_requests():
+    pool = OsascriptPool(command=FAKE_RUNNER, max_workers=1, max_requests=2)
+    try:
+        pids = [pool.run_script('pid') for _ in range(4)]
+        assert pids[0] == pids[1] != pids[2] == pids[3]
+    finally:
+        pool.close()
+
+
+def test_bounded_workers_wait_for_free_runner():
+    pool = OsascriptPool(command=FAKE_RUNNER, max_workers=1)
+    try:
+        pool.run_script('echo warm')
+        busy = threading.Thread(target=pool.run_script, args=('sleep 0.5',))
+        busy.start()
+        time.sleep(0.1)
+        with pytest.raises(WorkerTimeout, match='No runner available'):
+            pool.run_script('echo late', timeout=0.1)
+        busy.join()
+        assert pool.stats()['workers'] == 1
+    finally:
+        pool.close()
+
+
+def test_unstartable_runner():
+    pool = OsascriptPool(command=['/nonexistent/runner'], max_workers=1)
+    with pytest.raises(WorkerError):
+        pool.run_script('echo x')
+    assert pool.stats()['workers'] == 0
+
+
+def test_closed_pool_refuses(pool):
+    pool.close()
+    with pytest.raises(WorkerError):
+        pool.run_script('echo x')
@@ -0,0 +1,27 @@
+import applescript_commands
+from framing import US
+
+
+def snapshot_from(monkeypatch, output):
+    monkeypatch.setattr(applescript_commands, 'run_template', lambda *args, **kwargs: output)
+    return applescript_commands.get_player_snapshot()
+
+
+def test_parses_full_snapshot(monkeypatch):
+    snapshot = snapshot_from(monkeypatch, US.join([
+        'playing', '65', 'true', 'all', '42', '0123456789ABCDEF', '200000', '1500', 'Song', 'Artist', 'Album']))
+    assert snapshot.state == 'playing'
+    assert snapshot.volume == 65
+    assert snapshot.shuffle and snapshot.repeat == 'all'
+    assert snapshot.track_key == '0123456789ABCDEF'
+    assert (snapshot.duration, snapshot.position) == (200.0, 1.5)
+
+
+def test_unparseable_volume_is_unknown(monkeypatch):
+    snapshot = snapshot_from(monkeypatch, US.join(['paused', 'missing value', 'false', 'off']))
+    assert snapshot.volume is None
+    assert snapshot.state == 'paused'
+
+
+def test_offline(monkeypatch):
+    assert snapshot_from(monkeypatch, 'offline').running is False
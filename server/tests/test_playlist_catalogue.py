@@ -0,0 +1,64 @@
+import threading
+import time
+
+import pytest
+
+from playlist_catalogue import PlaylistCatalogue
+from simulated_player import SimulatedBackend
+
+
+@pytest.fixture
+def backend():
+    return SimulatedBackend(library_size=60)
+
+
+def slow_exports(backend, monkeypatch, delay=0.2):
+    calls = []
+    export = backend.export_playlists
+
+    def slow():
+        calls.append(1)
+        time.sleep(delay)
+        return export()
+    monkeypatch.setattr(backend, 'export_playlists', slow)
+    return calls
+
+
+def test_first_get_exports(backend):
+    catalogue = PlaylistCatalogue(backend).get()
+    assert [p['name'] for p in catalogue.playlists][:2] == ['Library', 'Favourites']
+    assert catalogue.playlists[0]['track_count'] == 60
+
+
+def test_get_waits_for_refresh_in_flight(backend, monkeypatch):
+    calls = slow_exports(backend, monkeypatch)
+    catalogue = PlaylistCatalogue(backend)
+    catalogue.refresh_async()
+    assert catalogue.get() is not None
+    assert len(calls) == 1
+
+
+def test_concurrent_first_gets_share_one_export(backend, monkeypatch):
+    calls = slow_exports(backend, monkeypatch)
+    catalogue = PlaylistCatalogue(backend)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(catalogue.get())) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert all(result is not None for result in results)
+
+
+def test_never_asks_a_quit_music(backend):
+    backend.set_running(False)
+    assert PlaylistCatalogue(backend).get() is None
+    assert backend.commands == 0
+
+
+def test_survives_restart_from_disk(backend, tmp_path):
+    path = str(tmp_path / 'playlists.json')
+    etag = PlaylistCatalogue(backend, path=path).get().etag
+    backend.set_running(False)
+    assert PlaylistCatalogue(backend, path=path).get().etag == etag
@@ -0,0 +1,123 @@
+from player_state import PlayerSnapshot
+from poll_scheduler import PollScheduler
+from state_store import StateStore
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class Wake:
+    """Stands in for the scheduler's Event: waiting advances the clock."""
+
+    def __init__(self, clock, overrun=0.0):
+        self.clock = clock
+        self.overrun = overrun  # Extra time each wait takes (a slow poll)
+        self.waits = []
+        self.woken = False
+
+    def wait(self, timeout=None):
+        self.waits.append(timeout)
+        if self.woken:
+            return True
+        self.clock.now += (timeout or 0) + self.overrun
+        return False
+
+    def set(self):
+        self.woken = True
+
+    def clear(self):
+        self.woken = False
+
+
+def make(**kwargs):
+    clock = Clock()
+    scheduler = PollScheduler(clock=clock, **kwargs)
+    scheduler._wake = Wake(clock)
+    scheduler.add_subscriber()
+    scheduler._wake.clear()
+    return clock, scheduler
+
+
+def entry(**fields):
+    return StateStore().publish(PlayerSnapshot(**fields))
+
+
+def test_modes_follow_context():
+    clock, scheduler = make()
+    playing = entry(state='playing', persistent_id='A', duration=200.0, position=10.0)
+    assert scheduler.choose_interval(playing) == scheduler.normal
+    assert scheduler.mode == 'playing'
+    assert scheduler.choose_interval(entry(state='paused')) == scheduler.slow
+    assert scheduler.mode == 'idle'
+    near_end = entry(state='playing', persistent_id='A', duration=200.0, position=199.0)
+    assert scheduler.choose_interval(near_end) == scheduler.fast
+    assert scheduler.mode == 'track_end'
+    assert scheduler.choose_interval(playing, offline_delay=8.0) == 8.0
+    assert scheduler.mode == 'offline'
+
+
+def test_boost_expires():
+    clock, scheduler = make(boost_duration=3.0)
+    scheduler.boost()
+    assert scheduler.choose_interval(None) == scheduler.fast
+    assert scheduler.mode == 'boost'
+    clock.now += 3.5
+    assert scheduler.choose_interval(None) == scheduler.slow
+
+
+def test_burst_overrides_everything():
+    clock, scheduler = make()
+    scheduler.begin_burst()
+    scheduler.begin_burst()
+    scheduler.end_burst()
+    assert scheduler.choose_interval(None, offline_delay=8.0) == scheduler.burst
+    scheduler.end_burst()
+    assert scheduler.choose_interval(None) == scheduler.slow
+
+
+def test_suspends_without_subscribers_or_readers():
+    clock, scheduler = make(reader_window=10.0)
+    scheduler.remove_subscriber()
+    scheduler.note_reader()
+    assert scheduler.choose_interval(None) == scheduler.slow
+    clock.now += 11
+    assert scheduler.choose_interval(None) is None
+    assert scheduler.mode == 'suspended'
+
+
+def test_deadlines_are_fixed():
+    clock, scheduler = make(slow=5.0)
+    started = clock.now
+    for _ in range(4):
+        scheduler.wait(None)
+        # A poll taking 0.5s shortens the next wait instead of the period
+        clock.now += 0.5
+    assert scheduler._wake.waits == [5.0, 4.5, 4.5, 4.5]
+    assert clock.now - started == 20.5
+    metrics = scheduler.metrics()
+    assert metrics['ticks'] == 4
+    assert metrics['effective_hz'] == 0.2
+    assert metrics['lag_max_ms'] == 0
+
+
+def test_overrun_restarts_from_now_and_records_lag():
+    clock, scheduler = make(slow=5.0)
+    scheduler.wait(None)
+    clock.now += 7.0  # The poll overran its next deadline by 2s
+    scheduler.wait(None)
+    assert scheduler._wake.waits == [5.0, 0.0]
+    assert scheduler.metrics()['lag_max_ms'] == 2000.0
+
+
+def test_wake_cuts_the_wait_short():
+    clock, scheduler = make(slow=5.0)
+    scheduler.wake()
+    scheduler.wait(None)
+    assert scheduler._wake.woken is False
+    assert scheduler.metrics()['mode'] == 'idle'
+    assert scheduler.metrics()['interval'] == 5.0
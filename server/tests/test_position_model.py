@@ -0,0 +1,47 @@
+from player_state import PlayerSnapshot
+from position_model import PositionModel, project_position
+
+
+def snapshot(**fields):
+    defaults = dict(state='playing', persistent_id='0123456789ABCDEF', duration=200.0, position=10.0)
+    return PlayerSnapshot(**{**defaults, **fields})
+
+
+def test_projects_while_playing():
+    assert project_position(snapshot(), sampled_at=100.0, now=105.0) == 15.0
+
+
+def test_holds_while_paused():
+    assert project_position(snapshot(state='paused'), sampled_at=100.0, now=105.0) == 10.0
+
+
+def test_clamped_to_duration():
+    assert project_position(snapshot(), sampled_at=100.0, now=1000.0) == 200.0
+
+
+def test_never_projects_backwards():
+    assert project_position(snapshot(), sampled_at=100.0, now=90.0) == 10.0
+
+
+def test_model_before_first_sample():
+    assert PositionModel().project(now=5.0) == 0.0
+
+
+def test_on_schedule_sample_is_not_a_seek():
+    model = PositionModel(tolerance=1.0)
+    assert model.observe(snapshot(position=10.0), sampled_at=100.0) is False
+    assert model.observe(snapshot(position=15.4), sampled_at=105.0) is False
+    assert model.project(now=106.0) == 16.4
+
+
+def test_jump_is_a_seek():
+    model = PositionModel(tolerance=1.0)
+    model.observe(snapshot(position=10.0), sampled_at=100.0)
+    assert model.observe(snapshot(position=90.0), sampled_at=105.0) is True
+
+
+def test_new_track_is_not_a_seek():
+    model = PositionModel(tolerance=1.0)
+    model.observe(snapshot(position=150.0), sampled_at=100.0)
+    assert model.observe(snapshot(persistent_id='FEDCBA9876543210', position=0.0),
+                         sampled_at=101.0) is False
@@ -0,0 +1,123 @@
+import subprocess
+
+import pytest
+
+import applescript_commands
+import script_cache
+from script_cache import ScriptCache, ScriptTemplate
+
+
+SOURCE = 'on run argv\n    return item 1 of argv\nend run\n'
+
+
+class Osacompile:
+    """Stands in for subprocess.run; writes the -o output like osacompile."""
+
+    def __init__(self, returncode=0, error=None):
+        self.returncode = returncode
+        self.error = error
+        self.calls = []
+
+    def __call__(self, args, **kwargs):
+        self.calls.append(args)
+        if self.error is not None:
+            raise self.error
+        with open(args[args.index('-o') + 1], 'wb') as f:
+            f.write(b'compiled')
+        return subprocess.CompletedProcess(args, self.returncode)
+
+
+@pytest.fixture
+def osacompile(monkeypatch):
+    def install(**kwargs):
+        fake = Osacompile(**kwargs)
+        monkeypatch.setattr(script_cache.subprocess, 'run', fake)
+        return fake
+    return install
+
+
+def test_key_follows_the_source():
+    template = ScriptTemplate('echo', SOURCE)
+    assert template.key == ScriptTemplate('echo', SOURCE).key
+    assert template.key.startswith('echo-')
+    assert template.key != ScriptTemplate('echo', SOURCE + '\n').key
+
+
+def test_compiles_once(tmp_path, osacompile):
+    fake = osacompile()
+    cache = ScriptCache(tmp_path)
+    template = cache.register('echo', SOURCE)
+    path = cache.compiled_path('echo')
+    assert path == str(tmp_path / f"{template.key}.scpt")
+    assert cache.compiled_path('echo') == path
+    assert len(fake.calls) == 1
+    assert fake.calls[0][:2] == ['osacompile', '-o']
+    # The source file handed to osacompile is cleaned up
+    assert sorted(p.name for p in tmp_path.iterdir()) == [f"{template.key}.scpt"]
+
+    # A restart reuses the compiled file
+    restarted = ScriptCache(tmp_path)
+    restarted.register('echo', SOURCE)
+    assert restarted.compiled_path('echo') == path
+    assert len(fake.calls) == 1
+
+
+def test_new_version_replaces_the_old(tmp_path, osacompile):
+    osacompile()
+    cache = ScriptCache(tmp_path)
+    cache.register('echo', SOURCE)
+    old = cache.compiled_path('echo')
+    cache.register('echo', SOURCE.replace('1', '2'))
+    new = cache.compiled_path('echo')
+    assert new != old
+    assert [p.name for p in tmp_path.iterdir()] == [new.rsplit('/', 1)[1]]
+
+
+@pytest.mark.parametrize('kwargs', [{'returncode': 1}, {'error': FileNotFoundError('osacompile')}])
+def test_compile_failure_falls_back_to_source(tmp_path, osacompile, kwargs):
+    fake = osacompile(**kwargs)
+    cache = ScriptCache(tmp_path)
+    cache.register('echo', SOURCE)
+    assert cache.compiled_path('echo') is None
+    assert cache.compiled_path('echo') is None
+    assert len(fake.calls) == 1
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.fixture
+def osascript(monkeypatch):
+    calls = []
+
+    def run(args, **kwargs):
+        calls.append(args)
+        return subprocess.CompletedProcess(args, 0, stdout='ok\n', stderr='')
+    monkeypatch.setattr(applescript_commands, 'get_pool', lambda: None)
+    monkeypatch.setattr(applescript_commands.subprocess, 'run', run)
+    return calls
+
+
+def test_arguments_pass_as_argv(monkeypatch, osascript):
+    monkeypatch.setattr(applescript_commands.templates, 'compiled_path', lambda name: '/cache/x.scpt')
+    query = 'say "hi" & quit'
+    assert applescript_commands.run_template('search_tracks', query, 5) == 'ok'
+    assert osascript == [['osascript', '/cache/x.scpt', query, '5']]
+
+
+def test_uncompiled_template_runs_its_source(monkeypatch, osascript):
+    monkeypatch.setattr(applescript_commands.templates, 'compiled_path', lambda name: None)
+    applescript_commands.run_template('set_volume', 30)
+    source = applescript_commands.templates.get('set_volume').source
+    assert osascript == [['osascript', '-e', source, '30']]
+
+
+def test_pool_gets_the_template_key(monkeypatch):
+    class Pool:
+        def run_compiled(self, key, argv, path=None, source=None, timeout=None):
+            self.call = (key, argv, path)
+            return ' done \n'
+    pool = Pool()
+    monkeypatch.setattr(applescript_commands, 'get_pool', lambda: pool)
+    monkeypatch.setattr(applescript_commands.templates, 'compiled_path', lambda name: '/cache/x.scpt')
+    assert applescript_commands.run_template('set_volume', 30) == 'done'
+    key = applescript_commands.templates.get('set_volume').key
+    assert pool.call == (key, ['30'], '/cache/x.scpt')
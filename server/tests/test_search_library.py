@@ -0,0 +1,33 @@
+import applescript_commands
+from framing import encode
+
+
+def search(monkeypatch, records, search_type, limit=10):
+    calls = []
+
+    def run_template(name, *args, **kwargs):
+        calls.append((name, args))
+        return encode(records)
+    monkeypatch.setattr(applescript_commands, 'run_template', run_template)
+    return applescript_commands.search_library('love', search_type, limit), calls
+
+
+def test_albums_deduplicated_in_order(monkeypatch):
+    records = [['Blue', 'A'], ['Red', 'B'], ['Blue', 'A'], ['', 'C'], ['Blue', 'Other'], ['Red', 'B']]
+    results, calls = search(monkeypatch, records, 'album')
+    assert [(r['name'], r['artist']) for r in results] == [('Blue', 'A'), ('Red', 'B'), ('Blue', 'Other')]
+    # Enough hits are scanned to fill the limit with distinct albums
+    assert calls == [('search_albums', ('love', 10 * applescript_commands.GROUPED_SEARCH_SCAN))]
+
+
+def test_artists_deduplicated_and_limited(monkeypatch):
+    records = [['A'], ['B'], ['A'], [''], ['C'], ['D']]
+    results, _ = search(monkeypatch, records, 'artist', limit=3)
+    assert [r['name'] for r in results] == ['A', 'B', 'C']
+
+
+def test_tracks_pass_through(monkeypatch):
+    records = [['Song', 'A', 'Blue', '42'], ['malformed']]
+    results, calls = search(monkeypatch, records, 'track', limit=5)
+    assert results == [{'type': 'track', 'name': 'Song', 'artist': 'A', 'album': 'Blue', 'id': '42'}]
+    assert calls == [('search_tracks', ('love', 5))]
@@ -0,0 +1,72 @@
+import pytest
+
+
+@pytest.fixture
+def paused(server):
+    """A current track whose state will not change under the test."""
+    server.backend.set_running(True)
+    server.backend.play_track_by_id(server.backend.library.tracks[0]['database_id'])
+    server.backend.pause()
+    server.music_monitor.get_state(0)
+
+
+def revalidate(client, url, response, **headers):
+    return client.get(url, headers={'If-None-Match': response.headers['ETag'], **headers})
+
+
+def test_status_round_trip(client, server, paused):
+    first = client.get('/status')
+    assert first.status_code == 200
+    assert first.headers['ETag'] == f'W/"s{first.get_json()["state_version"]}"'
+    assert revalidate(client, '/status', first).status_code == 304
+
+    server.backend.play()
+    server.music_monitor.get_state(0)
+    changed = revalidate(client, '/status', first)
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != first.headers['ETag']
+
+
+def test_playlists_round_trip(client, server):
+    server.backend.set_running(True)
+    first = client.get('/playlists')
+    assert first.headers['ETag'] == f'"{server.playlist_catalogue.cached().etag}"'
+    second = revalidate(client, '/playlists', first)
+    assert second.status_code == 304
+    assert second.get_data() == b''
+    stale = client.get('/playlists', headers={'If-None-Match': '"0000"'})
+    assert stale.status_code == 200
+
+
+def test_artwork_round_trip(client, server, paused):
+    first = client.get('/artwork')
+    assert first.status_code == 200
+    assert first.mimetype == 'image/png'
+    digest = first.headers['ETag'].strip('"')
+    assert first.headers['Content-Location'] == f'/artwork/{digest}'
+    assert revalidate(client, '/artwork', first).status_code == 304
+
+    by_hash = client.get(f'/artwork/{digest}')
+    assert by_hash.get_data() == first.get_data()
+    assert 'immutable' in by_hash.headers['Cache-Control']
+    assert revalidate(client, f'/artwork/{digest}', by_hash).status_code == 304
+
+
+def test_artwork_variant_varies_on_accept(client, server, paused):
+    pytest.importorskip('PIL')
+    digest = client.get('/artwork').headers['ETag'].strip('"')
+    url = f'/artwork/{digest}?size=64'
+    webp = client.get(url, headers={'Accept': 'image/webp,*/*'})
+    jpeg = client.get(url, headers={'Accept': 'image/jpeg'})
+    assert webp.mimetype == 'image/webp'
+    assert jpeg.mimetype == 'image/jpeg'
+    assert webp.headers['Vary'] == jpeg.headers['Vary'] == 'Accept'
+    assert webp.headers['ETag'] != jpeg.headers['ETag']
+
+    again = revalidate(client, url, webp, Accept='image/webp,*/*')
+    assert again.status_code == 304
+    assert again.headers['Vary'] == 'Accept'
+    assert revalidate(client, url, webp, Accept='image/jpeg').status_code == 200
+
+    explicit = client.get(f'/artwork/{digest}?size=64&format=jpeg')
+    assert 'Vary' not in explicit.headers
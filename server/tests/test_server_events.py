@@ -0,0 +1,8 @@
+def test_change_is_broadcast_when_prefetch_fails(server, monkeypatch):
+    sent = []
+    def broken(changes, track_id):
+        raise RuntimeError('artwork script failed')
+    monkeypatch.setattr(server, 'prefetch_artwork', broken)
+    monkeypatch.setattr(server.socketio, 'emit', lambda event, data: sent.append((event, data)))
+    server.broadcast_change({'type': 'track_changed'}, '1')
+    assert sent == [('music_update', {'type': 'track_changed'})]
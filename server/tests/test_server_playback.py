@@ -0,0 +1,58 @@
+import pytest
+
+
+@pytest.fixture
+def tracks(server, monkeypatch):
+    """Library tracks, with the simulated player in order and running."""
+    monkeypatch.setattr(server.backend, 'shuffle', False)
+    monkeypatch.setattr(server.backend, 'repeat', 'all')
+    server.backend.set_running(True)
+    return server.backend.library.tracks
+
+
+def test_play_track_by_database_id(client, server, tracks):
+    track = tracks[5]
+    response = client.post(f"/play-track/{track['database_id']}")
+    assert response.status_code == 200
+    assert response.get_json()['track']['id'] == track['database_id']
+    assert server.backend.get_current_track()['id'] == track['database_id']
+
+
+def test_play_track_by_persistent_id(client, tracks):
+    track = tracks[7]
+    response = client.post(f"/play-track/{track['persistent_id']}")
+    assert response.status_code == 200
+    assert response.get_json()['track']['persistent_id'] == track['persistent_id']
+
+
+def test_play_track_rejects_bad_and_unknown_ids(client, tracks):
+    assert client.post('/play-track/not-an-id').status_code == 400
+    assert client.post('/play-track/999999999').status_code == 404
+
+
+def test_next_and_previous_report_the_new_track(client, tracks):
+    client.post(f"/play-track/{tracks[3]['database_id']}")
+    response = client.post('/next')
+    assert response.status_code == 200
+    assert response.get_json()['track']['id'] == tracks[4]['database_id']
+    response = client.post('/previous')
+    assert response.status_code == 200
+    assert response.get_json()['track']['id'] == tracks[3]['database_id']
+
+
+def test_skip_reports_when_music_is_not_running(client, server, tracks):
+    server.backend.set_running(False)
+    try:
+        response = client.post('/next')
+    finally:
+        server.backend.set_running(True)
+    assert response.status_code == 500
+    assert 'not running' in response.get_json()['error']
+
+
+def test_seek_clamps_to_the_published_duration(client, server, tracks):
+    client.post(f"/play-track/{tracks[2]['database_id']}")
+    duration = server.music_monitor.store.read().snapshot.duration
+    assert client.post('/seek', json={'position': 1e9}).get_json()['position'] == duration
+    assert client.post('/seek', json={'position': -5}).get_json()['position'] == 0
+    assert client.post('/seek', json={'position': 'nan'}).status_code == 400
@@ -0,0 +1,64 @@
+import json
+from collections import OrderedDict
+
+import pytest
+
+
+def test_playlists_from_the_catalogue(client, server):
+    response = client.get('/playlists')
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['playlists'][0] == 'Library'
+    assert body['count'] == len(server.backend.library.playlists)
+
+
+def test_playlists_unavailable_without_launching_music(client, server, monkeypatch):
+    monkeypatch.setattr(server.playlist_catalogue, '_catalogue', None)
+    monkeypatch.setattr(server.backend, 'running', False)
+    commands = server.backend.commands
+    response = client.get('/playlists')
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == str(server.PLAYLISTS_RETRY_AFTER)
+    assert server.backend.commands == commands
+
+
+@pytest.fixture
+def playlist(server):
+    server.backend.set_running(True)
+    return next(p for p in server.backend.library.playlists if len(p['track_ids']) >= 3)
+
+
+def test_playlist_tracks_as_json_pages(client, server, playlist):
+    url = f"/playlists/{playlist['persistent_id']}/tracks?format=json&limit=2"
+    page = client.get(url).get_json()
+    assert page['playlist']['persistent_id'] == playlist['persistent_id']
+    assert page['total'] == len(playlist['track_ids'])
+    assert [item['id'] for item in page['items']] == playlist['track_ids'][:2]
+    first = server.backend.library.by_id[playlist['track_ids'][0]]
+    assert page['items'][0]['name'] == first['name']
+
+    second = client.get(f"{url}&cursor={page['next_cursor']}").get_json()
+    assert [item['id'] for item in second['items']] == playlist['track_ids'][2:4]
+
+
+def test_playlist_tracks_as_ndjson(client, playlist):
+    response = client.get(f"/playlists/{playlist['persistent_id']}/tracks")
+    assert response.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert lines[0]['type'] == 'playlist'
+    assert lines[0]['total'] == len(playlist['track_ids'])
+    assert [line['id'] for line in lines[1:]] == playlist['track_ids']
+
+
+def test_playlist_tracks_errors(client):
+    assert client.get('/playlists/not-an-id/tracks').status_code == 400
+    assert client.get('/playlists/FFFFFFFFFFFFFFFF/tracks').status_code == 404
+    assert client.get('/playlists/FFFFFFFFFFFFFFFF/tracks?format=xml').status_code == 400
+
+
+def test_playlist_tracks_unavailable_while_music_is_quit(client, server, playlist, monkeypatch):
+    monkeypatch.setattr(server.playlist_catalogue, '_members', OrderedDict())
+    monkeypatch.setattr(server.backend, 'running', False)
+    response = client.get(f"/playlists/{playlist['persistent_id']}/tracks?format=json")
+    assert response.status_code == 503
+    assert response.get_json() == {'error': 'Music is not running'}
@@ -0,0 +1,26 @@
+import pytest
+
+
+@pytest.fixture
+def live_backend(server, monkeypatch):
+    """Fail if an endpoint asks the backend for a single field."""
+    def live(*args):
+        raise AssertionError('queried the player directly')
+    for name in ('get_playback_state', 'get_volume', 'get_repeat_mode', 'get_shuffle_mode'):
+        monkeypatch.setattr(server.backend, name, live)
+    return server.backend
+
+
+def test_repeat_and_shuffle_come_from_the_cached_state(client, server, live_backend, monkeypatch):
+    monkeypatch.setattr(live_backend, 'repeat', 'all')
+    monkeypatch.setattr(live_backend, 'shuffle', True)
+    server.music_monitor.get_state(0)
+    assert client.get('/repeat').get_json() == {'repeat': 'all'}
+    assert client.get('/shuffle').get_json() == {'shuffle': True}
+
+
+def test_status_comes_from_the_cached_state(client, server, live_backend):
+    entry = server.music_monitor.get_state(0)
+    status = client.get('/status').get_json()
+    assert status['volume'] == entry.snapshot.volume
+    assert status['repeat'] == entry.snapshot.repeat
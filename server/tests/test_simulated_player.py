@@ -0,0 +1,82 @@
+import pytest
+
+from library_index import TRACK_FIELDS
+from player_backend import TrackNotFound
+from simulated_player import NOT_RUNNING, SimulatedBackend
+
+
+@pytest.fixture
+def backend():
+    return SimulatedBackend(library_size=30)
+
+
+def test_play_starts_the_library(backend):
+    backend.play_track_by_id(backend.library.tracks[0]['database_id'])
+    snapshot = backend.get_player_snapshot()
+    assert snapshot.state == 'playing'
+    assert snapshot.persistent_id == backend.library.tracks[0]['persistent_id']
+
+
+def test_next_and_previous_report_the_new_track(backend):
+    tracks = backend.library.tracks
+    backend.play_track_by_id(tracks[0]['database_id'])
+    assert backend.next_track() == tracks[1]['persistent_id']
+    assert backend.previous_track() == tracks[0]['persistent_id']
+
+
+def test_previous_restarts_a_track_past_its_start(backend):
+    tracks = backend.library.tracks
+    backend.play_track_by_id(tracks[1]['database_id'])
+    backend.seek_to_position(30)
+    assert backend.previous_track() == tracks[1]['persistent_id']
+    assert backend.get_player_snapshot().position < 1
+
+
+def test_skip_with_nothing_playing(backend):
+    assert backend.next_track() == ''
+
+
+def test_seek_is_clamped(backend):
+    track = backend.library.tracks[0]
+    backend.play_track_by_id(track['database_id'])
+    backend.pause()
+    backend.seek_to_position(-5)
+    assert backend.get_player_snapshot().position == 0
+    backend.seek_to_position(1e9)
+    assert backend.get_player_snapshot().position == track['duration']
+
+
+def test_unknown_track(backend):
+    with pytest.raises(TrackNotFound):
+        backend.play_track_by_persistent_id('0000000000000000')
+
+
+def test_commands_refused_while_quit(backend):
+    backend.set_running(False)
+    for command, args in [('play', ()), ('pause', ()), ('next_track', ()), ('previous_track', ()),
+                          ('seek_to_position', (10,)), ('set_volume', (10,)),
+                          ('play_track_by_id', (backend.library.tracks[0]['database_id'],))]:
+        assert getattr(backend, command)(*args) == NOT_RUNNING
+    snapshot = backend.get_player_snapshot()
+    assert not snapshot.running and snapshot.state == 'stopped'
+    assert backend.volume == 50
+    assert backend.commands == 0
+
+
+def test_export_matches_applescript_types(backend):
+    tracks = backend.export_library()
+    assert len(tracks) == 30
+    track = tracks[0]
+    assert set(track) == set(TRACK_FIELDS)
+    assert isinstance(track['database_id'], int)
+    assert isinstance(track['year'], int) and isinstance(track['play_count'], int)
+    assert isinstance(track['duration'], float) and isinstance(track['modified'], str)
+    fetched = backend.fetch_tracks([track['persistent_id']])
+    assert fetched == [track]
+
+
+def test_playlist_membership(backend):
+    playlist = backend.library.find_playlist('Mix 1')
+    ids = backend.get_playlist_track_ids(playlist['persistent_id'].lower())
+    assert ids == [int(i) for i in playlist['track_ids']]
+    assert backend.get_playlist_track_ids('FFFFFFFFFFFFFFFF') is None
@@ -0,0 +1,66 @@
+import threading
+import time
+
+from player_state import PlayerSnapshot
+from state_store import StateStore
+
+
+def snapshot(**fields):
+    defaults = dict(state='playing', persistent_id='0123456789ABCDEF', duration=200.0, position=10.0)
+    return PlayerSnapshot(**{**defaults, **fields})
+
+
+def test_empty_store():
+    store = StateStore()
+    assert store.read() is None
+    assert store.version == 0
+
+
+def test_position_alone_does_not_bump_version():
+    store = StateStore()
+    first = store.publish(snapshot(position=10.0))
+    second = store.publish(snapshot(position=10.0))
+    assert first.version == second.version == 1
+    assert store.read() is second
+
+
+def test_state_change_bumps_version():
+    store = StateStore()
+    store.publish(snapshot())
+    entry = store.publish(snapshot(state='paused'))
+    assert entry.version == 2
+    assert not entry.seeked
+
+
+def test_seek_bumps_version():
+    store = StateStore(position_tolerance=1.0)
+    store.publish(snapshot(position=10.0))
+    entry = store.publish(snapshot(position=120.0))
+    assert entry.version == 2
+    assert entry.seeked
+
+
+def test_current_projects_position():
+    store = StateStore()
+    entry = store.publish(snapshot(position=10.0))
+    assert entry.current().position >= 10.0
+    paused = store.publish(snapshot(state='paused', position=42.0))
+    assert paused.current().position == 42.0
+
+
+def test_wait_for_wakes_on_publish():
+    store = StateStore()
+    store.publish(snapshot())
+    timer = threading.Timer(0.05, store.publish, args=(snapshot(state='paused'),))
+    timer.start()
+    started = time.monotonic()
+    entry = store.wait_for(lambda e: e.snapshot.state == 'paused', timeout=2.0)
+    timer.join()
+    assert entry is not None and entry.version == 2
+    assert time.monotonic() - started < 1.0
+
+
+def test_wait_for_times_out():
+    store = StateStore()
+    store.publish(snapshot())
+    assert store.wait_for(lambda e: e.snapshot.state == 'paused', timeout=0.05) is None
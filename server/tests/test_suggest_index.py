@@ -0,0 +1,51 @@
+import pytest
+
+from library_fixtures import LIBRARY
+from library_index import LibraryIndex
+from suggest_index import SuggestIndex
+
+
+@pytest.fixture
+def library(tmp_path):
+    index = LibraryIndex(str(tmp_path / 'library.db'))
+    index.rebuild(LIBRARY)
+    yield index
+    index.close()
+
+
+def built(library, **kwargs):
+    suggest = SuggestIndex(library, **kwargs)
+    suggest.refresh(wait=True)
+    assert suggest.ready
+    return suggest
+
+
+def test_matches_any_word(library):
+    names = [r['name'] for r in built(library).suggest('me').items]
+    assert 'Army of Me' in names and 'Mezzanine' in names
+
+
+def test_whole_name_prefix_ranks_first(library):
+    # 'Army of Me' has more plays, but only 'Outro' starts with the query
+    results = built(library).suggest('o', kinds=['track']).items
+    assert [r['name'] for r in results] == ['Outro', 'Army of Me']
+
+
+def test_complete_scan_is_not_truncated(library):
+    assert built(library).suggest('m').truncated is False
+
+
+def test_scan_limit_is_reported(library):
+    suggestions = built(library, max_scan=2).suggest('m')
+    assert suggestions.truncated is True
+    assert len(suggestions.items) <= 2
+    # A prefix with fewer matching keys than the limit is still exact
+    assert built(library, max_scan=2).suggest('hyper').truncated is False
+
+
+def test_emptied_library_drops_the_build(library):
+    suggest = built(library)
+    library.rebuild([])
+    suggest.refresh(wait=True)
+    assert not suggest.ready
+    assert suggest.suggest('m').items == []
@@ -0,0 +1,74 @@
+import pytest
+
+from library_fixtures import LIBRARY
+from track_store import TrackStore
+
+
+@pytest.fixture
+def store():
+    return TrackStore.build(LIBRARY, library_version=7)
+
+
+def test_lookups(store):
+    row = store.find(104)
+    assert store.value(row, 'name') == 'Teardrop'
+    assert store.find(999) is None
+    assert store.find_persistent(LIBRARY[2]['persistent_id'].lower()) == store.find(103)
+    assert store.find_persistent('not hex') is None
+    assert store.persistent_id_for(105) == LIBRARY[4]['persistent_id']
+
+
+def test_sparse_ids_fall_back_to_bisect():
+    sparse = [dict(t, database_id=t['database_id'] * 1000) for t in LIBRARY]
+    store = TrackStore.build(sparse)
+    assert store.find(104000) is not None
+    assert store.find(104001) is None
+
+
+def test_strings_are_interned(store):
+    fields = ('name', 'artist', 'album', 'album_artist', 'genre')
+    distinct = {track[field] for track in LIBRARY for field in fields} | {''}
+    assert store.string_count == len(distinct)
+
+
+def test_save_open_round_trip(store, tmp_path):
+    path = str(tmp_path / 'tracks.bin')
+    store.save(path)
+    opened = TrackStore.open(path)
+    try:
+        assert opened is not None
+        assert len(opened) == len(store)
+        assert opened.library_version == 7
+        for row in store.all_rows():
+            assert opened.row(row) == store.row(row)
+            assert opened.track_item(row) == store.track_item(row)
+        assert opened.find_persistent(LIBRARY[0]['persistent_id']) == store.find(101)
+        assert list(opened.sort_keys('name')) == list(store.sort_keys('name'))
+    finally:
+        opened.close()
+
+
+def test_open_rejects_missing_and_corrupt(tmp_path):
+    assert TrackStore.open(str(tmp_path / 'missing.bin')) is None
+    corrupt = tmp_path / 'corrupt.bin'
+    corrupt.write_bytes(b'garbage' * 10)
+    assert TrackStore.open(str(corrupt)) is None
+    empty = tmp_path / 'empty.bin'
+    empty.write_bytes(b'')
+    assert TrackStore.open(str(empty)) is None
+
+
+def test_open_rejects_truncated(store, tmp_path):
+    path = tmp_path / 'tracks.bin'
+    store.save(str(path))
+    path.write_bytes(path.read_bytes()[:-64])
+    assert TrackStore.open(str(path)) is None
+
+
+def test_empty_store_round_trip(tmp_path):
+    path = str(tmp_path / 'empty.bin')
+    TrackStore.build([]).save(path)
+    opened = TrackStore.open(path)
+    assert opened is not None and len(opened) == 0
+    assert opened.find(1) is None
+    opened.close()
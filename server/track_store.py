@@ -0,0 +1,482 @@
+"""
+Columnar, memory-mappable snapshot of the track library.
+
+Each track field is one typed array instead of a key in a per-track dict:
+
+    database_id        uint32, rows are sorted by it (lookups bisect)
+    persistent_id      uint64 (the 16 hex digits as a number)
+    name, artist, ...  uint32 ids into one interned string table
+    year, play_count   uint16 / uint32
+    duration_ms        uint32
+    modified           int64 modification stamp
+
+Strings are stored once each, as UTF-8 in a single blob addressed by an
+offsets array, with a precomputed sort rank per string. A persistent-ID
+lookup bisects a sorted copy of the persistent_id column.
+
+The store can be saved to a single file and opened again with mmap, so the
+arrays are paged in on demand and startup does no parsing at all.
+
+Filters, sorts and aggregations work on whole columns with map/compress/
+sorted over the arrays, so the per-row work happens in C.
+"""
+
+import bisect
+import itertools
+import mmap
+import operator
+import os
+import struct
+import sys
+from array import array
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from derived_index import DerivedIndex, normalize
+from library_index import TRACK_FIELDS, LibraryIndex
+
+
+STRING_FIELDS = ['name', 'artist', 'album', 'album_artist', 'genre']
+
+# Numeric columns and their array typecodes
+NUMERIC_FIELDS = {
+    'database_id': 'I',
+    'persistent_id': 'Q',
+    'year': 'H',
+    'duration_ms': 'I',
+    'play_count': 'I',
+    'modified': 'q',
+}
+
+MAGIC = b'MRTS'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sBxHIQI')       # magic, little-endian flag, format, sections, library version, rows
+SECTION = struct.Struct('<16s2xHQQ')      # name, typecode, offset, item count
+ALIGN = 8
+
+# Direct database-ID lookup tables may span up to this many IDs per track
+DIRECT_SPAN = 4
+NO_ROW = 0xffffffff
+
+
+def _parse_pid(persistent_id: Optional[str]) -> int:
+    try:
+        return int(persistent_id, 16)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _format_pid(value: int) -> str:
+    return '%016X' % value
+
+
+class Groups(NamedTuple):
+    """Rows grouped by key; group i is order[starts[i]:starts[i + 1]]."""
+    keys: List[int]        # Ascending
+    starts: List[int]      # One more than there are groups
+    order: array           # Row indices sorted by key
+    durations: List[int]   # Total duration (ms) per group
+    plays: List[int]       # Total play count per group
+
+    def rows(self, group: int) -> array:
+        return self.order[self.starts[group]:self.starts[group + 1]]
+
+    def count(self, group: int) -> int:
+        return self.starts[group + 1] - self.starts[group]
+
+    def totals(self) -> Dict[int, Tuple[int, int, int]]:
+        """Group key -> (tracks, duration_ms, play_count)."""
+        return {key: (self.count(i), self.durations[i], self.plays[i])
+                for i, key in enumerate(self.keys)}
+
+
+class TrackStore:
+    """Columnar track table with interned strings."""
+
+    def __init__(self, columns: Dict[str, Sequence[int]], offsets: Sequence[int],
+                 blob: Any, ranks: Sequence[int], pid_sorted: Sequence[int],
+                 pid_rows: Sequence[int], library_version: int = 0,
+                 backing: Optional[mmap.mmap] = None):
+        self.columns = columns
+        self.offsets = offsets
+        self.blob = blob
+        self.ranks = ranks
+        self.pid_sorted = pid_sorted
+        self.pid_rows = pid_rows
+        self.library_version = library_version
+        self._mmap = backing
+        self._derived: Dict[tuple, Any] = {}
+
+    # Construction
+
+    @classmethod
+    def build(cls, tracks: Iterable[Dict[str, Any]], library_version: int = 0) -> 'TrackStore':
+        """Build from track dicts keyed by TRACK_FIELDS (any order)."""
+        columns = {field: array(code) for field, code in NUMERIC_FIELDS.items()}
+        columns.update({field: array('I') for field in STRING_FIELDS})
+        strings: Dict[str, int] = {}
+
+        def intern(text):
+            text = text or ''
+            sid = strings.get(text)
+            if sid is None:
+                sid = strings[text] = len(strings)
+            return sid
+
+        intern('')
+        for track in sorted(tracks, key=lambda t: int(t['database_id'])):
+            columns['database_id'].append(int(track['database_id']))
+            columns['persistent_id'].append(_parse_pid(track.get('persistent_id')))
+            columns['year'].append(min(max(int(track.get('year') or 0), 0), 0xffff))
+            columns['duration_ms'].append(int(round((track.get('duration') or 0) * 1000)))
+            columns['play_count'].append(int(track.get('play_count') or 0))
+            columns['modified'].append(int(track.get('modified') or 0))
+            for field in STRING_FIELDS:
+                columns[field].append(intern(track.get(field)))
+
+        offsets = array('I', [0])
+        blob = bytearray()
+        for text in strings:  # Insertion order == string id
+            blob += text.encode('utf-8')
+            offsets.append(len(blob))
+
+        texts = list(strings)
+        ranks = array('I', bytes(4 * len(texts)))
+        for rank, sid in enumerate(sorted(range(len(texts)), key=lambda sid: normalize(texts[sid]))):
+            ranks[sid] = rank
+
+        pids = columns['persistent_id']
+        pid_rows = array('I', sorted(range(len(pids)), key=pids.__getitem__))
+        pid_sorted = array('Q', map(pids.__getitem__, pid_rows))
+        return cls(columns, offsets, bytes(blob), ranks, pid_sorted, pid_rows, library_version)
+
+    # Persistence
+
+    def _sections(self) -> List[Tuple[str, str, Any]]:
+        sections = [(field, column.typecode, column) for field, column in self.columns.items()]
+        sections += [
+            ('_offsets', 'I', self.offsets),
+            ('_ranks', 'I', self.ranks),
+            ('_pid_sorted', 'Q', self.pid_sorted),
+            ('_pid_rows', 'I', self.pid_rows),
+            ('_blob', 'B', self.blob),
+        ]
+        return sections
+
+    def save(self, path: str):
+        """Write the store to `path` atomically."""
+        sections = self._sections()
+        offset = HEADER.size + SECTION.size * len(sections)
+        table = []
+        for name, code, data in sections:
+            offset += -offset % ALIGN
+            size = len(data) * array(code).itemsize
+            table.append((name, code, offset, len(data)))
+            offset += size
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, sys.byteorder == 'little', FORMAT_VERSION,
+                                len(sections), self.library_version, len(self)))
+            for name, code, data_offset, count in table:
+                f.write(SECTION.pack(name.encode('ascii'), ord(code), data_offset, count))
+            for (_, code, data), (_, _, data_offset, _) in zip(sections, table):
+                f.write(b'\0' * (data_offset - f.tell()))
+                f.write(data if isinstance(data, (bytes, bytearray)) else memoryview(data).cast('B'))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def open(cls, path: str) -> Optional['TrackStore']:
+        """
+        Memory-map a saved store.
+
+        Returns:
+            TrackStore: Backed by the file, or None if it is missing or was
+                        written by an incompatible version or platform
+        """
+        try:
+            with open(path, 'rb') as f:
+                backing = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+
+        try:
+            magic, little, version, count, library_version, rows = HEADER.unpack_from(backing, 0)
+            if (magic != MAGIC or version != FORMAT_VERSION
+                    or bool(little) != (sys.byteorder == 'little')):
+                raise ValueError('incompatible track store')
+            sections = {}
+            for i in range(count):
+                name, code, offset, items = SECTION.unpack_from(backing, HEADER.size + i * SECTION.size)
+                code = chr(code)
+                size = items * array(code).itemsize
+                if offset + size > len(backing):
+                    raise ValueError('truncated track store')
+                sections[name.rstrip(b'\0').decode('ascii')] = memoryview(backing)[offset:offset + size].cast(code)
+            columns = {field: sections[field] for field in list(NUMERIC_FIELDS) + STRING_FIELDS}
+            if any(len(column) != rows for column in columns.values()):
+                raise ValueError('inconsistent track store')
+        except (struct.error, ValueError, TypeError, KeyError):
+            sections = columns = None
+            try:
+                backing.close()
+            except BufferError:
+                pass
+            return None
+
+        return cls(columns, sections['_offsets'], sections['_blob'], sections['_ranks'],
+                   sections['_pid_sorted'], sections['_pid_rows'], library_version, backing)
+
+    # Access
+
+    def __len__(self) -> int:
+        return len(self.columns['database_id'])
+
+    def string(self, sid: int) -> str:
+        return bytes(self.blob[self.offsets[sid]:self.offsets[sid + 1]]).decode('utf-8')
+
+    @property
+    def string_count(self) -> int:
+        return len(self.offsets) - 1
+
+    def value(self, row: int, field: str) -> Any:
+        """One field of one row, decoded."""
+        if field in STRING_FIELDS:
+            return self.string(self.columns[field][row])
+        if field == 'persistent_id':
+            return _format_pid(self.columns[field][row])
+        if field == 'duration':
+            return self.columns['duration_ms'][row] / 1000
+        if field == 'modified':
+            return str(self.columns[field][row])
+        return self.columns[field][row]
+
+    def row(self, row: int, fields: Sequence[str] = TRACK_FIELDS) -> Dict[str, Any]:
+        return {field: self.value(row, field) for field in fields}
+
+    def track_item(self, row: int) -> Dict[str, Any]:
+        """A row as a track dict shaped like /search results, plus details."""
+        return {
+            'type': 'track',
+            'id': str(self.columns['database_id'][row]),
+            'persistent_id': self.value(row, 'persistent_id'),
+            'name': self.value(row, 'name'),
+            'artist': self.value(row, 'artist'),
+            'album': self.value(row, 'album'),
+            'year': self.columns['year'][row] or None,
+            'duration': self.value(row, 'duration'),
+            'play_count': self.columns['play_count'][row],
+        }
+
+    def find(self, database_id: int) -> Optional[int]:
+        """Row index for a database ID, or None."""
+        ids = self.columns['database_id']
+        database_id = int(database_id)
+        slots = self._cached(('slots',), self._direct_slots)
+        if slots:
+            slot = database_id - ids[0]
+            if 0 <= slot < len(slots) and slots[slot] != NO_ROW:
+                return slots[slot]
+            return None
+        row = bisect.bisect_left(ids, database_id)
+        return row if row < len(ids) and ids[row] == database_id else None
+
+    def _direct_slots(self) -> array:
+        """
+        Row per database ID offset, when IDs are dense enough to allow it.
+
+        Music hands out database IDs mostly in sequence, so a table spanning
+        the ID range turns lookups into one index operation. Sparse ranges
+        get an empty table and lookups bisect instead.
+        """
+        ids = self.columns['database_id']
+        if not len(ids):
+            return array('I')
+        span = ids[-1] - ids[0] + 1
+        if span > DIRECT_SPAN * len(ids):
+            return array('I')
+        slots = array('I', [NO_ROW]) * span
+        base = ids[0]
+        for row, database_id in enumerate(ids):
+            slots[database_id - base] = row
+        return slots
+
+    def persistent_id_for(self, database_id: int) -> Optional[str]:
+        """Persistent ID of the track with `database_id`, or None."""
+        row = self.find(database_id)
+        return None if row is None else _format_pid(self.columns['persistent_id'][row])
+
+    def find_persistent(self, persistent_id: str) -> Optional[int]:
+        """Row index for a persistent ID, or None."""
+        value = _parse_pid(persistent_id)
+        i = bisect.bisect_left(self.pid_sorted, value)
+        if i < len(self.pid_sorted) and self.pid_sorted[i] == value:
+            return self.pid_rows[i]
+        return None
+
+    # Column operations
+
+    def all_rows(self) -> range:
+        return range(len(self))
+
+    def filter_strings(self, field: str, predicate: Callable[[str], bool],
+                       rows: Optional[Iterable[int]] = None) -> array:
+        """
+        Rows whose `field` satisfies `predicate`.
+
+        The predicate runs once per distinct value of the column, not once
+        per row.
+        """
+        column = self.columns[field]
+        if rows is None:
+            rows, values = self.all_rows(), column
+        else:
+            rows = list(rows)
+            values = list(map(column.__getitem__, rows))
+        matching = {sid for sid in set(values) if predicate(self.string(sid))}
+        return array('I', itertools.compress(rows, map(matching.__contains__, values)))
+
+    def filter_range(self, field: str, low: Optional[int] = None, high: Optional[int] = None,
+                     rows: Optional[Iterable[int]] = None) -> array:
+        """Rows whose numeric `field` lies within [low, high]."""
+        column = self.columns[field]
+        if rows is None:
+            rows, values = self.all_rows(), column
+        else:
+            rows = list(rows)
+            values = list(map(column.__getitem__, rows))
+        keep = itertools.repeat(True)
+        if low is not None:
+            keep = map(operator.ge, values, itertools.repeat(low))
+        if high is not None:
+            below = map(operator.le, values, itertools.repeat(high))
+            keep = below if low is None else map(operator.and_, keep, below)
+        return array('I', itertools.compress(rows, keep))
+
+    def _cached(self, key: tuple, compute: Callable[[], Any]) -> Any:
+        # The store is immutable, so derived whole-column arrays never go stale
+        value = self._derived.get(key)
+        if value is None:
+            value = self._derived[key] = compute()
+        return value
+
+    def sort_keys(self, field: str) -> Sequence[int]:
+        """Per-row sort key for `field` (string ranks for string fields)."""
+        column = self.columns[field]
+        if field not in STRING_FIELDS:
+            return column
+        return self._cached(('sort', field), lambda: array('I', map(self.ranks.__getitem__, column)))
+
+    def sort(self, rows: Iterable[int], field: str, reverse: bool = False) -> List[int]:
+        """Rows ordered by `field` (strings case- and accent-insensitively)."""
+        keys = self.sort_keys(field)
+        return sorted(rows, key=keys.__getitem__, reverse=reverse)
+
+    def group_keys(self, *fields: str) -> Sequence[int]:
+        """
+        Per-row group key combining one or two string fields.
+
+        A pair of fields is packed into one int (first << 32 | second), so
+        groups compare as ints.
+        """
+        if len(fields) == 1:
+            return self.columns[fields[0]]
+        first, second = (self.columns[field] for field in fields)
+        return self._cached(('group',) + fields, lambda: array('Q', map(
+            operator.or_, map(operator.lshift, first, itertools.repeat(32)), second)))
+
+    def group(self, keys: Sequence[int], rows: Optional[Iterable[int]] = None) -> 'Groups':
+        """
+        Rows grouped by key, with per-group totals.
+
+        Rows are sorted by key once (stably, so each group keeps database ID
+        order); group boundaries and prefix sums over that order then give
+        each group's totals without a per-row loop.
+
+        Args:
+            keys: Per-row keys, e.g. from group_keys()
+            rows: Restrict to these rows
+        """
+        rows = self.all_rows() if rows is None else rows
+        order = array('I', sorted(rows, key=keys.__getitem__))
+        if not order:
+            return Groups([], [0], order, [], [])
+        ordered_keys = list(map(keys.__getitem__, order))
+        starts = [0, *itertools.compress(range(1, len(order)), map(
+            operator.ne, itertools.islice(ordered_keys, 1, None), ordered_keys)), len(order)]
+        durations = [0, *itertools.accumulate(map(self.columns['duration_ms'].__getitem__, order))]
+        plays = [0, *itertools.accumulate(map(self.columns['play_count'].__getitem__, order))]
+        bounds = list(zip(starts, starts[1:]))
+        return Groups(
+            keys=[ordered_keys[start] for start, _ in bounds],
+            starts=starts,
+            order=order,
+            durations=[durations[end] - durations[start] for start, end in bounds],
+            plays=[plays[end] - plays[start] for start, end in bounds],
+        )
+
+    def aggregate(self, fields: Sequence[str], rows: Optional[Iterable[int]] = None
+                  ) -> Dict[int, Tuple[int, int, int]]:
+        """
+        Track count, total duration (ms) and total plays per group.
+
+        Whole-library results are cached.
+
+        Args:
+            fields: One or two string fields to group by (see group_keys)
+            rows: Restrict to these rows
+
+        Returns:
+            dict: group key -> (tracks, duration_ms, play_count)
+        """
+        fields = tuple(fields)
+        if rows is None:
+            return self._cached(('aggregate',) + fields,
+                                lambda: self.group(self.group_keys(*fields)).totals())
+        return self.group(self.group_keys(*fields), rows).totals()
+
+    def close(self):
+        """Release the file mapping (the store must not be used afterwards)."""
+        if self._mmap is not None:
+            self.columns = {}
+            self._derived = {}
+            self.offsets = self.blob = self.ranks = self.pid_sorted = self.pid_rows = None
+            try:
+                self._mmap.close()
+            except BufferError:
+                pass  # Views are still referenced; the mapping is freed with them
+            self._mmap = None
+
+
+class TrackStoreIndex(DerivedIndex):
+    """Keeps a TrackStore file in step with the library index."""
+
+    name = 'track store'
+    fields = TRACK_FIELDS
+
+    def __init__(self, library_index: LibraryIndex, path: str):
+        super().__init__(library_index)
+        self.path = path
+        # Startup: map the saved snapshot instead of rebuilding it. If the
+        # index has moved on since, refresh() rebuilds while it is served.
+        store = TrackStore.open(path)
+        if store is not None:
+            self._build = store
+            self._version = store.library_version
+
+    @property
+    def store(self) -> Optional[TrackStore]:
+        return self._build
+
+    def build(self, rows: Iterable[tuple]) -> TrackStore:
+        version = self.library_index.version
+        tracks = (dict(zip(self.fields, row)) for row in rows)
+        TrackStore.build(tracks, version).save(self.path)
+        return TrackStore.open(self.path)
+
+    def stats(self):
+        store = self._build
+        stats = super().stats()
+        if store is not None:
+            stats.update({'tracks': len(store), 'strings': store.string_count,
+                          'file_bytes': os.path.getsize(self.path) if os.path.exists(self.path) else 0})
+        return stats